@@ -0,0 +1,84 @@
+"""
+Benchmark ortak kurulumu - alt süreç, geçici veritabanı, şema ve sayaçlar.
+
+Engine modül yüklenirken DATABASE_URL'den kurulduğu için her benchmark
+ölçümünü ayrı bir süreçte yapar: main() run_worker(__file__, ...) ile betiği
+`--worker` argümanıyla yeniden başlatır, işçi init_database() ile şemayı kurar.
+
+    BENCH_DATABASE_URL verilirse o veritabanı, yoksa geçici dizinde bir SQLite dosyası.
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def quiet():
+    """Veritabanı katmanının çıktısını (migrasyon, seed, hata) sustur."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def worker_env(database_url: str, **extra: str) -> Dict[str, str]:
+    """İşçi süreç ortamı: verilen veritabanı, sağlık kontrolü kapalı."""
+    return {**os.environ, "DATABASE_URL": database_url, "DB_HEALTH_CHECK_SECONDS": "0", **extra}
+
+
+def worker_command(script: str, *args) -> List[str]:
+    return [sys.executable, script, "--worker", *map(str, args)]
+
+
+def run_worker(script: str, *args, database_url: Optional[str] = None, **extra_env: str) -> int:
+    """
+    script'i `--worker *args` ile alt süreçte çalıştır, çıkış kodunu döndür.
+    database_url verilmezse BENCH_DATABASE_URL ya da geçici SQLite dosyası
+    kullanılır; database_url ve ek ortam değerlerindeki {tmp} geçici dizindir.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if database_url:
+            url = database_url.format(tmp=tmp)
+        else:
+            url = os.getenv("BENCH_DATABASE_URL", "") or f"sqlite:///{tmp}/{Path(script).stem}.db"
+        extra = {key: value.format(tmp=tmp) for key, value in extra_env.items()}
+        return subprocess.run(worker_command(script, *args), env=worker_env(url, **extra)).returncode
+
+
+def init_database() -> None:
+    """Şemayı kur (çıktısız); kurulamazsa süreçten çık."""
+    from src.database import models
+
+    with quiet():
+        if not models.init_db():
+            raise SystemExit("Veritabanı başlatılamadı.")
+
+
+def task_rows(count: int, **fields) -> Iterator[Dict]:
+    """bulk.import_rows() için `count` cooldown görevi; alanlar `fields` ile değiştirilir."""
+    for i in range(count):
+        yield {
+            "category": "Tekrarlanabilir",
+            "reset_type": "cooldown",
+            "task": f"Görev {i}",
+            "cooldown_minutes": 60,
+            **fields,
+        }
+
+
+class StatementCounter:
+    """Engine'de çalışan SQL ifadesi sayacı (SQLite'ın açık BEGIN ifadeleri sayılmaz)."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args, **kwargs):
+        if not statement.lstrip().upper().startswith("BEGIN"):
+            self.count += 1
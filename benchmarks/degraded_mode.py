@@ -0,0 +1,292 @@
+"""
+Kesinti modu - devre kesici, yerel kopyadan okuma ve reaksiyon günlüğü.
+
+Tek sunucuda görevler oluşturur, bildirimlerini gönderir (gönderim hattının
+kaydı, flush) ve yerel kopyayı dosyaya yazar. Ardından veritabanı dosyasının
+dizinini taşıyıp yerine dosya adında bir dizin koyarak kesinti oluşturur
+(havuz boşaltılır, yeni bağlantı açılamaz):
+
+    devre               ilk okumalar bağlantı hatasıyla yerel kopyaya düşer,
+                        DB_CIRCUIT_FAILURES hatadan sonra devre açılır; açık
+                        devrede okuma başına süre (bağlantı denenmez)
+    okuma               görev / kategori okumaları boş değil, yerel kopyayla aynı
+    yazma               reaksiyon geçişleri günlüğe yazılır ve kopyaya uygulanır;
+                        aynı mesaja ikinci reaksiyon False; kesintide gönderilen
+                        bildirimlerin reaksiyonları da günlüğe girer
+    soğuk başlangıç     yeni süreçte (veritabanı hâlâ yokken) dosyadan yüklenen
+                        kopya ve günlük aynı görevleri / kayıtları verir
+    dönüş               dizin geri konur; deneme bağlantısı devreyi kapatır,
+                        tampon ve günlük yazılır: her geçiş reaksiyon anıyla tam
+                        bir kez uygulanır, tekrar oynatma bir şey değiştirmez
+
+Uyuşmazlık varsa ayrıntıları yazdırır ve sıfırdan farklı kodla çıkar.
+
+Kullanım:
+    python benchmarks/degraded_mode.py [görev_sayısı]
+
+Kesinti dosya taşımayla oluşturulduğu için yalnızca geçici SQLite veritabanıyla çalışır.
+"""
+
+import itertools
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import init_database, quiet, run_worker, task_rows
+
+
+GUILD = "970000000000000000"
+CHANNEL = "971000000000000000"
+READS = 200
+
+_sequence = itertools.count(1)
+
+
+def send(task_id: int) -> str:
+    """Gönderim hattının yaptığı kayıt (bkz. notifications.register_message)."""
+    from src.database.messages import message_registry, message_row, KIND_NOTIFICATION
+    from src.database.operations import notification_sent_update
+    from src.database.write_buffer import write_buffer
+
+    message_id = str(1_000_000_000 + next(_sequence))
+    row = message_row(message_id, CHANNEL, task_id, KIND_NOTIFICATION)
+    message_registry.add(row)
+    write_buffer.record_message(row)
+    write_buffer.record(notification_sent_update(task_id, message_id))
+    return message_id
+
+
+def db_file() -> Path:
+    from src.database import models
+    return Path(models.engine.url.database)
+
+
+def outage() -> None:
+    """Havuzu boşalt, dizini taşı; veritabanı dosyasının yerinde dizin kalır (açılamaz)."""
+    from src.database import models
+
+    models.engine.dispose()
+    path = db_file()
+    path.parent.rename(path.parent.with_name(path.parent.name + "-down"))
+    path.mkdir(parents=True)
+
+
+def restore() -> None:
+    path = db_file()
+    path.rmdir()
+    path.parent.rmdir()
+    path.parent.with_name(path.parent.name + "-down").rename(path.parent)
+
+
+def read_tasks():
+    from src.database import degraded, operations
+    return degraded.call_or_fallback(operations.get_all_tasks_with_status, degraded.local_tasks_with_status)
+
+
+# =============================================================================
+# Kontroller
+# =============================================================================
+
+def check_circuit(expected: int) -> int:
+    """İlk okumalar kopyaya düşer, devre açılır; açık devrede okuma süresi."""
+    from src.database.pool import circuit, DB_CIRCUIT_FAILURES
+
+    failures = 0
+    with quiet():
+        for _ in range(DB_CIRCUIT_FAILURES):
+            if len(read_tasks()) != expected:
+                failures += 1
+        opened = circuit.is_open
+
+        # Süre dolunca yarı açık devrede tek deneme yapılır (hata yine kopyaya düşer)
+        started = time.perf_counter()
+        for _ in range(READS):
+            tasks = read_tasks()
+        per_read = (time.perf_counter() - started) / READS
+
+    if not opened:
+        print(f"  ❌ devre {DB_CIRCUIT_FAILURES} hatadan sonra açılmadı ({circuit.state})")
+        return failures + 1
+    print(f"  devre: {circuit.state} ({circuit.trips} kez)  kopyadan okuma {per_read * 1e6:.0f} µs ({expected} görev)")
+    if len(tasks) != expected:
+        print(f"  ❌ açık devrede {len(tasks)} görev okundu, beklenen {expected}")
+        failures += 1
+    return failures
+
+
+def check_reads(tasks) -> int:
+    from src.database import degraded
+
+    failures = 0
+    category_id = tasks[0].category_id
+    if len(degraded.local_categories()) != 1:
+        print(f"  ❌ kategoriler: {degraded.local_categories()}")
+        failures += 1
+    if len(degraded.local_tasks_by_category(category_id)) != len(tasks):
+        print("  ❌ kategori görevleri eksik")
+        failures += 1
+    if degraded.local_task_by_id(tasks[-1].id) is None:
+        print("  ❌ görev id ile bulunamadı")
+        failures += 1
+    return failures
+
+
+def check_journal(messages: dict) -> int:
+    """Her mesaja ✅ günlüğe yazılır, ikincisi False; kopya tamamlanmayı gösterir."""
+    from src.database import degraded, operations
+
+    with quiet():
+        first = [degraded.call_or_journal(operations.mark_task_completed, t, m) for t, m in messages.items()]
+        second = [degraded.call_or_journal(operations.mark_task_completed, t, m) for t, m in messages.items()]
+
+    failures = 0
+    if not all(first) or any(second):
+        print(f"  ❌ ilk ✅ yazılmayan: {first.count(False)}, ikinci ✅ True: {second.count(True)}")
+        failures += 1
+
+    done = {t.id for t in read_tasks() if t.last_status == "completed"}
+    missing = set(messages) - done
+    if missing:
+        print(f"  ❌ kopyada tamamlanmamış: {sorted(missing)[:10]}")
+        failures += 1
+    print(f"  günlük: {degraded.pending_journal_entries()} kayıt ({len(messages)} reaksiyon x2)")
+    if degraded.pending_journal_entries() != len(messages):
+        failures += 1
+    return failures
+
+
+def check_buffer() -> int:
+    from src.database.write_buffer import write_buffer
+
+    pending = write_buffer.pending_count()
+    if write_buffer.flush() != 0 or write_buffer.pending_count() != pending or not pending:
+        print(f"  ❌ açık devrede tampon: {pending} -> {write_buffer.pending_count()}")
+        return 1
+    return 0
+
+
+def check_cold_start(expected: int, journaled: int, open_messages: int) -> int:
+    """Yeni süreç, veritabanı yokken: kopya, açık mesajlar ve günlük dosyadan."""
+    result = subprocess.run(
+        [sys.executable, __file__, "--cold", str(expected), str(journaled), str(open_messages)],
+        env=os.environ, capture_output=True, text=True
+    )
+    print(result.stdout.rstrip())
+    if result.returncode:
+        print(result.stderr[-2000:])
+        return 1
+    return 0
+
+
+def cold_worker(expected: int, journaled: int, open_messages: int) -> bool:
+    from src.database import degraded, models
+    from src.database.messages import message_registry
+
+    started = time.perf_counter()
+    with quiet():
+        loaded = degraded.load_local_snapshot()
+        ready = models.init_db()
+        with models.guild_scope(GUILD):
+            tasks = read_tasks()
+    with models.guild_scope(GUILD):
+        completed = sum(t.last_status == "completed" for t in tasks)
+    elapsed = time.perf_counter() - started
+
+    pending = degraded.pending_journal_entries()
+    print(f"  soğuk başlangıç: {loaded} görev yüklendi, init_db={ready}, {len(tasks)} okundu "
+          f"({completed} tamamlanmış), {len(message_registry)} açık mesaj, günlük {pending} - {elapsed * 1000:.0f} ms")
+    return (
+        not ready and len(tasks) == expected and completed == journaled
+        and pending == journaled and len(message_registry) == open_messages
+    )
+
+
+def check_recovery(messages: dict, before) -> int:
+    from src.database import degraded, operations
+    from src.database.pool import circuit, DB_CIRCUIT_RESET_SECONDS
+    from src.database.write_buffer import write_buffer
+
+    restore()
+    time.sleep(DB_CIRCUIT_RESET_SECONDS + 0.1)
+    failures = 0
+    if not degraded.probe_database() or circuit.is_open:
+        print(f"  ❌ deneme bağlantısı devreyi kapatmadı ({circuit.state})")
+        return 1
+
+    written = write_buffer.flush()
+    done, applied = degraded.replay_reaction_journal()
+    print(f"  dönüş: tampon {written} kayıt, günlük {done} kayıt ({applied} geçiş)")
+    if applied != len(messages) or degraded.pending_journal_entries():
+        failures += 1
+
+    after = {t.id: t for t in operations.get_all_tasks()}
+    for task_id in messages:
+        task = after[task_id]
+        if task.last_status != "completed" or task.last_completed_at >= before:
+            print(f"  ❌ {task_id}: {task.last_status} {task.last_completed_at} (reaksiyon < {before})")
+            failures += 1
+
+    # Mesajlar tüketildi: aynı reaksiyon yeniden False
+    again = sum(operations.mark_task_completed(t, m) for t, m in messages.items())
+    if again:
+        print(f"  ❌ tekrar oynatmada {again} geçiş")
+        failures += 1
+    return failures
+
+
+def run(count: int) -> bool:
+    from src.database import bulk, degraded, models, operations
+    from src.database.write_buffer import write_buffer
+    from src.scheduler.timers import get_current_time_naive
+
+    init_database()
+
+    failures = 0
+    with models.guild_scope(GUILD):
+        bulk.import_rows(task_rows(count))
+        tasks = operations.get_all_tasks()
+        half = len(tasks) // 2
+        messages = {t.id: send(t.id) for t in tasks[:half]}
+        write_buffer.flush()
+        degraded.refresh_local_snapshot()
+        degraded.save_local_snapshot()
+        print(f"Backend: {models.get_backend_name()}  görev={len(tasks)}  okuma={READS}")
+
+        outage()
+        failures += check_circuit(len(tasks))
+        failures += check_reads(tasks)
+        # Kesintide gönderilen bildirimler (tamponda bekler); son beşine reaksiyon yok
+        messages.update({t.id: send(t.id) for t in tasks[half:half + 5]})
+        open_messages = [send(t.id) for t in tasks[half + 5:half + 10]]
+        failures += check_buffer()
+        failures += check_journal(messages)
+        degraded.save_local_snapshot()
+        before = get_current_time_naive()
+
+        failures += check_cold_start(len(tasks), len(messages), len(open_messages))
+        failures += check_recovery(messages, before)
+
+    print("✅ Kesinti modu tutarlı" if failures == 0 else f"❌ {failures} uyuşmazlık")
+    return failures == 0
+
+
+def main(count: int) -> None:
+    sys.exit(run_worker(
+        __file__, count,
+        database_url="sqlite:///{tmp}/db/degraded.db",
+        DB_CIRCUIT_RESET_SECONDS="1",
+        DB_SNAPSHOT_PATH="{tmp}/local/snapshot.json",
+        DB_JOURNAL_PATH="{tmp}/local/reaction_journal.jsonl",
+    ))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--worker":
+        sys.exit(0 if run(int(sys.argv[2])) else 1)
+    elif len(sys.argv) > 4 and sys.argv[1] == "--cold":
+        sys.exit(0 if cold_worker(*map(int, sys.argv[2:5])) else 1)
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
@@ -0,0 +1,82 @@
+"""
+Event loop gecikmesi - simüle edilmiş reaksiyon fırtınası.
+Aynı sayıda get_task_by_message_id çağrısını önce senkron (loop üzerinde),
+sonra async_operations ile (DB thread havuzunda) çalıştırır ve bir "heartbeat"
+task'ının gördüğü en büyük / toplam gecikmeyi yazdırır.
+
+Kullanım:
+    DATABASE_URL=postgresql://... python benchmarks/event_loop_stall.py [reaksiyon_sayısı]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import operations, async_operations
+
+
+TICK_SECONDS = 0.005
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """Her TICK_SECONDS'ta uyanır; planlanandan ne kadar geç uyandığını kaydeder."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def storm(handler, message_ids) -> dict:
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(mid) for mid in message_ids))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    return {
+        "elapsed_ms": elapsed * 1000,
+        "max_stall_ms": max(lags, default=0.0) * 1000,
+        "total_stall_ms": sum(lags) * 1000,
+    }
+
+
+async def sync_handler(message_id: str) -> None:
+    operations.get_task_by_message_id(message_id)
+
+
+async def async_handler(message_id: str) -> None:
+    await async_operations.get_task_by_message_id(message_id)
+
+
+async def main(reactions: int) -> None:
+    message_ids = [str(1_000_000 + i) for i in range(reactions)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = await storm(sync_handler, message_ids)
+        after = await storm(async_handler, message_ids)
+
+    print(f"Reaksiyon sayısı: {reactions}")
+    for label, r in (("senkron (önce)", before), ("async (sonra)", after)):
+        print(
+            f"  {label:16} süre={r['elapsed_ms']:8.1f} ms  "
+            f"en büyük duraklama={r['max_stall_ms']:8.1f} ms  "
+            f"toplam duraklama={r['total_stall_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        print("DATABASE_URL ayarlanmamış.")
+        sys.exit(1)
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,118 @@
+"""
+Görev kaydı karşılaştırması - 50k görevde dict vs TaskRecord.
+Eski yol: _task_to_dict() ile 20 anahtarlı dict + get_task_with_status()'ın
+dict(task) kopyası ve 7 ek anahtar. Yeni yol: TaskRecord + attach_status().
+Her iki yol için oluşturma süresi, tepe bellek (tracemalloc) ve bir
+"hazır görevleri seç" taramasının süresi yazdırılır.
+
+Kullanım:
+    python benchmarks/task_records.py [görev_sayısı]
+
+Veritabanı gerekmez; satırlar bellekte üretilir.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.records import TaskRecord, TASK_FIELDS
+from src.scheduler.timers import TaskStatus, TaskState
+
+
+STATUSES = [
+    TaskStatus(state=TaskState.AVAILABLE, message="Hazır"),
+    TaskStatus(state=TaskState.ON_COOLDOWN, message="Beklemede", available_at=datetime(2030, 1, 1)),
+    TaskStatus(state=TaskState.COMPLETED, message="Tamamlandı"),
+]
+
+
+def make_rows(count: int) -> list:
+    """Veritabanından gelen değerlere benzeyen satırlar (TASK_FIELDS sırası)."""
+    created = datetime(2024, 1, 1)
+    return [
+        (
+            i, i % 40, f"Görev {i}", "", 120, 30, True, created,
+            f"Kategori {i % 40}", ("daily", "weekly", "cooldown", "instance")[i % 4],
+            str(900_000 + i % 40), 5, False,
+            False, created, None, str(1_000_000 + i), created, "notified", False,
+            None, None, None,
+        )
+        for i in range(count)
+    ]
+
+
+def build_dicts(rows: list) -> list:
+    result = []
+    for i, row in enumerate(rows):
+        task = dict(zip(TASK_FIELDS, row))
+        status = STATUSES[i % len(STATUSES)]
+        d = dict(task)
+        d["status"] = status
+        d["status_emoji"] = status.emoji
+        d["status_message"] = status.message
+        d["is_available"] = status.is_available
+        d["is_open"] = status.is_open
+        d["current_state"] = status.state.value
+        d["available_at"] = status.available_at
+        result.append(d)
+    return result
+
+
+def build_records(rows: list) -> list:
+    return [
+        TaskRecord(*row).attach_status(STATUSES[i % len(STATUSES)])
+        for i, row in enumerate(rows)
+    ]
+
+
+def scan_dicts(tasks: list) -> int:
+    return sum(1 for t in tasks if t.get("is_available") or t.get("is_open"))
+
+
+def scan_records(tasks: list) -> int:
+    return sum(1 for t in tasks if t.is_available or t.is_open)
+
+
+def measure(build, scan, rows: list) -> dict:
+    # Süre ve bellek ayrı ölçülür; tracemalloc açıkken ayırmalar yavaşlar
+    gc.collect()
+    tracemalloc.start()
+    build(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gc.collect()
+    started = time.perf_counter()
+    tasks = build(rows)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(10):
+        scan(tasks)
+    scan_s = (time.perf_counter() - started) / 10
+
+    return {"build_ms": build_s * 1000, "peak_mb": peak / 1024 / 1024, "scan_ms": scan_s * 1000}
+
+
+def main(count: int) -> None:
+    rows = make_rows(count)
+
+    print(f"Görev sayısı: {count}")
+    for label, build, scan in (
+        ("dict (önce)", build_dicts, scan_dicts),
+        ("TaskRecord (sonra)", build_records, scan_records),
+    ):
+        r = measure(build, scan, rows)
+        print(
+            f"  {label:20} oluşturma={r['build_ms']:8.1f} ms  "
+            f"tepe bellek={r['peak_mb']:7.1f} MB  tarama={r['scan_ms']:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
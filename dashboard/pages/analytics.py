@@ -0,0 +1,115 @@
+"""
+Analiz Sayfası - görev olay geçmişi.
+Yalnızca günlük özet tablosunu (task_event_daily) okur; ham olay günlüğü
+milyonlarca satıra çıksa da sayfa hızlı kalır.
+"""
+
+import streamlit as st
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.models import EVENT_TYPES, EVENT_COMPLETED
+from src.database.operations import get_event_totals, get_daily_event_counts, get_task_event_counts
+from src.scheduler.timers import get_current_time_naive
+
+
+EVENT_LABELS = {
+    "completed": "✅ Tamamlandı",
+    "entered": "🔓 Girildi",
+    "skipped": "⏭️ Geçildi",
+    "snoozed": "⏰ Ertelendi",
+    "notified": "🔔 Bildirildi",
+}
+
+PERIODS = {
+    "Son 7 gün": 7,
+    "Son 30 gün": 30,
+    "Son 90 gün": 90,
+    "Son 365 gün": 365,
+}
+
+
+def show():
+    """Analiz sayfası."""
+
+    st.title("📈 Analiz")
+
+    period = st.selectbox("Dönem", list(PERIODS.keys()), index=1, key="analytics_period")
+    days = PERIODS[period]
+
+    totals = get_event_totals(days)
+
+    if not totals:
+        st.info("Bu dönemde kayıtlı olay yok. Reaksiyonlar ve bildirimler burada görünecek.")
+        return
+
+    show_totals(totals)
+
+    st.write("---")
+
+    show_daily_chart(days)
+
+    st.write("---")
+
+    show_top_tasks(days)
+
+
+def show_totals(totals):
+    """Olay tipine göre toplamlar."""
+
+    columns = st.columns(len(EVENT_TYPES))
+    for col, event_type in zip(columns, EVENT_TYPES):
+        with col:
+            st.metric(EVENT_LABELS[event_type], totals.get(event_type, 0))
+
+
+def show_daily_chart(days: int):
+    """Günlük olay grafiği."""
+
+    st.subheader("📅 Günlük Olaylar")
+
+    rows = get_daily_event_counts(days)
+
+    today = get_current_time_naive().date()
+    all_days = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    index = {day: i for i, day in enumerate(all_days)}
+
+    series = {EVENT_LABELS[e]: [0] * len(all_days) for e in EVENT_TYPES}
+    for row in rows:
+        i = index.get(row["day"])
+        if i is not None and row["event_type"] in EVENT_LABELS:
+            series[EVENT_LABELS[row["event_type"]]][i] = row["count"]
+
+    st.bar_chart({"Gün": [d.isoformat() for d in all_days], **series}, x="Gün")
+
+
+def show_top_tasks(days: int):
+    """Olay tipine göre en çok öne çıkan görevler."""
+
+    st.subheader("🏆 Görevler")
+
+    event_type = st.selectbox(
+        "Olay",
+        list(EVENT_TYPES),
+        index=list(EVENT_TYPES).index(EVENT_COMPLETED),
+        format_func=lambda e: EVENT_LABELS[e],
+        key="analytics_event_type"
+    )
+
+    rows = get_task_event_counts(days, event_type, limit=20)
+
+    if not rows:
+        st.caption("Bu olay tipinde kayıt yok.")
+        return
+
+    st.dataframe(
+        [
+            {"Görev": r["task_name"], "Kategori": r["category_name"], "Adet": r["count"]}
+            for r in rows
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
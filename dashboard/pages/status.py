@@ -39,8 +39,8 @@ def show_summary(tasks):
     """Özet istatistikler."""
     
     total = len(tasks)
-    ready = sum(1 for t in tasks if t.get('is_available') or t.get('is_open'))
-    completed = sum(1 for t in tasks if t.get('is_completed'))
+    ready = sum(1 for t in tasks if t.is_available or t.is_open)
+    completed = sum(1 for t in tasks if t.is_completed)
     on_cooldown = total - ready - completed
     
     col1, col2, col3, col4 = st.columns(4)
@@ -61,7 +61,7 @@ def show_by_category(tasks):
     # Kategorilere göre grupla
     categories = {}
     for task in tasks:
-        cat_name = task.get('category_name', 'Bilinmeyen')
+        cat_name = task.category_name
         if cat_name not in categories:
             categories[cat_name] = []
         categories[cat_name].append(task)
@@ -69,10 +69,10 @@ def show_by_category(tasks):
     icons = {'daily': '🌅', 'weekly': '📆', 'cooldown': '⏱️', 'instance': '🏰'}
     
     for cat_name, cat_tasks in categories.items():
-        reset_type = cat_tasks[0].get('reset_type', 'unknown') if cat_tasks else 'unknown'
+        reset_type = cat_tasks[0].reset_type if cat_tasks else 'unknown'
         icon = icons.get(reset_type, '📁')
         
-        ready_count = sum(1 for t in cat_tasks if t.get('is_available') or t.get('is_open'))
+        ready_count = sum(1 for t in cat_tasks if t.is_available or t.is_open)
         
         header = f"{icon} {cat_name}"
         if ready_count > 0:
@@ -86,10 +86,10 @@ def show_by_category(tasks):
 def show_task_card(task):
     """Tek görev kartı."""
     
-    emoji = task.get('status_emoji', '❓')
-    name = task['name']
-    message = task.get('status_message', '')
-    reset_type = task.get('reset_type', 'unknown')
+    emoji = task.status_emoji
+    name = task.name
+    message = task.status_message
+    reset_type = task.reset_type
     
     col1, col2 = st.columns([1, 3])
     
@@ -102,12 +102,12 @@ def show_task_card(task):
         
         # Ekstra bilgi
         if reset_type in ['cooldown', 'instance']:
-            cd = task.get('cooldown_minutes', 0)
+            cd = task.cooldown_minutes
             if cd > 0:
                 st.caption(f"⏱️ Bekleme: {format_duration(cd)}")
         
         if reset_type == 'instance':
-            active = task.get('active_duration_minutes', 0)
+            active = task.active_duration_minutes
             if active > 0:
                 st.caption(f"🔓 Açık kalma: {format_duration(active)}")
     
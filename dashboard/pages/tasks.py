@@ -3,6 +3,7 @@ Görev Yönetimi Sayfası - PostgreSQL destekli.
 """
 
 import streamlit as st
+import io
 import sys
 from pathlib import Path
 
@@ -16,21 +17,31 @@ from src.database.operations import (
     update_task,
     hard_delete_task
 )
+from src.database.bulk import FORMATS, export_file, import_file
 from dashboard.components.forms import duration_input, format_duration_display
 
 
+SORT_OPTIONS = {
+    "Kategori": False,
+    "Sonraki hazır olma": True,
+}
+
+
 def show():
     """Görev yönetimi sayfasını göster."""
     
     st.title("📋 Görev Yönetimi")
     
-    tab1, tab2 = st.tabs(["📝 Görevleri Gör & Düzenle", "➕ Yeni Görev Ekle"])
+    tab1, tab2, tab3 = st.tabs(["📝 Görevleri Gör & Düzenle", "➕ Yeni Görev Ekle", "📦 Toplu Aktarım"])
     
     with tab1:
         show_tasks_list()
     
     with tab2:
         show_add_task_form()
+    
+    with tab3:
+        show_bulk_transfer()
 
 
 def show_tasks_list():
@@ -39,7 +50,13 @@ def show_tasks_list():
     if st.button("🔄 Yenile", key="refresh_tasks"):
         st.rerun()
     
-    tasks = get_all_tasks_with_status()
+    col_filter, col_sort = st.columns(2)
+    
+    with col_sort:
+        sort_order = st.selectbox("Sıralama", list(SORT_OPTIONS.keys()), key="task_sort")
+    
+    # Sonraki hazır olma sırası saklanan next_available_at indeksinden gelir
+    tasks = get_all_tasks_with_status(by_next_available=SORT_OPTIONS[sort_order])
     categories = get_all_categories(include_inactive=True)
     
     if not tasks:
@@ -47,54 +64,58 @@ def show_tasks_list():
         return
     
     category_names = ["Tüm Kategoriler"] + [c['name'] for c in categories]
-    selected_filter = st.selectbox("Kategoriye Göre Filtrele", category_names, key="task_filter")
+    with col_filter:
+        selected_filter = st.selectbox("Kategoriye Göre Filtrele", category_names, key="task_filter")
     
     if selected_filter != "Tüm Kategoriler":
-        tasks = [t for t in tasks if t.get('category_name') == selected_filter]
+        tasks = [t for t in tasks if t.category_name == selected_filter]
     
     st.write("---")
     
     for task in tasks:
         with st.expander(
-            f"{task.get('status_emoji', '📋')} **{task['name']}** - {task.get('category_name', 'Bilinmeyen')}"
+            f"{task.status_emoji} **{task.name}** - {task.category_name}"
         ):
             col1, col2 = st.columns([3, 1])
             
             with col1:
-                st.write(f"**Açıklama:** {task.get('description') or 'Açıklama yok'}")
-                st.write(f"**Durum:** {task.get('status_message', 'Bilinmeyen')}")
-                st.write(f"**Sıfırlama Tipi:** {task.get('reset_type', 'Bilinmeyen')}")
+                st.write(f"**Açıklama:** {task.description or 'Açıklama yok'}")
+                st.write(f"**Durum:** {task.status_message}")
+                st.write(f"**Sıfırlama Tipi:** {task.reset_type}")
                 
-                if task.get('reset_type') in ['cooldown', 'instance']:
-                    st.write(f"**Bekleme Süresi:** {format_duration_display(task.get('cooldown_minutes', 0))}")
+                if task.next_available_at:
+                    st.write(f"**Sonraki Hazır Olma:** {task.next_available_at.strftime('%d.%m.%Y %H:%M')}")
                 
-                if task.get('reset_type') == 'instance':
-                    st.write(f"**Açık Kalma Süresi:** {format_duration_display(task.get('active_duration_minutes', 0))}")
+                if task.reset_type in ['cooldown', 'instance']:
+                    st.write(f"**Bekleme Süresi:** {format_duration_display(task.cooldown_minutes)}")
+                
+                if task.reset_type == 'instance':
+                    st.write(f"**Açık Kalma Süresi:** {format_duration_display(task.active_duration_minutes)}")
             
             with col2:
-                if st.button("✏️ Düzenle", key=f"edit_btn_{task['id']}"):
-                    st.session_state['editing_task_id'] = task['id']
+                if st.button("✏️ Düzenle", key=f"edit_btn_{task.id}"):
+                    st.session_state['editing_task_id'] = task.id
                     st.rerun()
                 
-                delete_key = f"confirm_delete_{task['id']}"
+                delete_key = f"confirm_delete_{task.id}"
                 if delete_key not in st.session_state:
                     st.session_state[delete_key] = False
                 
                 if not st.session_state[delete_key]:
-                    if st.button("🗑️ Sil", key=f"delete_btn_{task['id']}"):
+                    if st.button("🗑️ Sil", key=f"delete_btn_{task.id}"):
                         st.session_state[delete_key] = True
                         st.rerun()
                 else:
                     st.warning("Emin misin?")
                     col_yes, col_no = st.columns(2)
                     with col_yes:
-                        if st.button("✅ Evet", key=f"yes_{task['id']}"):
-                            hard_delete_task(task['id'])
+                        if st.button("✅ Evet", key=f"yes_{task.id}"):
+                            hard_delete_task(task.id)
                             st.session_state[delete_key] = False
-                            st.success(f"{task['name']} silindi")
+                            st.success(f"{task.name} silindi")
                             st.rerun()
                     with col_no:
-                        if st.button("❌ Hayır", key=f"no_{task['id']}"):
+                        if st.button("❌ Hayır", key=f"no_{task.id}"):
                             st.session_state[delete_key] = False
                             st.rerun()
     
@@ -102,6 +123,52 @@ def show_tasks_list():
         show_edit_task_form(st.session_state['editing_task_id'], categories)
 
 
+def show_bulk_transfer():
+    """Kategori / görev / durum toplu içe ve dışa aktarımı (bkz. run_bulk.py)."""
+    
+    st.subheader("📦 Toplu Aktarım")
+    st.caption(
+        "Görev başına bir satır: kategori, görev ve durum alanları. "
+        "Kategoriler ada, görevler kategori + görev adına göre eşleşir; mevcutlar güncellenir."
+    )
+    
+    fmt = st.radio("Biçim", FORMATS, horizontal=True, key="bulk_format",
+                   format_func=lambda f: {"csv": "CSV", "jsonl": "JSON Lines"}[f])
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write("**📤 Dışa Aktar**")
+        if st.button("Dosyayı Hazırla", key="bulk_export"):
+            buf = io.StringIO()
+            count = export_file(buf, fmt)
+            st.session_state["bulk_export_data"] = (fmt, buf.getvalue(), count)
+        
+        prepared = st.session_state.get("bulk_export_data")
+        if prepared and prepared[0] == fmt:
+            _, data, count = prepared
+            st.download_button(
+                f"⬇️ İndir ({count} satır)",
+                data=data.encode("utf-8"),
+                file_name=f"gorevler.{fmt}",
+                mime="text/csv" if fmt == "csv" else "application/x-ndjson",
+                key="bulk_download"
+            )
+    
+    with col2:
+        st.write("**📥 İçe Aktar**")
+        uploaded = st.file_uploader("Dosya", type=["csv", "jsonl", "ndjson"], key="bulk_upload")
+        if uploaded and st.button("İçe Aktar", type="primary", key="bulk_import"):
+            try:
+                result = import_file(io.TextIOWrapper(uploaded, encoding="utf-8", newline=""), fmt)
+                st.success(
+                    f"{result['rows']} satır: {result['categories']} kategori, "
+                    f"{result['tasks_created']} yeni görev, {result['tasks_updated']} güncellenen görev"
+                )
+            except ValueError as e:
+                st.error(f"İçe aktarım iptal edildi: {e}")
+
+
 def show_add_task_form():
     """Yeni görev ekleme formu."""
     
@@ -204,27 +271,27 @@ def show_edit_task_form(task_id: int, categories: list):
         return
     
     st.write("---")
-    st.subheader(f"✏️ Düzenleniyor: {task['name']}")
+    st.subheader(f"✏️ Düzenleniyor: {task.name}")
     
-    st.info(f"**Kategori:** {task.get('category_name', 'Bilinmeyen')} ({task.get('reset_type', 'bilinmeyen')})")
+    st.info(f"**Kategori:** {task.category_name} ({task.reset_type})")
     
-    reset_type = task.get('reset_type', 'daily')
+    reset_type = task.reset_type
     
     edit_name = st.text_input(
         "📝 Görev Adı",
-        value=task['name'],
+        value=task.name,
         key="edit_name_input"
     )
     
     edit_description = st.text_area(
         "📄 Açıklama",
-        value=task.get('description', '') or '',
+        value=task.description or '',
         key="edit_desc_input",
         height=80
     )
     
-    cooldown_minutes = task.get('cooldown_minutes', 0)
-    active_duration_minutes = task.get('active_duration_minutes', 0)
+    cooldown_minutes = task.cooldown_minutes
+    active_duration_minutes = task.active_duration_minutes
     
     if reset_type == 'cooldown':
         st.write("---")
@@ -232,7 +299,7 @@ def show_edit_task_form(task_id: int, categories: list):
         cooldown_minutes = duration_input(
             "cooldown", 
             "edit_cd",
-            default_minutes=task.get('cooldown_minutes', 0)
+            default_minutes=task.cooldown_minutes
         )
     
     elif reset_type == 'instance':
@@ -241,7 +308,7 @@ def show_edit_task_form(task_id: int, categories: list):
         active_duration_minutes = duration_input(
             "active",
             "edit_active",
-            default_minutes=task.get('active_duration_minutes', 0)
+            default_minutes=task.active_duration_minutes
         )
         
         st.write("---")
@@ -249,7 +316,7 @@ def show_edit_task_form(task_id: int, categories: list):
         cooldown_minutes = duration_input(
             "cooldown",
             "edit_cd",
-            default_minutes=task.get('cooldown_minutes', 0)
+            default_minutes=task.cooldown_minutes
         )
     
     st.write("---")
@@ -12,6 +12,7 @@ DATABASE_URL = os.getenv("DATABASE_URL", "")
 if not DATABASE_URL:
     print("⚠️ UYARI: DATABASE_URL ayarlanmamış!")
     print("Railway veya PostgreSQL kullanıyorsanız bu değişkeni ayarlayın.")
+    print("Tek sunucu için SQLite da kullanılabilir: DATABASE_URL=sqlite:///data/gorevler.db")
 
 from src.bot.client import run_bot
 
@@ -0,0 +1,79 @@
+"""
+Toplu içe / dışa aktarım - kategoriler, görevler ve görev durumları (bkz. src/database/bulk.py).
+
+    python run_bulk.py export gorevler.csv
+    python run_bulk.py export - --format jsonl > gorevler.jsonl
+    python run_bulk.py import gorevler.jsonl
+    python run_bulk.py export sunucu.csv --guild 123456789012345678
+"""
+
+import argparse
+import contextlib
+import sys
+from typing import TextIO
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.database.models import init_db, guild_scope
+from src.database.bulk import FORMATS, detect_format, export_file, import_file
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Görevleri CSV / JSON Lines olarak içe veya dışa aktar.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="Dosya yolu ('-' ise stdin / stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="Verilmezse dosya uzantısından anlaşılır")
+    parser.add_argument("--guild", help="Discord sunucu ID'si (verilmezse sunucuya atanmamış veri)")
+    args = parser.parse_args()
+
+    try:
+        fmt = args.format or detect_format(args.path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Bilgi mesajları stdout'u (dışa aktarım çıktısını) kirletmesin
+    log = sys.stderr
+
+    with contextlib.redirect_stdout(log):
+        ready = init_db()
+
+    if not ready:
+        print("❌ Veritabanı başlatılamadı. DATABASE_URL ayarlı mı?", file=log)
+        return 1
+
+    with guild_scope(args.guild):
+        return run(args, fmt, log)
+
+
+def run(args: argparse.Namespace, fmt: str, log: TextIO) -> int:
+    if args.command == "export":
+        if args.path == "-":
+            count = export_file(sys.stdout, fmt)
+        else:
+            with open(args.path, "w", encoding="utf-8", newline="") as fp:
+                count = export_file(fp, fmt)
+        print(f"📤 {count} satır dışa aktarıldı.", file=log)
+        return 0
+
+    try:
+        if args.path == "-":
+            result = import_file(sys.stdin, fmt)
+        else:
+            with open(args.path, encoding="utf-8", newline="") as fp:
+                result = import_file(fp, fmt)
+    except ValueError as e:
+        print(f"❌ İçe aktarım iptal edildi: {e}", file=log)
+        return 1
+
+    print(
+        f"📥 {result['rows']} satır: {result['categories']} kategori, "
+        f"{result['tasks_created']} yeni görev, {result['tasks_updated']} güncellenen görev.",
+        file=log
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 """
-Discord Bot - PostgreSQL destekli, timezone-aware.
+Discord Bot - PostgreSQL destekli, timezone-aware, çok sunuculu.
 GHOST MODE: Bot her zaman 'Offline' (Görünmez) görünür.
+Komutlar ve reaksiyonlar çağrıldıkları sunucunun verisiyle çalışır (bkz. models.guild_scope).
 """
 
 import os
@@ -9,23 +10,44 @@ import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
-from src.database.models import init_db, get_setting, set_setting, is_bot_active, set_bot_active
-from src.database.operations import (
+from src.database.models import settings_cache, engine, get_backend_name, guild_scope, set_current_guild
+from src.database.pool import get_pool_stats, circuit
+from src.database.degraded import degraded_notice
+from src.database.write_buffer import write_buffer
+from src.database.async_operations import (
+    init_db,
+    sync_message_registry,
+    load_local_snapshot,
+    get_setting,
+    set_setting,
+    is_bot_active,
+    set_bot_active,
+    is_character_mode,
+    set_character_mode,
     get_all_categories,
     set_category_channel,
+    prepare_guild,
+    reset_guild_data,
     get_all_tasks_with_status,
     get_tasks_by_category,
-    get_task_with_status,
-    get_category_by_channel_id
+    get_category_by_channel_id,
+    get_user_characters,
+    add_character,
+    select_character,
+    delete_character
 )
+from src.database.operations import get_task_with_status
 from src.bot.notifications import send_lite_notification, send_status_overview
 from src.bot.reactions import handle_reaction_add
+from src.bot.routing import channel_router
 from src.scheduler.jobs import setup_scheduler
 from src.utils.time_utils import format_duration
 
 load_dotenv()
 
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+# Tek sunuculu eski kurulumun verisini devralacak sunucu (verilmezse ilk sunucu)
+GUILD_ID = os.getenv("DISCORD_GUILD_ID", "")
 CHANNEL_ID = os.getenv("DISCORD_CHANNEL_ID", "")
 PARENT_CATEGORY_ID = os.getenv("DISCORD_PARENT_CATEGORY_ID", "")
 DATABASE_URL = os.getenv("DATABASE_URL", "")
@@ -39,25 +61,23 @@ intents.guilds = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
-notification_channel = None
-guild_ref = None
+# Sunucu id -> genel bildirim kanalı
+notification_channels = {}
 
 
-async def get_or_create_general_channel():
-    """Genel kanal oluştur veya bul."""
-    global guild_ref
-    
+async def get_or_create_general_channel(guild: discord.Guild):
+    """Sunucuda genel kanal oluştur veya bul (guild_scope içinde çağrılır)."""
     if CHANNEL_ID:
-        ch = bot.get_channel(int(CHANNEL_ID))
+        ch = guild.get_channel(int(CHANNEL_ID))
         if ch:
             return ch
     
-    parent_id = get_setting('discord_parent_category_id', PARENT_CATEGORY_ID)
-    if not parent_id or not guild_ref:
+    parent_id = await get_setting('discord_parent_category_id', PARENT_CATEGORY_ID)
+    if not parent_id:
         return None
     
     try:
-        parent = guild_ref.get_channel(int(parent_id))
+        parent = guild.get_channel(int(parent_id))
         if not parent:
             return None
         
@@ -65,42 +85,65 @@ async def get_or_create_general_channel():
             if ch.name in ['general-tasks', 'genel-gorevler']:
                 return ch
         
-        return await guild_ref.create_text_channel(name='genel-gorevler', category=parent)
+        return await guild.create_text_channel(name='genel-gorevler', category=parent)
     except:
         return None
 
 
+async def setup_guild(guild: discord.Guild) -> None:
+    """Sunucunun verisini hazırla, genel kanalını bul ve başlangıç mesajını at."""
+    with guild_scope(guild.id):
+        state = await prepare_guild(guild.id)
+        
+        channel = await get_or_create_general_channel(guild)
+        if channel:
+            notification_channels[guild.id] = channel
+        
+        active = await is_bot_active()
+        print(f"📍 Sunucu: {guild.name} ({state}) | "
+              f"{'AKTİF' if active else 'DURAKLATILDI'} | "
+              f"Kanal: {'#' + channel.name if channel else '-'}")
+        
+        if channel:
+            # Durum mesajı at ama botun kendisi gri kalsın
+            status_text = "🕵️ AKTİF (Gizli Mod)" if active else "💤 DURAKLATILDI"
+            await channel.send(
+                f"🐉 **Görev Takipçisi** devrede.\n"
+                f"Durum: {status_text}\n"
+                f"*Not: Bot her zaman çevrimdışı görünecektir.*"
+            )
+
+
 @bot.event
 async def on_ready():
-    global notification_channel, guild_ref
-    
     print("━" * 40)
     print("🐉 War of Dragons - Görev Takipçisi")
     print("👻 SÜRÜM: 3.7 - GHOST MODE (Tamamen Görünmez)")
     print("━" * 40)
     print(f"✅ Bot: {bot.user.name}")
-    print(f"🗄️ Veritabanı: PostgreSQL")
+    print(f"🗄️ Veritabanı: {get_backend_name()}")
     
+    db_ready = True
     if DATABASE_URL:
-        init_db()
+        # Soğuk başlangıçta veritabanı yoksa komutlar son yerel kopyadan çalışır
+        print(f"💾 Yerel kopya: {await load_local_snapshot()} görev")
+        db_ready = await init_db()
+        if db_ready:
+            # Reaksiyonlar bellekten çözülür (bkz. database/messages.py)
+            print(f"📨 Açık bildirim mesajı: {await sync_message_registry()}")
+        elif circuit.failures:
+            circuit.trip()
+            print("⚠️ Veritabanına ulaşılamıyor - kesinti modunda başlatıldı")
     else:
         print("⚠️ DATABASE_URL ayarlanmamış!")
     
-    if bot.guilds:
-        guild_ref = bot.guilds[0]
-        print(f"📍 Sunucu: {guild_ref.name}")
-    
-    if CHANNEL_ID:
-        notification_channel = bot.get_channel(int(CHANNEL_ID))
-    
-    if not notification_channel:
-        notification_channel = await get_or_create_general_channel()
-    
-    if notification_channel:
-        print(f"📢 Kanal: #{notification_channel.name}")
-    
-    active = is_bot_active()
-    print(f"🔘 Mantıksal Durum: {'AKTİF' if active else 'DURAKLATILDI'}")
+    # Atanmamış veriyi devralacak sunucu önce hazırlanır
+    guilds = sorted(bot.guilds, key=lambda g: str(g.id) != GUILD_ID)
+    for guild in guilds:
+        try:
+            await setup_guild(guild)
+        except Exception as e:
+            print(f"❌ Sunucu hazırlanamadı ({guild.name}): {e}")
     
     # --- GHOST MODE: HER ZAMAN GÖRÜNMEZ OL ---
     await bot.change_presence(status=discord.Status.invisible)
@@ -108,23 +151,32 @@ async def on_ready():
     
     print("━" * 40)
     
-    setup_scheduler(bot, notification_channel)
-    
-    if notification_channel:
-        # Durum mesajı at ama botun kendisi gri kalsın
-        status_text = "🕵️ AKTİF (Gizli Mod)" if active else "💤 DURAKLATILDI"
-        await notification_channel.send(
-            f"🐉 **Görev Takipçisi** devrede.\n"
-            f"Durum: {status_text}\n"
-            f"*Not: Bot her zaman çevrimdışı görünecektir.*"
-        )
+    setup_scheduler(bot, notification_channels, db_ready=db_ready)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    await setup_guild(guild)
+
+
+@bot.before_invoke
+async def scope_command_to_guild(ctx: commands.Context):
+    # Her komut kendi task'ında çalışır; kapsam komut bitince düşer
+    set_current_guild(ctx.guild.id if ctx.guild else None)
 
 
 @bot.event
 async def on_reaction_add(reaction: discord.Reaction, user: discord.User):
     if user.bot:
         return
-    await handle_reaction_add(reaction, user, bot)
+    guild = reaction.message.guild
+    with guild_scope(guild.id if guild else None):
+        await handle_reaction_add(reaction, user, bot)
+
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    channel_router.on_channel_deleted(channel)
 
 
 # =============================================================================
@@ -134,31 +186,23 @@ async def on_reaction_add(reaction: discord.Reaction, user: discord.User):
 @bot.command(name="baslat", aliases=["start"])
 async def cmd_baslat(ctx: commands.Context):
     """Botu başlat (Ama görünmez kal)."""
-    set_bot_active(True)
+    await set_bot_active(True)
     
     # Botu aktif et ama GÖRÜNMEZ (Invisible) yapmaya zorla
     await bot.change_presence(status=discord.Status.invisible)
     
     await ctx.send("🕵️ **Bot BAŞLATILDI!** (Gizli Mod)\nBen çevrimdışı görüneceğim ama arka planda görevleri takip ediyorum.")
     
-    all_tasks = get_all_tasks_with_status()
-    ready = [t for t in all_tasks if t.get('is_available') or t.get('is_open')]
+    all_tasks = await get_all_tasks_with_status()
+    ready = [t for t in all_tasks if t.is_available or t.is_open]
     
     if ready:
         await ctx.send(f"📋 **{len(ready)}** görev hazır!")
         
         for task in ready:
-            cat_name = task.get('category_name', '')
-            category = next((c for c in get_all_categories() if c['name'] == cat_name), None)
-            
-            target = ctx.channel
-            if category and category.get('discord_channel_id'):
-                try:
-                    ch = ctx.guild.get_channel(int(category['discord_channel_id']))
-                    if ch:
-                        target = ch
-                except:
-                    pass
+            target = await channel_router.resolve(
+                ctx.guild, task.category_name, task.category_id
+            ) or ctx.channel
             
             await send_lite_notification(target, task)
             await asyncio.sleep(MESSAGE_DELAY)
@@ -169,7 +213,7 @@ async def cmd_baslat(ctx: commands.Context):
 @bot.command(name="durdur", aliases=["stop"])
 async def cmd_durdur(ctx: commands.Context):
     """Botu durdur (Zaten görünmez)."""
-    set_bot_active(False)
+    await set_bot_active(False)
     
     # Zaten görünmez ama garanti olsun
     await bot.change_presence(status=discord.Status.invisible)
@@ -184,15 +228,22 @@ async def cmd_durdur(ctx: commands.Context):
 @bot.command(name="durum", aliases=["status"])
 async def cmd_durum(ctx: commands.Context):
     """Tüm görevlerin durumu."""
+    notice = degraded_notice()
+    if notice:
+        await ctx.send(notice)
     await send_status_overview(ctx.channel)
 
 
 @bot.command(name="kontrol", aliases=["check"])
 async def cmd_kontrol(ctx: commands.Context):
     """Hazır görevleri kontrol et."""
+    notice = degraded_notice()
+    if notice:
+        await ctx.send(notice)
+    
     channel_id = str(ctx.channel.id)
     
-    category = get_category_by_channel_id(channel_id)
+    category = await get_category_by_channel_id(channel_id)
     
     if category:
         await check_single_category(ctx, category)
@@ -205,19 +256,19 @@ async def check_single_category(ctx, category: dict):
     cat_name = category['name']
     cat_id = category['id']
     
-    tasks = get_tasks_by_category(cat_id)
+    tasks = await get_tasks_by_category(cat_id)
     
     if not tasks:
         await ctx.send(f"📋 **{cat_name}** kategorisinde görev yok.")
         return
     
     tasks_with_status = [get_task_with_status(t) for t in tasks]
-    ready = [t for t in tasks_with_status if t.get('is_available') or t.get('is_open')]
+    ready = [t for t in tasks_with_status if t.is_available or t.is_open]
     
     if not ready:
         await ctx.send(f"✅ **{cat_name}** - Tüm görevler tamamlandı!")
         for t in tasks_with_status:
-            await ctx.send(f"{t['status_emoji']} **{t['name']}** - {t['status_message']}")
+            await ctx.send(f"{t.status_emoji} **{t.name}** - {t.status_message}")
             await asyncio.sleep(0.3)
         return
     
@@ -230,8 +281,8 @@ async def check_single_category(ctx, category: dict):
 
 async def check_all_categories(ctx):
     """Tüm kategorileri kontrol et."""
-    all_tasks = get_all_tasks_with_status()
-    ready = [t for t in all_tasks if t.get('is_available') or t.get('is_open')]
+    all_tasks = await get_all_tasks_with_status()
+    ready = [t for t in all_tasks if t.is_available or t.is_open]
     
     if not ready:
         await ctx.send("✅ Yapılacak görev yok!")
@@ -239,7 +290,7 @@ async def check_all_categories(ctx):
     
     grouped = {}
     for t in ready:
-        cat = t.get('category_name', 'Bilinmeyen')
+        cat = t.category_name
         if cat not in grouped:
             grouped[cat] = []
         grouped[cat].append(t)
@@ -247,16 +298,7 @@ async def check_all_categories(ctx):
     await ctx.send(f"📋 Toplam **{len(ready)}** görev hazır:")
     
     for cat_name, tasks in grouped.items():
-        category = next((c for c in get_all_categories() if c['name'] == cat_name), None)
-        target = ctx.channel
-        
-        if category and category.get('discord_channel_id'):
-            try:
-                ch = ctx.guild.get_channel(int(category['discord_channel_id']))
-                if ch:
-                    target = ch
-            except:
-                pass
+        target = await channel_router.resolve(ctx.guild, cat_name) or ctx.channel
         
         for task in tasks:
             await send_lite_notification(target, task)
@@ -270,16 +312,16 @@ async def check_all_categories(ctx):
 @bot.command(name="gunluk", aliases=["daily"])
 async def cmd_gunluk(ctx):
     """Günlük görevler."""
-    tasks = get_all_tasks_with_status()
-    daily = [t for t in tasks if t['reset_type'] == 'daily']
+    tasks = await get_all_tasks_with_status()
+    daily = [t for t in tasks if t.reset_type == 'daily']
     
     if not daily:
         await ctx.send("Günlük görev yok.")
         return
     
     for t in daily:
-        s = "✅" if t.get('is_completed') else "❌"
-        await ctx.send(f"{s} **{t['name']}** - {t['status_message']}")
+        s = "✅" if t.is_completed else "❌"
+        await ctx.send(f"{s} **{t.name}** - {t.status_message}")
         await asyncio.sleep(0.3)
 
 
@@ -288,8 +330,8 @@ async def cmd_haftalik(ctx):
     """Haftalık görevler."""
     from src.utils.time_utils import get_weekly_urgency_message
     
-    tasks = get_all_tasks_with_status()
-    weekly = [t for t in tasks if t['reset_type'] == 'weekly']
+    tasks = await get_all_tasks_with_status()
+    weekly = [t for t in tasks if t.reset_type == 'weekly']
     
     if not weekly:
         await ctx.send("Haftalık görev yok.")
@@ -298,25 +340,25 @@ async def cmd_haftalik(ctx):
     await ctx.send(get_weekly_urgency_message())
     
     for t in weekly:
-        s = "✅" if t.get('is_completed') else "❌"
-        await ctx.send(f"{s} **{t['name']}** - {t['status_message']}")
+        s = "✅" if t.is_completed else "❌"
+        await ctx.send(f"{s} **{t.name}** - {t.status_message}")
         await asyncio.sleep(0.3)
 
 
 @bot.command(name="instancelar", aliases=["instances"])
 async def cmd_instancelar(ctx):
     """Instance durumları."""
-    tasks = get_all_tasks_with_status()
-    instances = [t for t in tasks if t['reset_type'] == 'instance']
+    tasks = await get_all_tasks_with_status()
+    instances = [t for t in tasks if t.reset_type == 'instance']
     
     if not instances:
         await ctx.send("Instance yok.")
         return
     
     for t in instances:
-        cd = format_duration(t.get('cooldown_minutes', 0))
-        active = format_duration(t.get('active_duration_minutes', 0))
-        await ctx.send(f"{t['status_emoji']} **{t['name']}** - {t['status_message']} | Bekleme: {cd} | Açık: {active}")
+        cd = format_duration(t.cooldown_minutes)
+        active = format_duration(t.active_duration_minutes)
+        await ctx.send(f"{t.status_emoji} **{t.name}** - {t.status_message} | Bekleme: {cd} | Açık: {active}")
         await asyncio.sleep(0.3)
 
 
@@ -331,7 +373,7 @@ async def cmd_sync_channels(ctx):
         await ctx.send("❌ Sunucuda kullan!")
         return
     
-    parent_id = get_setting('discord_parent_category_id', PARENT_CATEGORY_ID)
+    parent_id = await get_setting('discord_parent_category_id', PARENT_CATEGORY_ID)
     if not parent_id:
         await ctx.send("⚠️ Önce: `!kategori_ayarla <id>`")
         return
@@ -347,7 +389,7 @@ async def cmd_sync_channels(ctx):
     
     await ctx.send(f"🔄 Kanallar eşleniyor...")
     
-    categories = get_all_categories()
+    categories = await get_all_categories()
     created = existing = 0
     
     for cat in categories:
@@ -362,12 +404,12 @@ async def cmd_sync_channels(ctx):
         found = next((c for c in parent.channels if c.name == name), None)
         
         if found:
-            set_category_channel(cat['id'], str(found.id))
+            await set_category_channel(cat['id'], str(found.id))
             existing += 1
         else:
             try:
                 ch = await ctx.guild.create_text_channel(name=name, category=parent)
-                set_category_channel(cat['id'], str(ch.id))
+                await set_category_channel(cat['id'], str(ch.id))
                 created += 1
                 await asyncio.sleep(0.5)
             except:
@@ -380,7 +422,7 @@ async def cmd_sync_channels(ctx):
 async def cmd_set_parent(ctx, category_id: str = None):
     """Ana kategoriyi ayarla."""
     if not category_id:
-        current = get_setting('discord_parent_category_id', '')
+        current = await get_setting('discord_parent_category_id', '')
         await ctx.send(f"Mevcut: `{current or 'Ayarlanmamış'}`")
         return
     
@@ -390,7 +432,7 @@ async def cmd_set_parent(ctx, category_id: str = None):
             await ctx.send("❌ Bu bir kategori değil!")
             return
         
-        set_setting('discord_parent_category_id', category_id)
+        await set_setting('discord_parent_category_id', category_id)
         await ctx.send(f"✅ **{cat.name}** ayarlandı. `!kanallari_esle` çalıştır.")
     except:
         await ctx.send("❌ Geçersiz ID")
@@ -399,8 +441,8 @@ async def cmd_set_parent(ctx, category_id: str = None):
 @bot.command(name="ayarlar", aliases=["settings"])
 async def cmd_ayarlar(ctx):
     """Bot ayarları."""
-    parent = get_setting('discord_parent_category_id', '') or 'Ayarlanmamış'
-    active = "🟢 AKTİF" if is_bot_active() else "🔴 DURAKLATILDI"
+    parent = await get_setting('discord_parent_category_id', '') or 'Ayarlanmamış'
+    active = "🟢 AKTİF" if await is_bot_active() else "🔴 DURAKLATILDI"
     
     parent_name = 'Ayarlanmamış'
     if parent != 'Ayarlanmamış':
@@ -410,11 +452,36 @@ async def cmd_ayarlar(ctx):
         except:
             pass
     
+    cache = settings_cache.stats()
+    
     await ctx.send(
         f"⚙️ **Ayarlar**\n"
         f"📁 Ana Kategori: **{parent_name}**\n"
         f"🔘 Durum: {active}\n"
-        f"🗄️ PostgreSQL | ⚡ 1dk | 🔄 60dk"
+        f"🗄️ {get_backend_name()} | ⚡ 1dk | 🔄 60dk\n"
+        f"🧠 Ayar önbelleği: {cache['hits']} isabet / {cache['misses']} ıskalama ({cache['guilds']} sunucu)"
+    )
+
+
+@bot.command(name="havuz", aliases=["pool"])
+async def cmd_havuz(ctx):
+    """Veritabanı bağlantı havuzu metrikleri."""
+    stats = get_pool_stats(engine)
+    if not stats:
+        await ctx.send("❌ DATABASE_URL ayarlanmamış!")
+        return
+    
+    health = {True: "🟢", False: "🔴", None: "⚪"}[stats['last_health_ok']]
+    circuit_icon = "🟢" if stats['circuit_state'] == "closed" else "🔴"
+    
+    await ctx.send(
+        f"🔌 **Bağlantı Havuzu**\n"
+        f"📦 Boyut: {stats['size']} | Kullanımda: {stats['checked_out']} | Taşma: {stats['overflow']}\n"
+        f"⏱️ Bekleme: ort. {stats['wait_avg_ms']:.1f} ms / en fazla {stats['wait_max_ms']:.1f} ms "
+        f"({stats['checkouts']} checkout, {stats['timeouts']} zaman aşımı)\n"
+        f"♻️ Bağlantı açılışı: {stats['connects']} | Geçersiz kılma: {stats['invalidations']}\n"
+        f"{health} Sağlık kontrolü: {stats['health_checks']} ({stats['health_failures']} başarısız)\n"
+        f"{circuit_icon} Devre: {stats['circuit_state']} ({stats['circuit_trips']} kez açıldı)"
     )
 
 
@@ -423,7 +490,7 @@ async def cmd_kanal_debug(ctx):
     """Kanal eşleştirmelerini göster."""
     channel_id = str(ctx.channel.id)
     
-    categories = get_all_categories()
+    categories = await get_all_categories()
     
     lines = [
         f"🔍 **Kanal Debug**",
@@ -449,6 +516,74 @@ async def cmd_kanal_debug(ctx):
     await ctx.send("\n".join(lines))
 
 
+@bot.group(name="karakter", aliases=["character"], invoke_without_command=True)
+async def cmd_karakter(ctx):
+    """Karakterlerini listele; reaksiyonların aktif (⭐) karaktere yazılır."""
+    characters = await get_user_characters(str(ctx.author.id))
+    
+    if not characters:
+        await ctx.send(
+            "👤 Henüz karakterin yok.\n"
+            "`!karakter ekle <ad>` ile ekle; görevlerin bu karakter için ayrı takip edilir."
+        )
+        return
+    
+    lines = [f"👤 **{ctx.author.display_name}** karakterleri"]
+    for c in characters:
+        lines.append(f"{'⭐' if c['is_active'] else '▫️'} {c['name']}")
+    lines.append("\n`!karakter ekle <ad>` / `!karakter sec <ad>` / `!karakter sil <ad>`")
+    
+    await ctx.send("\n".join(lines))
+
+
+@cmd_karakter.command(name="mod", aliases=["mode"])
+async def cmd_karakter_mod(ctx, state: str = None):
+    """Bildirimleri karakter başına gönder (ac) ya da ortak bildirime dön (kapat)."""
+    if state in ("ac", "on"):
+        await set_character_mode(True)
+    elif state in ("kapat", "off"):
+        await set_character_mode(False)
+    
+    if await is_character_mode():
+        await ctx.send(
+            "👥 Karakter modu **AÇIK**: bildirimler karakter başına gönderilir; "
+            "karakteri olmayan oyuncular bildirim almaz. `!karakter mod kapat`"
+        )
+    else:
+        await ctx.send("📢 Karakter modu **KAPALI**: ortak bildirimler gönderilir. `!karakter mod ac`")
+
+
+@cmd_karakter.command(name="ekle", aliases=["add"])
+async def cmd_karakter_ekle(ctx, *, name: str):
+    """Yeni karakter ekle ve aktif yap."""
+    character = await add_character(str(ctx.author.id), name.strip()[:100])
+    if not character:
+        await ctx.send(f"❌ **{name}** eklenemedi (aynı adda karakterin olabilir).")
+        return
+    
+    await ctx.send(f"✅ **{character['name']}** eklendi ve aktif karakterin oldu.")
+
+
+@cmd_karakter.command(name="sec", aliases=["select"])
+async def cmd_karakter_sec(ctx, *, name: str):
+    """Reaksiyonların yazılacağı karakteri seç."""
+    character = await select_character(str(ctx.author.id), name.strip())
+    if not character:
+        await ctx.send(f"❌ **{name}** adında karakterin yok.")
+        return
+    
+    await ctx.send(f"⭐ Aktif karakter: **{character['name']}**")
+
+
+@cmd_karakter.command(name="sil", aliases=["delete"])
+async def cmd_karakter_sil(ctx, *, name: str):
+    """Karakteri ve görev durumlarını sil."""
+    if await delete_character(str(ctx.author.id), name.strip()):
+        await ctx.send(f"🗑️ **{name}** silindi.")
+    else:
+        await ctx.send(f"❌ **{name}** adında karakterin yok.")
+
+
 @bot.command(name="yardim", aliases=["help_tasks", "komutlar"])
 async def cmd_yardim(ctx):
     """Yardım."""
@@ -456,7 +591,8 @@ async def cmd_yardim(ctx):
         "🐉 **Komutlar**\n"
         "`!durum` / `!kontrol` / `!gunluk` / `!haftalik` / `!instancelar`\n"
         "\n🔘 `!baslat` / `!durdur`\n"
-        "🔧 `!kategori_ayarla` / `!kanallari_esle` / `!kanal_debug` / `!ayarlar`\n"
+        "👤 `!karakter` / `!karakter ekle <ad>` / `!karakter sec <ad>` / `!karakter sil <ad>` / `!karakter mod`\n"
+        "🔧 `!kategori_ayarla` / `!kanallari_esle` / `!kanal_debug` / `!ayarlar` / `!havuz`\n"
         "⚠️ `!veritabani_sifirla` - Veritabanını sıfırla (DİKKAT!)\n"
         "\n**Butonlar:** ✅ Yaptım | ❌ Geç | ⏰ Hatırlat"
     )
@@ -465,36 +601,29 @@ async def cmd_yardim(ctx):
 @bot.command(name="veritabani_sifirla", aliases=["reset_db"])
 async def cmd_reset_db(ctx):
     """
-    Veritabanı tablolarını sıfırla ve yeniden oluştur.
-    DİKKAT: Tüm veriler silinir!
+    Bu sunucunun kategorilerini, görevlerini, karakterlerini ve ayarlarını sıfırla.
+    DİKKAT: Sunucunun tüm verisi silinir! Diğer sunuculara dokunulmaz.
     """
-    await ctx.send("⚠️ **DİKKAT:** Veritabanını sıfırlamak üzeresin!\nTüm görevler ve durumlar silinecek.\n\n5 saniye içinde devam ediliyor...")
+    if not ctx.guild:
+        await ctx.send("❌ Sunucuda kullan!")
+        return
+    
+    await ctx.send("⚠️ **DİKKAT:** Bu sunucunun verisini sıfırlamak üzeresin!\nTüm görevler, durumlar ve karakterler silinecek.\n\n5 saniye içinde devam ediliyor...")
     await asyncio.sleep(5)
     
     await ctx.send("🔄 Veritabanı sıfırlanıyor...")
     
     try:
-        from src.database.models import Base, engine, SessionLocal, seed_database
-        
         if not engine:
             await ctx.send("❌ DATABASE_URL ayarlanmamış!")
             return
         
-        # Tüm tabloları sil
-        await ctx.send("🗑️ Tablolar siliniyor...")
-        Base.metadata.drop_all(bind=engine)
-        
-        # Tabloları yeniden oluştur
-        await ctx.send("📦 Tablolar oluşturuluyor...")
-        Base.metadata.create_all(bind=engine)
-        
-        # Varsayılan verileri ekle
-        await ctx.send("🌱 Varsayılan veriler ekleniyor...")
-        seed_database()
+        # Sunucunun verisini sil ve varsayılan verileri ekle
+        await ctx.send("🗑️ Sunucu verisi siliniyor, varsayılan veriler ekleniyor...")
+        await reset_guild_data(ctx.guild.id)
         
         await ctx.send(
             "✅ **Veritabanı başarıyla sıfırlandı!**\n"
-            "Tüm tablolar yeniden oluşturuldu.\n"
             "Varsayılan kategoriler ve görevler eklendi.\n\n"
             "`!kanallari_esle` komutunu çalıştırarak kanalları eşleştir."
         )
@@ -514,6 +643,9 @@ def run_bot():
         print("⚠️ DATABASE_URL ayarlanmamış!")
     
     bot.run(DISCORD_TOKEN)
+    
+    # Kapanışta bekleyen bildirim kayıtlarını yaz
+    write_buffer.flush()
 
 
 if __name__ == "__main__":
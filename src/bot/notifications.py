@@ -6,10 +6,14 @@ Lite embed formatı korunmuş, oyuncu dostu Türkçe mesajlar.
 import discord
 from typing import Optional, Dict, List
 
-from src.database.operations import (
-    get_all_tasks_with_status,
-    update_notification_sent
+from src.database.async_operations import get_all_tasks_with_status
+from src.database.messages import (
+    message_registry, message_row, KIND_NOTIFICATION, KIND_PRE_NOTIFICATION,
+    KIND_CHARACTER, KIND_CHARACTER_PRE, STATE_DELETED
 )
+from src.database.operations import notification_sent_update
+from src.database.records import TaskRecord
+from src.database.write_buffer import write_buffer
 from src.utils.time_utils import format_duration
 
 
@@ -17,23 +21,63 @@ EMOJI_COMPLETE = "✅"
 EMOJI_SKIP = "❌"
 EMOJI_SNOOZE = "⏰"
 
+RESET_TYPE_COLORS = {
+    'daily': 0x3498db,
+    'weekly': 0x9b59b6,
+    'cooldown': 0xe67e22,
+    'instance': 0xf1c40f,
+}
+
+
+def register_message(message: discord.Message, task_id: int, kind: str) -> None:
+    """Gönderilen mesajı kayda ekle: reaksiyonlar hemen bellekten çözülür, tablo tampondan yazılır."""
+    row = message_row(message.id, message.channel.id, task_id, kind)
+    message_registry.add(row)
+    write_buffer.record_message(row)
+
+
+async def delete_notification_message(
+    guild: discord.Guild,
+    message_id: str,
+    fallback_channel: Optional[discord.abc.Messageable] = None
+) -> bool:
+    """
+    Bildirim mesajını getirmeden sil (kayıttaki kanal ile PartialMessage).
+    Kanal bilinmiyorsa fallback_channel kullanılır. Silindiyse True.
+    """
+    entry = message_registry.get(message_id)
+    channel = None
+    if entry and entry.channel_id:
+        channel = guild.get_channel(int(entry.channel_id))
+    channel = channel or fallback_channel
+    if channel is None:
+        return False
+    
+    try:
+        await channel.get_partial_message(int(message_id)).delete()
+    except discord.NotFound:
+        pass
+    except Exception as e:
+        print(f"Mesaj silme hatası ({message_id}): {e}")
+        return False
+    
+    message_registry.discard([message_id])
+    write_buffer.record_message_state(message_id, STATE_DELETED)
+    return True
+
 
 async def send_lite_notification(
     channel: discord.TextChannel,
-    task: Dict
+    task: TaskRecord
 ) -> Optional[discord.Message]:
-    """Lite embed bildirimi gönder - 3 butonlu."""
-    reset_type = task['reset_type']
-    name = task['name']
-    
-    colors = {
-        'daily': 0x3498db,
-        'weekly': 0x9b59b6,
-        'cooldown': 0xe67e22,
-        'instance': 0xf1c40f,
-    }
+    """
+    Lite embed bildirimi gönder - 3 butonlu.
+    Bildirim kaydı write-behind tampona yazılır (Postgres beklenmez).
+    """
+    reset_type = task.reset_type
+    name = task.name
     
-    embed = discord.Embed(color=colors.get(reset_type, 0x95a5a6))
+    embed = discord.Embed(color=RESET_TYPE_COLORS.get(reset_type, 0x95a5a6))
     
     if reset_type == 'instance':
         embed.description = f"🏰 **{name}** girilebilir durumda!"
@@ -44,39 +88,40 @@ async def send_lite_notification(
     else:
         embed.description = f"🔔 **{name}** hazır!"
     
-    cd = task.get('cooldown_minutes', 0)
+    cd = task.cooldown_minutes
     if cd > 0:
         embed.description += f" | Bekleme: **{format_duration(cd)}**"
     
     if reset_type == 'instance':
-        active = task.get('active_duration_minutes', 0)
+        active = task.active_duration_minutes
         if active > 0:
             embed.description += f" | Açık kalma: **{format_duration(active)}**"
     
     embed.description += "\n\n✅ Yaptım | ❌ Geç | ⏰ Hatırlat"
     
     message = await channel.send(embed=embed)
+    register_message(message, task.id, KIND_NOTIFICATION)
     
     await message.add_reaction(EMOJI_COMPLETE)
     await message.add_reaction(EMOJI_SKIP)
     await message.add_reaction(EMOJI_SNOOZE)
     
-    update_notification_sent(task['id'], str(message.id), 'notified')
+    write_buffer.record(notification_sent_update(task.id, str(message.id), 'notified'))
     
     return message
 
 
 async def send_pre_notification(
     channel: discord.TextChannel,
-    task: Dict
+    task: TaskRecord
 ) -> Optional[discord.Message]:
     """
     Ön bildirim - görev hazır olmadan X dakika önce.
     Amber/turuncu renk.
     """
-    name = task['name']
-    pre_mins = task.get('pre_notify_minutes', 5)
-    show_reminder = task.get('show_resource_reminder', False)
+    name = task.name
+    pre_mins = task.pre_notify_minutes
+    show_reminder = task.show_resource_reminder
     
     embed = discord.Embed(color=0xf39c12)
     
@@ -86,26 +131,81 @@ async def send_pre_notification(
         embed.description += "\n\n*(Kaynağını hazırlamayı unutma!)*"
     
     message = await channel.send(embed=embed)
+    register_message(message, task.id, KIND_PRE_NOTIFICATION)
     
     return message
 
 
-async def send_task_notification(channel: discord.TextChannel, task: Dict, **kwargs) -> Optional[discord.Message]:
+async def send_character_notification(
+    channel: discord.TextChannel,
+    group: Dict
+) -> Optional[discord.Message]:
+    """
+    Karakter bildirimi - görev başına tek mesaj, hazır karakterler listelenir
+    ve sahipleri etiketlenir. Mesaj kimliği çağıran tarafından toplu yazılır
+    (bkz. characters.record_character_messages).
+    """
+    reset_type = group["reset_type"]
+    name = group["task_name"]
+    characters = group["characters"]
+    
+    embed = discord.Embed(color=RESET_TYPE_COLORS.get(reset_type, 0x95a5a6))
+    
+    if reset_type == 'instance':
+        embed.description = f"🏰 **{name}** girilebilir durumda!"
+    else:
+        embed.description = f"🔔 **{name}** hazır!"
+    
+    embed.description += "\n👥 " + ", ".join(f"**{c['name']}**" for c in characters)
+    embed.description += "\n\n✅ Yaptım | ❌ Geç | ⏰ Hatırlat *(aktif karakterine yazılır)*"
+    
+    # Embed içindeki etiketler bildirim göndermez
+    mentions = " ".join(dict.fromkeys(f"<@{c['discord_user_id']}>" for c in characters))
+    message = await channel.send(content=mentions, embed=embed)
+    register_message(message, group["task_id"], KIND_CHARACTER)
+    
+    await message.add_reaction(EMOJI_COMPLETE)
+    await message.add_reaction(EMOJI_SKIP)
+    await message.add_reaction(EMOJI_SNOOZE)
+    
+    return message
+
+
+async def send_character_pre_notification(
+    channel: discord.TextChannel,
+    group: Dict
+) -> Optional[discord.Message]:
+    """Karakter ön bildirimi - görev başına tek mesaj."""
+    name = group["task_name"]
+    names = ", ".join(f"**{c['name']}**" for c in group["characters"])
+    
+    embed = discord.Embed(color=0xf39c12)
+    embed.description = f"⏳ **{name}** {group['pre_notify_minutes']} dakika sonra hazır olacak!\n👥 {names}"
+    
+    if group["show_resource_reminder"]:
+        embed.description += "\n\n*(Kaynağını hazırlamayı unutma!)*"
+    
+    message = await channel.send(embed=embed)
+    register_message(message, group["task_id"], KIND_CHARACTER_PRE)
+    return message
+
+
+async def send_task_notification(channel: discord.TextChannel, task: TaskRecord, **kwargs) -> Optional[discord.Message]:
     """Görev bildirimi gönder."""
     return await send_lite_notification(channel, task)
 
 
 async def send_status_overview(channel: discord.TextChannel) -> None:
     """Genel durum özeti gönder."""
-    tasks = get_all_tasks_with_status()
+    tasks = await get_all_tasks_with_status()
     
     if not tasks:
         await channel.send("📋 Henüz görev eklenmemiş.")
         return
     
-    categories: Dict[str, List[Dict]] = {}
+    categories: Dict[str, List[TaskRecord]] = {}
     for t in tasks:
-        cat = t.get('category_name', 'Bilinmeyen')
+        cat = t.category_name
         if cat not in categories:
             categories[cat] = []
         categories[cat].append(t)
@@ -115,11 +215,11 @@ async def send_status_overview(channel: discord.TextChannel) -> None:
     for cat_name, cat_tasks in categories.items():
         lines = []
         for t in cat_tasks:
-            emoji = t.get('status_emoji', '❓')
-            msg = t.get('status_message', '')
+            emoji = t.status_emoji
+            msg = t.status_message
             if len(msg) > 25:
                 msg = msg[:22] + "..."
-            lines.append(f"{emoji} **{t['name']}** - {msg}")
+            lines.append(f"{emoji} **{t.name}** - {msg}")
         
         value = "\n".join(lines)
         if len(value) > 1024:
@@ -132,13 +232,13 @@ async def send_status_overview(channel: discord.TextChannel) -> None:
 
 async def send_daily_reminder(channel: discord.TextChannel) -> None:
     """Günlük görev hatırlatması."""
-    tasks = get_all_tasks_with_status()
-    incomplete = [t for t in tasks if t['reset_type'] == 'daily' and not t.get('is_completed')]
+    tasks = await get_all_tasks_with_status()
+    incomplete = [t for t in tasks if t.reset_type == 'daily' and not t.is_completed]
     
     if not incomplete:
         return
     
-    names = ", ".join([t['name'] for t in incomplete[:5]])
+    names = ", ".join([t.name for t in incomplete[:5]])
     extra = f" +{len(incomplete)-5} tane daha" if len(incomplete) > 5 else ""
     
     await channel.send(f"⏰ **Günlük görevler kaldı:** {names}{extra}")
@@ -148,18 +248,18 @@ async def send_weekly_reminder(channel: discord.TextChannel) -> None:
     """Haftalık görev hatırlatması."""
     from src.utils.time_utils import get_weekly_urgency_message
     
-    tasks = get_all_tasks_with_status()
-    incomplete = [t for t in tasks if t['reset_type'] == 'weekly' and not t.get('is_completed')]
+    tasks = await get_all_tasks_with_status()
+    incomplete = [t for t in tasks if t.reset_type == 'weekly' and not t.is_completed]
     
     if not incomplete:
         return
     
     urgency = get_weekly_urgency_message()
-    names = ", ".join([t['name'] for t in incomplete])
+    names = ", ".join([t.name for t in incomplete])
     
     await channel.send(f"📆 {urgency}\n**Kalan görevler:** {names}")
 
 
-async def send_available_notification(channel: discord.TextChannel, task: Dict) -> None:
+async def send_available_notification(channel: discord.TextChannel, task: TaskRecord) -> None:
     """Hazır görev bildirimi."""
     await send_lite_notification(channel, task)
@@ -3,6 +3,21 @@ Reaksiyon işleyici - Türkçe mesajlar.
 ✅ Yaptım - Bekleme süresini başlatır
 ❌ Geç - Bildirimi geçer, tekrar hatırlatmaz
 ⏰ Hatırlat - Mesajı siler, 10 dk sonra tekrar bildirir
+
+Karakter bildirimlerindeki reaksiyon kullanıcının aktif karakterine yazılır;
+mesaj diğer oyuncular için yerinde kalır (bkz. database/characters.py). Ortak
+bildirimlerdeki reaksiyon, kullanıcının karakteri olsa da ortak durumu yazar.
+
+Her reaksiyon tek koşullu UPDATE ile bildirimi tüketir; geçiş olmadıysa
+(aynı mesaja eşzamanlı ikinci reaksiyon, aynı olayı işleyen ikinci replika)
+hiçbir şey gönderilmez - onaylar tam bir kez gider.
+
+Mesajın görevi bildirim mesajı kaydından çözülür (bkz. database/messages.py):
+botun olmayan ve kayıtlı olmadığı bilinen mesajlardaki reaksiyonlar DB'ye gitmez.
+Görevin eski bildirimleri ve ön bildirimleri de geçerlidir.
+
+Veritabanına ulaşılamadığında görev reaksiyonları yerel günlüğe yazılır ve
+onaylanır (bkz. database/degraded.py); karakter reaksiyonları beklemeye alınmaz.
 """
 
 import asyncio
@@ -10,14 +25,26 @@ import discord
 from discord.ext import commands
 from datetime import timedelta
 
-from src.database.operations import (
-    get_task_by_message_id,
+from src.database.async_operations import (
     get_task_by_id,
+    get_notification_message,
+    get_active_character,
+    mark_character_task_completed,
+    mark_character_instance_entered,
+    delay_character_notification,
     mark_task_completed,
     mark_instance_entered,
-    get_task_with_status,
-    update_task_last_status
+    update_task_last_status,
+    snooze_notification,
+    record_task_event,
+    flush_write_buffer
 )
+from src.database.models import EVENT_SKIPPED, EVENT_SNOOZED
+from src.database.messages import message_registry, CHARACTER_KINDS, STATE_DELETED
+from src.database.pool import circuit
+from src.database.records import TaskRecord
+from src.database.operations import get_task_with_status
+from src.database.write_buffer import write_buffer
 from src.scheduler.timers import TaskState
 from src.utils.time_utils import format_duration, now
 
@@ -40,12 +67,48 @@ async def handle_reaction_add(
     if emoji not in [EMOJI_COMPLETE, EMOJI_SKIP, EMOJI_SNOOZE]:
         return
     
-    message_id = str(reaction.message.id)
-    task = get_task_by_message_id(message_id)
+    message = reaction.message
+    if bot.user is None or message.author.id != bot.user.id:
+        return
     
+    message_id = str(message.id)
+    entry = message_registry.get(message_id)
+    if entry is None:
+        # Eşitlemeden sonra başka replikanın gönderdiği mesaj olabilir
+        if message_registry.is_known_absent(message_id):
+            return
+        entry = await get_notification_message(message_id)
+        if entry is None:
+            return
+    
+    task = await get_task_by_id(entry.task_id)
     if not task:
         return
     
+    # Ortak bildirimler (karakter modu kapalıyken) karakteri olan kullanıcı için de ortak durumu yazar
+    if entry.kind in CHARACTER_KINDS:
+        # Kesintide aktif karakter bilinmez: yazım yapılmaz
+        if circuit.is_open:
+            await reaction.message.channel.send(
+                f"{user.mention} ⚠️ Veritabanına şu an ulaşılamıyor; karakter reaksiyonları kaydedilemiyor, "
+                f"biraz sonra tekrar dene."
+            )
+            return
+        
+        character = await get_active_character(str(user.id))
+        if not character:
+            await reaction.message.channel.send(
+                f"{user.mention} bu bildirim karakter başına; önce karakterini ekle: `!karakter ekle <ad>`"
+            )
+            return
+        
+        await handle_character_reaction(reaction, task, user, character, emoji)
+        return
+    
+    # Bekleyen bildirim kaydı bu reaksiyonun durum yazımını ezmesin
+    if write_buffer.pending_count():
+        await flush_write_buffer()
+    
     if emoji == EMOJI_COMPLETE:
         await handle_complete(reaction, task, user)
     elif emoji == EMOJI_SKIP:
@@ -56,21 +119,42 @@ async def handle_reaction_add(
 
 async def handle_complete(
     reaction: discord.Reaction,
-    task: dict,
+    task: TaskRecord,
     user: discord.User
 ) -> None:
     """
     ✅ Yaptım - Bekleme süresini başlatır.
     """
-    name = task['name']
-    reset_type = task['reset_type']
+    message_id = str(reaction.message.id)
+    if task.reset_type == 'instance':
+        done = await mark_instance_entered(task.id, message_id, task)
+    else:
+        done = await mark_task_completed(task.id, message_id, task)
+    if not done:
+        return
+    
+    await reaction.message.channel.send(completion_response(task))
+    
+    try:
+        embed = discord.Embed(
+            description=f"✅ ~~{task.name}~~ - Tamam",
+            color=0x2ecc71
+        )
+        await reaction.message.edit(embed=embed)
+        await reaction.message.clear_reactions()
+    except:
+        pass
+
+
+def completion_response(task: TaskRecord, character_name: str = "") -> str:
+    """Tamamlama / giriş onay mesajı (karakter adı verilirse başlıkta gösterilir)."""
+    name = f"{task.name} ({character_name})" if character_name else task.name
+    reset_type = task.reset_type
     current = now()
     
     if reset_type == 'instance':
-        mark_instance_entered(task['id'])
-        
-        active = task.get('active_duration_minutes', 0)
-        cd = task.get('cooldown_minutes', 0)
+        active = task.active_duration_minutes
+        cd = task.cooldown_minutes
         
         close_time = current + timedelta(minutes=active)
         next_time = close_time + timedelta(minutes=cd)
@@ -80,52 +164,79 @@ async def handle_complete(
             f"🔓 Kapanış: **{close_time.strftime('%H:%M')}**\n"
             f"⏰ Sonraki giriş: **{next_time.strftime('%d/%m %H:%M')}**"
         )
+    elif reset_type == 'daily':
+        from src.utils.time_utils import get_next_daily_reset
+        next_reset = get_next_daily_reset()
+        response = f"✅ **{name}** tamamlandı!\n🔄 Reset: **{next_reset.strftime('%d/%m %H:%M')}**"
+    
+    elif reset_type == 'weekly':
+        from src.utils.time_utils import get_next_weekly_reset
+        next_reset = get_next_weekly_reset()
+        response = f"✅ **{name}** tamamlandı!\n🔄 Reset: **{next_reset.strftime('%d/%m %H:%M')}**"
+    
     else:
-        mark_task_completed(task['id'])
-        
-        if reset_type == 'daily':
-            from src.utils.time_utils import get_next_daily_reset
-            next_reset = get_next_daily_reset()
-            response = f"✅ **{name}** tamamlandı!\n🔄 Reset: **{next_reset.strftime('%d/%m %H:%M')}**"
-        
-        elif reset_type == 'weekly':
-            from src.utils.time_utils import get_next_weekly_reset
-            next_reset = get_next_weekly_reset()
-            response = f"✅ **{name}** tamamlandı!\n🔄 Reset: **{next_reset.strftime('%d/%m %H:%M')}**"
-        
+        cd = task.cooldown_minutes
+        next_time = current + timedelta(minutes=cd)
+        response = (
+            f"✅ **{name}** tamamlandı!\n"
+            f"⏱️ Bekleme: **{format_duration(cd)}**\n"
+            f"⏰ Tekrar hazır: **{next_time.strftime('%d/%m %H:%M')}**"
+        )
+    
+    return response
+
+
+async def handle_character_reaction(
+    reaction: discord.Reaction,
+    task: TaskRecord,
+    user: discord.User,
+    character: dict,
+    emoji: str
+) -> None:
+    """
+    Reaksiyonu kullanıcının aktif karakterine yaz.
+    Mesaj diğer karakterler için kalır; yalnızca kullanıcının reaksiyonu kaldırılır.
+    """
+    channel = reaction.message.channel
+    char_name = character["name"]
+    message_id = str(reaction.message.id)
+    
+    if emoji == EMOJI_COMPLETE:
+        if task.reset_type == 'instance':
+            done = await mark_character_instance_entered(character["id"], task.id, message_id, task)
         else:
-            cd = task.get('cooldown_minutes', 0)
-            next_time = current + timedelta(minutes=cd)
-            response = (
-                f"✅ **{name}** tamamlandı!\n"
-                f"⏱️ Bekleme: **{format_duration(cd)}**\n"
-                f"⏰ Tekrar hazır: **{next_time.strftime('%d/%m %H:%M')}**"
-            )
+            done = await mark_character_task_completed(character["id"], task.id, message_id, task)
+        if done:
+            await channel.send(completion_response(task, char_name))
     
-    await reaction.message.channel.send(response)
+    elif emoji == EMOJI_SKIP:
+        if await delay_character_notification(character["id"], task.id, None, message_id):
+            await record_task_event(task.id, EVENT_SKIPPED)
+            await channel.send(f"⏭️ **{task.name}** geçildi ({char_name}).")
+    
+    elif emoji == EMOJI_SNOOZE:
+        if await delay_character_notification(character["id"], task.id, SNOOZE_MINUTES, message_id):
+            await record_task_event(task.id, EVENT_SNOOZED)
+            await channel.send(f"⏰ **{task.name}** için {SNOOZE_MINUTES} dk sonra hatırlatılacak ({char_name}).")
     
     try:
-        embed = discord.Embed(
-            description=f"✅ ~~{name}~~ - Tamam",
-            color=0x2ecc71
-        )
-        await reaction.message.edit(embed=embed)
-        await reaction.message.clear_reactions()
+        await reaction.remove(user)
     except:
         pass
 
 
 async def handle_skip(
     reaction: discord.Reaction,
-    task: dict,
+    task: TaskRecord,
     user: discord.User
 ) -> None:
     """
     ❌ Geç - Bildirimi geçer.
     """
-    name = task['name']
+    name = task.name
     
-    update_task_last_status(task['id'], 'skipped')
+    if not await update_task_last_status(task.id, 'skipped', str(reaction.message.id)):
+        return
     
     try:
         embed = discord.Embed(
@@ -140,18 +251,22 @@ async def handle_skip(
 
 async def handle_snooze(
     reaction: discord.Reaction,
-    task: dict,
+    task: TaskRecord,
     user: discord.User,
     bot: commands.Bot
 ) -> None:
     """
     ⏰ Hatırlat - Mesajı siler, 10 dk sonra tekrar bildirir.
     """
-    name = task['name']
+    name = task.name
     channel = reaction.message.channel
     
+    if not await snooze_notification(task.id, str(reaction.message.id)):
+        return
+    
     try:
         await reaction.message.delete()
+        write_buffer.record_message_state(reaction.message.id, STATE_DELETED)
     except:
         pass
     
@@ -160,11 +275,11 @@ async def handle_snooze(
     async def snooze_callback():
         await asyncio.sleep(SNOOZE_MINUTES * 60)
         
-        fresh_task = get_task_by_id(task['id'])
+        fresh_task = await get_task_by_id(task.id)
         if fresh_task:
             fresh_with_status = get_task_with_status(fresh_task)
             
-            if fresh_with_status.get('is_available') or fresh_with_status.get('is_open'):
+            if fresh_with_status.is_available or fresh_with_status.is_open:
                 from src.bot.notifications import send_lite_notification
                 await send_lite_notification(channel, fresh_with_status)
         
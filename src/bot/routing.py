@@ -0,0 +1,100 @@
+"""
+Kanal yönlendirme tablosu - kategori → Discord kanalı.
+Her sunucunun kategori tablosu ayrı okunur, kanallar çözümlenip sunucu başına önbelleğe alınır.
+Scheduler ve bot komutları aynı tabloyu paylaşır.
+"""
+
+import time
+from typing import Optional, Dict, Tuple
+
+import discord
+
+from src.database.async_operations import get_all_categories
+from src.database.models import guild_scope
+from src.database.operations import add_category_listener
+
+
+# Başka süreçten (dashboard) yapılan değişiklikler için üst sınır
+ROUTING_MAX_AGE_SECONDS = 300
+
+
+class ChannelRouter:
+    """
+    Sunucu başına {kategori id/adı: TextChannel} tablosu.
+    set_category_channel / update_category gibi değişikliklerde ve
+    kanal silme gateway olayında geçersiz kılınır, ilk kullanımda yeniden kurulur.
+    """
+
+    def __init__(self, max_age_seconds: float = ROUTING_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._by_id: Dict[int, Dict[int, discord.TextChannel]] = {}
+        self._by_name: Dict[int, Dict[str, discord.TextChannel]] = {}
+        self._built_at: Dict[int, float] = {}
+
+    async def resolve(
+        self,
+        guild: Optional[discord.Guild],
+        category_name: Optional[str] = None,
+        category_id: Optional[int] = None
+    ) -> Optional[discord.TextChannel]:
+        """Kategori için kanal; eşleme yoksa None."""
+        if guild is None:
+            return None
+
+        by_id, by_name = await self._table(guild)
+
+        if category_id is not None and category_id in by_id:
+            return by_id[category_id]
+        if category_name is not None:
+            return by_name.get(category_name)
+        return None
+
+    def invalidate(self) -> None:
+        """Tüm tabloları düşür (sonraki resolve yeniden kurar)."""
+        self._by_id.clear()
+        self._by_name.clear()
+        self._built_at.clear()
+
+    def on_channel_deleted(self, channel: discord.abc.GuildChannel) -> None:
+        """Silinen kanala işaret eden yolları kaldır."""
+        guild_id = channel.guild.id
+        by_id = self._by_id.get(guild_id, {})
+        by_name = self._by_name.get(guild_id, {})
+
+        for key in [k for k, ch in by_id.items() if ch.id == channel.id]:
+            del by_id[key]
+        for key in [k for k, ch in by_name.items() if ch.id == channel.id]:
+            del by_name[key]
+
+    async def _table(self, guild: discord.Guild) -> Tuple[Dict[int, discord.TextChannel], Dict[str, discord.TextChannel]]:
+        built_at = self._built_at.get(guild.id)
+        if built_at is None or time.monotonic() - built_at > self.max_age_seconds:
+            await self._rebuild(guild)
+        return self._by_id[guild.id], self._by_name[guild.id]
+
+    async def _rebuild(self, guild: discord.Guild) -> None:
+        by_id: Dict[int, discord.TextChannel] = {}
+        by_name: Dict[str, discord.TextChannel] = {}
+
+        with guild_scope(guild.id):
+            categories = await get_all_categories()
+
+        for cat in categories:
+            channel_id = cat.get('discord_channel_id')
+            if not channel_id:
+                continue
+            try:
+                ch = guild.get_channel(int(channel_id))
+            except (TypeError, ValueError):
+                ch = None
+            if ch:
+                by_id[cat['id']] = ch
+                by_name[cat['name']] = ch
+
+        self._by_id[guild.id] = by_id
+        self._by_name[guild.id] = by_name
+        self._built_at[guild.id] = time.monotonic()
+
+
+channel_router = ChannelRouter()
+add_category_listener(channel_router.invalidate)
@@ -0,0 +1,207 @@
+"""
+Async veritabanı katmanı - bot ve scheduler için.
+operations.py / models.py fonksiyonlarının event loop'u bloklamayan sürümleri.
+
+Sorgular ayrı bir DB thread havuzunda çalışır; çağıranın context'i kopyalandığı
+için unit_of_work() oturumu thread'e taşınır. Senkron API Streamlit dashboard
+için olduğu gibi kalır.
+
+Veritabanına ulaşılamadığında görev / kategori okumaları yerel kopyadan yapılır,
+reaksiyon geçişleri yerel günlüğe yazılır (bkz. degraded.py).
+
+    from src.database import async_operations as db
+    tasks = await db.get_all_tasks_with_status()
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, TypeVar
+
+from src.database import models, operations, migrations, characters, messages, sqlite_backend, degraded
+from src.database.write_buffer import write_buffer
+
+
+T = TypeVar("T")
+
+# Bağlantı havuzundan fazla thread açmanın anlamı yok (pool_size + max_overflow)
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="db")
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Senkron DB fonksiyonunu DB thread havuzunda, mevcut context ile çalıştır."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def _async(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_db(fn, *args, **kwargs)
+    return wrapper
+
+
+def _degraded(fn: Callable[..., T], fallback: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """_async + kesinti modunda fallback (bkz. degraded.call_or_fallback)."""
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_db(degraded.call_or_fallback, fn, fallback, *args, **kwargs)
+    return wrapper
+
+
+def _journaled(fn: Callable[..., bool]) -> Callable[..., Awaitable[bool]]:
+    """_async + kesinti modunda yerel günlük (bkz. degraded.call_or_journal)."""
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> bool:
+        return await run_db(degraded.call_or_journal, fn, *args, **kwargs)
+    return wrapper
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    models.unit_of_work() async karşılığı.
+    Oturum açma ve commit DB thread'inde yapılır, ContextVar ise çağıran
+    task'ın context'ine yazılır; böylece blok içindeki her await db.* aynı
+    oturumu kullanır.
+    """
+    current = models._current_unit_of_work.get()
+    if not models.SessionLocal or current is not None:
+        yield current
+        return
+
+    shared = await run_db(models.begin_unit_of_work)
+    token = models._current_unit_of_work.set(shared)
+    ok = False
+    try:
+        yield shared
+        ok = True
+    finally:
+        models._current_unit_of_work.reset(token)
+        await run_db(models.finish_unit_of_work, shared, ok)
+
+
+# =============================================================================
+# Ayarlar / başlatma
+# =============================================================================
+
+init_db = _async(models.init_db)
+seed_database = _async(models.seed_database)
+prepare_guild = _async(models.prepare_guild)
+reset_guild_data = _async(models.reset_guild_data)
+get_setting = _async(models.get_setting)
+get_int_setting = _async(models.get_int_setting)
+set_setting = _async(models.set_setting)
+is_bot_active = _async(models.is_bot_active)
+set_bot_active = _async(models.set_bot_active)
+is_character_mode = _async(models.is_character_mode)
+set_character_mode = _async(models.set_character_mode)
+
+
+# =============================================================================
+# Kategoriler
+# =============================================================================
+
+get_all_categories = _degraded(operations.get_all_categories, degraded.local_categories)
+get_category_by_id = _async(operations.get_category_by_id)
+get_category_by_channel_id = _degraded(operations.get_category_by_channel_id, degraded.local_category_by_channel_id)
+set_category_channel = _async(operations.set_category_channel)
+
+
+# =============================================================================
+# Görevler ve durum
+# =============================================================================
+
+get_task_snapshot = _async(operations.get_task_snapshot)
+get_all_tasks_with_status = _degraded(operations.get_all_tasks_with_status, degraded.local_tasks_with_status)
+get_tasks_by_category = _degraded(operations.get_tasks_by_category, degraded.local_tasks_by_category)
+get_task_by_id = _degraded(operations.get_task_by_id, degraded.local_task_by_id)
+get_task_by_message_id = _async(operations.get_task_by_message_id)
+get_stale_notifications = _async(operations.get_stale_notifications)
+get_tasks_needing_notification = _async(operations.get_tasks_needing_notification)
+get_tasks_needing_pre_notification = _async(operations.get_tasks_needing_pre_notification)
+get_tasks_grouped_by_category = _async(operations.get_tasks_grouped_by_category)
+
+mark_task_completed = _journaled(operations.mark_task_completed)
+mark_instance_entered = _journaled(operations.mark_instance_entered)
+update_task_last_status = _journaled(operations.update_task_last_status)
+snooze_notification = _journaled(operations.snooze_notification)
+update_notification_sent = _async(operations.update_notification_sent)
+mark_pre_notified = _async(operations.mark_pre_notified)
+apply_status_updates = _async(operations.apply_status_updates)
+record_task_event = _async(operations.record_task_event)
+# Kesintide kiralama yok: görevler bu replikanındır (tek replika varsayımı)
+claim_tasks = _degraded(operations.claim_tasks, lambda task_ids, *args, **kwargs: set(task_ids))
+claim_job_run = _async(operations.claim_job_run)
+reset_daily_tasks = _async(operations.reset_daily_tasks)
+reset_weekly_tasks = _async(operations.reset_weekly_tasks)
+count_tasks_by_type = _async(operations.count_tasks_by_type)
+
+
+# =============================================================================
+# Karakterler
+# =============================================================================
+
+has_characters = _degraded(characters.has_characters, degraded.local_has_characters)
+uses_character_notifications = _degraded(
+    characters.uses_character_notifications, degraded.local_uses_character_notifications
+)
+get_user_characters = _async(characters.get_user_characters)
+get_active_character = _degraded(characters.get_active_character, lambda discord_user_id: None)
+add_character = _async(characters.add_character)
+select_character = _async(characters.select_character)
+delete_character = _async(characters.delete_character)
+get_character_notifications = _async(characters.get_character_notifications)
+get_character_pre_notifications = _async(characters.get_character_pre_notifications)
+claim_character_notifications = _async(characters.claim_character_notifications)
+claim_character_pre_notifications = _async(characters.claim_character_pre_notifications)
+record_character_messages = _async(characters.record_character_messages)
+record_character_pre_notifications = _async(characters.record_character_pre_notifications)
+delay_character_notification = _async(characters.delay_character_notification)
+mark_character_task_completed = _async(operations.mark_character_task_completed)
+mark_character_instance_entered = _async(operations.mark_character_instance_entered)
+
+
+# =============================================================================
+# Write-behind tampon
+# =============================================================================
+
+flush_write_buffer = _async(write_buffer.flush)
+
+
+# =============================================================================
+# Bildirim mesajı kaydı
+# =============================================================================
+
+sync_message_registry = _async(messages.message_registry.sync)
+get_notification_message = _degraded(messages.get_notification_message, lambda message_id: None)
+prune_notification_messages = _async(messages.prune_notification_messages)
+
+
+# =============================================================================
+# Kesinti modu (yerel kopya, reaksiyon günlüğü)
+# =============================================================================
+
+refresh_local_snapshot = _async(degraded.refresh_local_snapshot)
+save_local_snapshot = _async(degraded.save_local_snapshot)
+load_local_snapshot = _async(degraded.load_local_snapshot)
+probe_database = _async(degraded.probe_database)
+replay_reaction_journal = _async(degraded.replay_reaction_journal)
+
+
+# =============================================================================
+# Bakım (olay günlüğü bölümleri, SQLite planlayıcı istatistikleri)
+# =============================================================================
+
+async def ensure_event_partitions() -> None:
+    await run_db(migrations.ensure_event_partitions, models.engine)
+
+
+async def refresh_sqlite_statistics() -> None:
+    await run_db(sqlite_backend.refresh_sqlite_statistics, models.engine)
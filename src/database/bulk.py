@@ -0,0 +1,516 @@
+"""
+Toplu içe / dışa aktarım - kategoriler, görevler ve görev durumları.
+
+Biçim görev başına bir satırdır (kategori alanları her satırda tekrarlanır),
+CSV veya JSON Lines. Görevi olmayan bir kategori, `task` alanı boş satırdır.
+
+    python run_bulk.py export gorevler.csv
+    python run_bulk.py import gorevler.jsonl
+
+İçe aktarım tek transaction'dır:
+  1. Satırlar doğrulanır ve BATCH_SIZE'lık parçalar halinde geçici bir hazırlık
+     tablosuna yazılır (PostgreSQL'de COPY, diğer backend'lerde executemany).
+  2. Kategoriler aktif sunucuda (bkz. models.guild_scope) ada, görevler
+     (kategori, görev adı) çiftine göre set tabanlı SQL ile upsert edilir. Aynı görev dosyada birden çok kez geçerse son satır kazanır.
+  3. Durum alanları (is_completed, last_completed_at, instance_entered_at,
+     last_status) satırda varsa task_status'a yazılır; yoksa mevcut durum
+     korunur, yeni görevler "initialized" başlar.
+  4. Yeni görevler için sunucunun karakterlerine durum satırı eklenir ve
+     sunucunun saklanan zaman çizelgesi yenilenir (bkz. schedule.refresh_schedules).
+
+Dışa aktarım aktif sunucunun verisini sunucu tarafı imleçle (stream_results) akıtır. Her iki yönde de
+bellek kullanımı görev sayısından bağımsızdır. Bildirim mesajı kimliği gibi
+Discord'a bağlı çalışma zamanı alanları aktarılmaz.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+from sqlalchemy import (
+    MetaData, Table, Column, Index, Integer, String, Text, Boolean, DateTime,
+    select, func, literal, false, and_
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.database import models
+from src.database.characters import ensure_character_statuses
+from src.database.enums import EnumCode, ResetType, StatusCode, enum_values
+from src.database.models import Category, Task, TaskStatus, current_guild
+from src.database.schedule import refresh_schedules
+from src.scheduler.timers import get_current_time_naive, to_naive_datetime
+
+
+RESET_TYPES = ("daily", "weekly", "cooldown", "instance")
+LAST_STATUSES = enum_values(StatusCode)
+
+CATEGORY_COLUMNS = (
+    "category", "category_description", "reset_type", "discord_channel_id",
+    "category_active", "pre_notify_minutes", "show_resource_reminder",
+)
+TASK_COLUMNS = ("task", "description", "cooldown_minutes", "active_duration_minutes", "task_active")
+STATUS_COLUMNS = ("is_completed", "last_completed_at", "instance_entered_at", "last_status")
+
+# Dosyadaki sütun sırası
+BULK_FIELDS = CATEGORY_COLUMNS + TASK_COLUMNS + STATUS_COLUMNS
+
+FORMATS = ("csv", "jsonl")
+
+# Hazırlık tablosuna tek seferde gönderilen satır sayısı
+BATCH_SIZE = 5000
+
+# Dışa aktarımda sunucu tarafı imleçten tek seferde çekilen satır sayısı
+EXPORT_BATCH_SIZE = 2000
+
+_TRUE = {"1", "true", "t", "yes", "y", "evet", "e"}
+_FALSE = {"0", "false", "f", "no", "n", "hayır", "hayir", "h"}
+
+
+# Geçici hazırlık tablosu - ana şemanın parçası değil, her içe aktarımda açılıp kapanır
+_staging_metadata = MetaData()
+_staging = Table(
+    "bulk_staging", _staging_metadata,
+    Column("row_no", Integer, nullable=False),
+    Column("category", String(255), nullable=False),
+    Column("category_description", Text),
+    # Kodlar _parse_row'da çözülür (COPY tip dönüşümünden geçmez), bkz. enums.py
+    Column("reset_type", EnumCode(ResetType), nullable=False),
+    Column("discord_channel_id", String(100)),
+    Column("category_active", Boolean, nullable=False),
+    Column("pre_notify_minutes", Integer, nullable=False),
+    Column("show_resource_reminder", Boolean, nullable=False),
+    Column("task", String(255)),
+    Column("description", Text),
+    Column("cooldown_minutes", Integer, nullable=False),
+    Column("active_duration_minutes", Integer, nullable=False),
+    Column("task_active", Boolean, nullable=False),
+    Column("has_status", Boolean, nullable=False),
+    Column("is_completed", Boolean),
+    Column("last_completed_at", DateTime),
+    Column("instance_entered_at", DateTime),
+    Column("last_status", EnumCode(StatusCode)),
+    Index("ix_bulk_staging_key", "category", "task"),
+    prefixes=["TEMPORARY"],
+)
+
+
+# =============================================================================
+# Dosya biçimleri
+# =============================================================================
+
+def detect_format(path: str) -> str:
+    """Dosya uzantısından biçim: .csv -> csv, .jsonl / .ndjson -> jsonl."""
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        return "csv"
+    if lower.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Biçim anlaşılamadı: {path} (.csv veya .jsonl bekleniyor)")
+
+
+def read_rows(fp: TextIO, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Dosyadaki satırları sırayla üret (tamamı belleğe alınmaz)."""
+    if fmt == "csv":
+        yield from csv.DictReader(fp)
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(fp, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Satır {line_no}: geçersiz JSON ({e})")
+    else:
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+
+
+def write_rows(fp: TextIO, rows: Iterable[Dict[str, Any]], fmt: str) -> int:
+    """Satırları dosyaya yaz, yazılan satır sayısını döndür."""
+    count = 0
+
+    if fmt == "csv":
+        writer = csv.DictWriter(fp, fieldnames=BULK_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: _csv_value(v) for k, v in row.items()})
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            fp.write(json.dumps({k: _json_value(v) for k, v in row.items()}, ensure_ascii=False))
+            fp.write("\n")
+            count += 1
+    else:
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+
+    return count
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# =============================================================================
+# Doğrulama
+# =============================================================================
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if _blank(value) else str(value).strip()
+
+
+def _bool(value: Any, default: bool) -> bool:
+    if _blank(value):
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"mantıksal değer bekleniyor: {value!r}")
+
+
+def _int(value: Any) -> int:
+    if _blank(value):
+        return 0
+    number = int(str(value).strip())
+    if number < 0:
+        raise ValueError(f"negatif olamaz: {value!r}")
+    return number
+
+
+def _datetime(value: Any) -> Optional[datetime]:
+    if _blank(value):
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip())
+    return to_naive_datetime(value)  # FORCED NAIVE (İstanbul)
+
+
+def _parse_row(row_no: int, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Dosya satırını hazırlık tablosu satırına çevir; hatada satır numarasıyla ValueError."""
+    try:
+        category = _text(raw.get("category"))
+        if not category:
+            raise ValueError("category boş olamaz")
+
+        reset_type = _text(raw.get("reset_type"))
+        if reset_type not in RESET_TYPES:
+            raise ValueError(f"reset_type {RESET_TYPES} içinden olmalı: {reset_type!r}")
+
+        last_status = _text(raw.get("last_status")) or "initialized"
+        if last_status not in LAST_STATUSES:
+            raise ValueError(f"last_status {LAST_STATUSES} içinden olmalı: {last_status!r}")
+
+        return {
+            "row_no": row_no,
+            "category": category,
+            "category_description": _text(raw.get("category_description")),
+            "reset_type": ResetType[reset_type.upper()].value,
+            "discord_channel_id": _text(raw.get("discord_channel_id")),
+            "category_active": _bool(raw.get("category_active"), True),
+            "pre_notify_minutes": _int(raw.get("pre_notify_minutes")),
+            "show_resource_reminder": _bool(raw.get("show_resource_reminder"), False),
+            "task": _text(raw.get("task")),
+            "description": _text(raw.get("description")),
+            "cooldown_minutes": _int(raw.get("cooldown_minutes")),
+            "active_duration_minutes": _int(raw.get("active_duration_minutes")),
+            "task_active": _bool(raw.get("task_active"), True),
+            "has_status": any(k in raw for k in STATUS_COLUMNS),
+            "is_completed": _bool(raw.get("is_completed"), False),
+            "last_completed_at": _datetime(raw.get("last_completed_at")),
+            "instance_entered_at": _datetime(raw.get("instance_entered_at")),
+            "last_status": StatusCode[last_status.upper()].value,
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Satır {row_no}: {e}")
+
+
+# =============================================================================
+# İçe aktarım
+# =============================================================================
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[list]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_value(value: Any) -> Any:
+    # COPY csv: tırnaksız boş alan NULL'dur
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _copy_batch(conn, batch: list) -> None:
+    """Parçayı PostgreSQL COPY ile hazırlık tablosuna yaz (aynı transaction)."""
+    columns = [c.name for c in _staging.columns]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in batch:
+        writer.writerow([_copy_value(row[c]) for c in columns])
+    buf.seek(0)
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {_staging.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buf
+        )
+    finally:
+        cursor.close()
+
+
+def _stage(conn, rows: Iterable[Dict[str, Any]]) -> int:
+    """Satırları doğrulayıp parça parça hazırlık tablosuna yaz."""
+    use_copy = conn.dialect.name == "postgresql"
+    parsed = (_parse_row(i, raw) for i, raw in enumerate(rows, start=1))
+
+    count = 0
+    for batch in _batches(parsed, BATCH_SIZE):
+        if use_copy:
+            _copy_batch(conn, batch)
+        else:
+            conn.execute(_staging.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def _merge(conn, current: datetime, guild: str) -> Dict[str, int]:
+    """Hazırlık tablosunu sunucunun kategorileri / görevleri / task_status ile birleştir."""
+    s = _staging.c
+    cat = Category.__table__
+    task = Task.__table__
+    status = TaskStatus.__table__
+
+    # Aynı (kategori, görev) birden fazla kez geçiyorsa son satır kazanır
+    conn.execute(
+        _staging.delete().where(
+            s.task.isnot(None),
+            s.row_no.notin_(
+                select(func.max(s.row_no)).where(s.task.isnot(None)).group_by(s.category, s.task)
+            )
+        )
+    )
+
+    # Kategoriler: ada göre upsert, kategori başına son satırın değerleri
+    insert = sqlite_insert if conn.dialect.name == "sqlite" else pg_insert
+    stmt = insert(cat).from_select(
+        ["guild_id", "name", "description", "reset_type", "discord_channel_id",
+         "is_active", "pre_notify_minutes", "show_resource_reminder", "created_at"],
+        select(
+            literal(guild, String),
+            s.category,
+            func.coalesce(s.category_description, ""),
+            s.reset_type,
+            s.discord_channel_id,
+            s.category_active,
+            s.pre_notify_minutes,
+            s.show_resource_reminder,
+            literal(current, DateTime),
+        ).where(s.row_no.in_(select(func.max(s.row_no)).group_by(s.category)))
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[cat.c.guild_id, cat.c.name],
+        set_={
+            "description": stmt.excluded.description,
+            "reset_type": stmt.excluded.reset_type,
+            # Kanal kimliği sunucuya özgüdür; dosyada yoksa mevcut kanal korunur
+            "discord_channel_id": func.coalesce(stmt.excluded.discord_channel_id, cat.c.discord_channel_id),
+            "is_active": stmt.excluded.is_active,
+            "pre_notify_minutes": stmt.excluded.pre_notify_minutes,
+            "show_resource_reminder": stmt.excluded.show_resource_reminder,
+        }
+    )
+    categories = conn.execute(stmt).rowcount
+
+    same_category = and_(cat.c.guild_id == guild, cat.c.name == s.category)
+    matches_task = and_(
+        same_category,
+        task.c.category_id == cat.c.id,
+        task.c.name == s.task,
+    )
+
+    # Görevler: önce mevcutları güncelle, sonra olmayanları ekle
+    tasks_updated = conn.execute(
+        task.update().where(matches_task).values(
+            description=func.coalesce(s.description, ""),
+            cooldown_minutes=s.cooldown_minutes,
+            active_duration_minutes=s.active_duration_minutes,
+            is_active=s.task_active,
+        )
+    ).rowcount
+
+    existing = select(task.c.id).where(task.c.category_id == cat.c.id, task.c.name == s.task).exists()
+    tasks_created = conn.execute(
+        task.insert().from_select(
+            ["category_id", "guild_id", "name", "description", "cooldown_minutes",
+             "active_duration_minutes", "is_active", "created_at"],
+            select(
+                cat.c.id,
+                cat.c.guild_id,
+                s.task,
+                func.coalesce(s.description, ""),
+                s.cooldown_minutes,
+                s.active_duration_minutes,
+                s.task_active,
+                literal(current, DateTime),
+            )
+            .select_from(_staging.join(cat, same_category))
+            .where(s.task.isnot(None), ~existing)
+        )
+    ).rowcount
+
+    # Durum: dosyada durum alanı olan satırlar mevcut durumu ezer
+    conn.execute(
+        status.update().where(
+            matches_task,
+            status.c.task_id == task.c.id,
+            s.has_status == True,
+        ).values(
+            is_completed=s.is_completed,
+            last_completed_at=s.last_completed_at,
+            instance_entered_at=s.instance_entered_at,
+            last_status=s.last_status,
+            pre_notified=False,
+        )
+    )
+
+    # Durum kaydı olmayan görevler (yeni eklenenler dahil)
+    conn.execute(
+        status.insert().from_select(
+            ["task_id", "is_completed", "last_completed_at", "instance_entered_at",
+             "last_status", "pre_notified"],
+            select(
+                task.c.id,
+                s.is_completed,
+                s.last_completed_at,
+                s.instance_entered_at,
+                s.last_status,
+                false(),
+            )
+            .select_from(
+                _staging
+                .join(cat, same_category)
+                .join(task, and_(task.c.category_id == cat.c.id, task.c.name == s.task))
+            )
+            .where(~select(status.c.id).where(status.c.task_id == task.c.id).exists())
+        )
+    )
+
+    return {
+        "categories": categories,
+        "tasks_created": tasks_created,
+        "tasks_updated": tasks_updated,
+    }
+
+
+def import_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Satırları (dosya biçimindeki dict'ler) aktif sunucuya tek transaction'da içe aktar.
+    {"rows", "categories", "tasks_created", "tasks_updated"} sayılarını döndürür.
+    Geçersiz satırda ValueError yükselir ve hiçbir şey yazılmaz.
+    """
+    if models.engine is None:
+        raise RuntimeError("DATABASE_URL ayarlanmamış")
+
+    current = get_current_time_naive()  # FORCED NAIVE
+
+    with models.engine.connect().execution_options(sqlite_begin_immediate=True) as conn, conn.begin():
+        # DDL transaction'a dahil: hata olursa geçici tablo da geri alınır
+        _staging.drop(conn, checkfirst=True)
+        _staging.create(conn)
+        staged = _stage(conn, rows)
+        guild = current_guild()
+        result = _merge(conn, current, guild)
+        ensure_character_statuses(conn, guild_id=guild)
+        refresh_schedules(conn, now=current, guild_id=guild)
+        _staging.drop(conn)
+
+    return {"rows": staged, **result}
+
+
+def import_file(fp: TextIO, fmt: str) -> Dict[str, int]:
+    """CSV / JSON Lines dosyasını içe aktar (bkz. import_rows)."""
+    return import_rows(read_rows(fp, fmt))
+
+
+# =============================================================================
+# Dışa aktarım
+# =============================================================================
+
+def _export_query(guild: str):
+    cat = Category.__table__
+    task = Task.__table__
+    status = TaskStatus.__table__
+
+    return (
+        select(
+            cat.c.name.label("category"),
+            cat.c.description.label("category_description"),
+            cat.c.reset_type,
+            cat.c.discord_channel_id,
+            cat.c.is_active.label("category_active"),
+            cat.c.pre_notify_minutes,
+            cat.c.show_resource_reminder,
+            task.c.name.label("task"),
+            task.c.description,
+            task.c.cooldown_minutes,
+            task.c.active_duration_minutes,
+            task.c.is_active.label("task_active"),
+            status.c.is_completed,
+            status.c.last_completed_at,
+            status.c.instance_entered_at,
+            status.c.last_status,
+        )
+        .select_from(
+            cat.outerjoin(task, task.c.category_id == cat.c.id)
+            .outerjoin(status, status.c.task_id == task.c.id)
+        )
+        .where(cat.c.guild_id == guild)
+        .order_by(cat.c.id, task.c.id)
+    )
+
+
+def iter_export_rows() -> Iterator[Dict[str, Any]]:
+    """Aktif sunucunun kategori / görev / durum satırlarını sunucu tarafı imleçle üret."""
+    if models.engine is None:
+        raise RuntimeError("DATABASE_URL ayarlanmamış")
+
+    query = _export_query(current_guild())
+    with models.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(query)
+        for row in result:
+            yield dict(row._mapping)
+
+
+def export_file(fp: TextIO, fmt: str) -> int:
+    """Aktif sunucunun verisini CSV / JSON Lines olarak yaz, satır sayısını döndür."""
+    return write_rows(fp, iter_export_rows(), fmt)
@@ -0,0 +1,515 @@
+"""
+Karakter başına görev takibi - her oyuncu (ve alt karakterleri) kendi zamanlayıcılarını tutar.
+
+Sunucudaki her karakter için her görevin bir character_task_status satırı vardır;
+satırlar karakter veya görev eklenince tek INSERT ... SELECT ile oluşturulur.
+Scheduler döngüsü tüm karakter x görev çiftlerini karakter sayısından bağımsız,
+sabit sayıda sorguyla değerlendirir:
+
+    get_character_notifications()   hazır çiftler tek SELECT, görev başına gruplanır
+    claim_character_notifications() gönderim kirası tek UPDATE ... RETURNING
+    record_character_messages()     gönderimden sonra mesaj kimlikleri ve
+                                    last_notified_at tek UPDATE (CASE)
+
+Döngü karakter başına bildirimi yalnızca sunucunun character_notifications
+ayarı açıksa gönderir (`!karakter mod ac`); kapalıyken ortak bildirimler gider.
+Reaksiyonlar kullanıcının aktif karakterine yazılır (bkz. bot/reactions.py).
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Set, Callable
+
+from sqlalchemy import select, insert, exists, case, or_, not_, func, false
+
+from src.database.models import (
+    SessionLocal, Category, Task, Character, CharacterTaskStatus,
+    get_int_setting, get_db_session, current_guild, is_character_mode
+)
+from src.database.schedule import READY_STATES, readiness_exprs, refresh_character_schedules
+from src.database.sql_time import minutes_after
+from src.scheduler.timers import get_current_time_naive
+
+
+# =============================================================================
+# Character Operations
+# =============================================================================
+
+def ensure_character_statuses(
+    executor,
+    guild_id: Optional[str] = None,
+    character_id: Optional[int] = None,
+    task_id: Optional[int] = None
+) -> int:
+    """
+    Eksik (karakter, görev) durum satırlarını tek INSERT ... SELECT ile ekle.
+    Session veya Connection ile çalışır, commit etmez. Eklenen satır sayısını döndürür.
+    """
+    if hasattr(executor, "flush"):
+        executor.flush()
+
+    missing = (
+        select(Character.id, Task.id)
+        .join(Task, Task.guild_id == Character.guild_id)
+        .where(~exists().where(
+            CharacterTaskStatus.character_id == Character.id,
+            CharacterTaskStatus.task_id == Task.id
+        ))
+    )
+    if guild_id is not None:
+        missing = missing.where(Character.guild_id == guild_id)
+    if character_id is not None:
+        missing = missing.where(Character.id == character_id)
+    if task_id is not None:
+        missing = missing.where(Task.id == task_id)
+
+    result = executor.execute(
+        insert(CharacterTaskStatus).from_select(["character_id", "task_id"], missing)
+    )
+    return result.rowcount
+
+
+def has_characters() -> bool:
+    """Aktif sunucuda kayıtlı karakter var mı?"""
+    session = get_db_session()
+    if not session:
+        return False
+
+    try:
+        return session.query(
+            session.query(Character.id).filter(Character.guild_id == current_guild()).exists()
+        ).scalar()
+    finally:
+        session.close()
+
+
+def uses_character_notifications() -> bool:
+    """
+    Döngü bildirimleri karakter başına mı göndersin? Yalnızca sunucu ayarı
+    (character_notifications) açıksa ve kayıtlı karakter varsa; aksi halde
+    ortak bildirimler gider ve karakteri olmayan oyuncular da bildirim alır.
+    """
+    return is_character_mode() and has_characters()
+
+
+def get_user_characters(discord_user_id: str) -> List[Dict]:
+    """Kullanıcının aktif sunucudaki karakterleri (ada göre)."""
+    session = get_db_session()
+    if not session:
+        return []
+
+    try:
+        characters = (
+            _user_query(session, discord_user_id)
+            .order_by(Character.name)
+            .all()
+        )
+        return [_character_to_dict(c) for c in characters]
+    finally:
+        session.close()
+
+
+def get_active_character(discord_user_id: str) -> Optional[Dict]:
+    """Kullanıcının reaksiyonlarının yazıldığı karakter (yoksa None)."""
+    session = get_db_session()
+    if not session:
+        return None
+
+    try:
+        character = _user_query(session, discord_user_id).filter(Character.is_active == True).first()
+        return _character_to_dict(character) if character else None
+    finally:
+        session.close()
+
+
+def add_character(discord_user_id: str, name: str) -> Optional[Dict]:
+    """
+    Kullanıcıya yeni karakter ekle ve aktif yap; sunucudaki tüm görevler için
+    durum satırları oluşturulur. Aynı adda karakter varsa None döner.
+    """
+    session = get_db_session()
+    if not session:
+        return None
+
+    try:
+        if _user_query(session, discord_user_id).filter(Character.name == name).first():
+            return None
+
+        _user_query(session, discord_user_id).update({Character.is_active: False}, synchronize_session=False)
+        character = Character(
+            guild_id=current_guild(),
+            discord_user_id=discord_user_id,
+            name=name,
+            is_active=True
+        )
+        session.add(character)
+        session.flush()
+
+        ensure_character_statuses(session, character_id=character.id)
+        refresh_character_schedules(session, character.id)
+        result = _character_to_dict(character)
+        session.commit()
+        return result
+    except Exception as e:
+        session.rollback()
+        print(f"Karakter ekleme hatası: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def select_character(discord_user_id: str, name: str) -> Optional[Dict]:
+    """Kullanıcının karakterini aktif yap (diğerleri pasifleşir). Bulunamazsa None."""
+    session = get_db_session()
+    if not session:
+        return None
+
+    try:
+        character = _user_query(session, discord_user_id).filter(Character.name == name).first()
+        if not character:
+            return None
+
+        _user_query(session, discord_user_id).update(
+            {Character.is_active: Character.id == character.id}, synchronize_session=False
+        )
+        result = {**_character_to_dict(character), "is_active": True}
+        session.commit()
+        return result
+    except Exception as e:
+        session.rollback()
+        print(f"Karakter seçme hatası: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def delete_character(discord_user_id: str, name: str) -> bool:
+    """
+    Kullanıcının karakterini sil (durum satırları ON DELETE CASCADE ile gider).
+    Silinen aktifse kalan ilk karakter aktif olur.
+    """
+    session = get_db_session()
+    if not session:
+        return False
+
+    try:
+        character = _user_query(session, discord_user_id).filter(Character.name == name).first()
+        if not character:
+            return False
+
+        was_active = bool(character.is_active)
+        session.delete(character)
+        session.flush()
+
+        if was_active:
+            remaining = _user_query(session, discord_user_id).order_by(Character.id).first()
+            if remaining:
+                remaining.is_active = True
+
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"Karakter silme hatası: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def _user_query(session, discord_user_id: str):
+    return session.query(Character).filter(
+        Character.guild_id == current_guild(),
+        Character.discord_user_id == discord_user_id
+    )
+
+
+def _character_to_dict(character: Character) -> Dict:
+    return {
+        "id": character.id,
+        "guild_id": character.guild_id,
+        "discord_user_id": character.discord_user_id,
+        "name": character.name,
+        "is_active": bool(character.is_active),
+    }
+
+
+# =============================================================================
+# Notification Selection - tüm karakterler x görevler tek sorguda
+# =============================================================================
+
+def get_character_notifications(
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Hazır olup bildirim beklemesi dolmuş (karakter, görev) çiftleri, görev başına gruplu.
+    `limit` görev (mesaj) sayısıdır; kalanlar sonraki çağrıda yine seçilir.
+    """
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    cooldown = get_int_setting("notification_cooldown_minutes", 120)
+
+    return _load_groups(lambda now, state: [
+        state.in_(READY_STATES),
+        or_(
+            CharacterTaskStatus.last_notified_at.is_(None),
+            minutes_after(CharacterTaskStatus.last_notified_at, cooldown) <= now
+        ),
+    ], current, limit)
+
+
+def get_character_pre_notifications(
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """Ön bildirim zamanı gelmiş (karakter, görev) çiftleri, görev başına gruplu."""
+    current = now or get_current_time_naive()  # FORCED NAIVE
+
+    return _load_groups(lambda now, state: [
+        CharacterTaskStatus.pre_notify_at <= now,
+        now < CharacterTaskStatus.next_available_at,
+        state.notin_(READY_STATES),
+        not_(func.coalesce(CharacterTaskStatus.pre_notified, false())),
+    ], current, limit)
+
+
+def _load_groups(filters: Callable, current: datetime, limit: Optional[int]) -> List[Dict]:
+    session = get_db_session()
+    if not session:
+        return []
+
+    try:
+        now, state = readiness_exprs(current, CharacterTaskStatus)
+        rows = session.execute(
+            select(
+                CharacterTaskStatus.id.label("status_id"),
+                CharacterTaskStatus.character_id,
+                Character.name.label("character_name"),
+                Character.discord_user_id,
+                Task.id.label("task_id"),
+                Task.name.label("task_name"),
+                Task.cooldown_minutes,
+                Task.active_duration_minutes,
+                Category.id.label("category_id"),
+                Category.name.label("category_name"),
+                Category.reset_type,
+                Category.pre_notify_minutes,
+                Category.show_resource_reminder,
+                state.label("state"),
+            )
+            .select_from(CharacterTaskStatus)
+            .join(Character, Character.id == CharacterTaskStatus.character_id)
+            .join(Task, Task.id == CharacterTaskStatus.task_id)
+            .join(Category, Category.id == Task.category_id)
+            .where(
+                Character.guild_id == current_guild(),
+                Task.is_active == True,
+                Category.is_active == True,
+                *filters(now, state)
+            )
+            .order_by(Category.id, Task.name, Task.id, Character.name, CharacterTaskStatus.id)
+        ).all()
+    except Exception as e:
+        print(f"Karakter bildirim sorgusu hatası: {e}")
+        return []
+    finally:
+        session.close()
+
+    groups: Dict[int, Dict] = {}
+    for row in rows:
+        group = groups.get(row.task_id)
+        if group is None:
+            if limit is not None and len(groups) >= limit:
+                break
+            group = groups[row.task_id] = {
+                "task_id": row.task_id,
+                "task_name": row.task_name,
+                "category_id": row.category_id,
+                "category_name": row.category_name,
+                "reset_type": row.reset_type,
+                "cooldown_minutes": row.cooldown_minutes or 0,
+                "active_duration_minutes": row.active_duration_minutes or 0,
+                "pre_notify_minutes": row.pre_notify_minutes or 0,
+                "show_resource_reminder": bool(row.show_resource_reminder),
+                "characters": [],
+            }
+        group["characters"].append({
+            "status_id": row.status_id,
+            "character_id": row.character_id,
+            "name": row.character_name,
+            "discord_user_id": row.discord_user_id,
+            "state": row.state,
+        })
+
+    return list(groups.values())
+
+
+# =============================================================================
+# Claiming / Recording
+# =============================================================================
+
+def claim_character_notifications(status_ids: List[int], now: Optional[datetime] = None) -> Set[int]:
+    """
+    Bildirim hakkını atomik olarak kirala: bekleme süresi dolmuş ve kirası boş
+    (ya da süresi dolmuş / bu replikada) satırlar tek UPDATE ... RETURNING ile
+    kiralanır, alınan id'ler döndürülür. last_notified_at burada yazılmaz;
+    gönderimden sonra record_character_messages() yazar. Gönderim başarısız
+    olursa kira dolunca çift yeniden seçilir (claim_tasks ile aynı yol).
+    """
+    if not status_ids or not SessionLocal:
+        return set()
+
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    cooldown = get_int_setting("notification_cooldown_minutes", 120)
+    table = CharacterTaskStatus.__table__
+
+    return _claim(status_ids, current, or_(
+        table.c.last_notified_at.is_(None),
+        minutes_after(table.c.last_notified_at, cooldown) <= current
+    ))
+
+
+def claim_character_pre_notifications(status_ids: List[int], now: Optional[datetime] = None) -> Set[int]:
+    """
+    Ön bildirim hakkını kirala: pre_notified False olan satırlar, alınanları döndür.
+    pre_notified gönderimden sonra record_character_pre_notifications() ile yazılır.
+    """
+    if not status_ids or not SessionLocal:
+        return set()
+
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    table = CharacterTaskStatus.__table__
+
+    return _claim(status_ids, current, not_(func.coalesce(table.c.pre_notified, false())))
+
+
+def _claim(status_ids: List[int], current: datetime, condition) -> Set[int]:
+    """
+    Koşulu sağlayan ve kirası boş, süresi dolmuş ya da bu replikada olan
+    satırları FOR UPDATE SKIP LOCKED ile kilitleyip kirala (bkz. claim_tasks).
+    Kendi oturumunda hemen commit eder; kira diğer replikalara görünmelidir.
+    """
+    # operations bu modülü içe aktarır; replika kimliği çağrı anında alınır
+    from src.database.operations import REPLICA_ID, CLAIM_LEASE_SECONDS
+
+    table = CharacterTaskStatus.__table__
+    free = (
+        select(table.c.id)
+        .where(
+            table.c.id.in_(status_ids),
+            condition,
+            or_(
+                table.c.lease_expires_at.is_(None),
+                table.c.lease_expires_at < current,
+                table.c.claimed_by == REPLICA_ID
+            )
+        )
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        table.update()
+        .where(table.c.id.in_(free))
+        .values(claimed_by=REPLICA_ID, lease_expires_at=current + timedelta(seconds=CLAIM_LEASE_SECONDS))
+        .returning(table.c.id)
+    )
+
+    session = SessionLocal()
+    try:
+        claimed = set(session.execute(stmt).scalars().all())
+        session.commit()
+        return claimed
+    except Exception as e:
+        session.rollback()
+        print(f"Karakter bildirimi kiralama hatası: {e}")
+        return set()
+    finally:
+        session.close()
+
+
+def record_character_messages(message_ids: Dict[int, str], now: Optional[datetime] = None) -> int:
+    """
+    Gönderilen bildirimleri kaydet: {status_id: mesaj id} eşlemesi ve
+    last_notified_at tek UPDATE ... CASE ile yazılır. Yalnızca gönderimi
+    başarılı olan satırlar verilir; bekleme süresi gönderim anından başlar.
+    Kiralama gibi kendi oturumunda hemen commit eder: reaksiyonlar döngü
+    bitmeden mesajı bulabilsin.
+    """
+    if not message_ids:
+        return 0
+
+    table = CharacterTaskStatus.__table__
+    return _record(
+        table.update()
+        .where(table.c.id.in_(list(message_ids)))
+        .values(
+            notification_message_id=case(message_ids, value=table.c.id),
+            last_notified_at=now or get_current_time_naive()  # FORCED NAIVE
+        ),
+        "Karakter mesaj kaydı hatası"
+    )
+
+
+def record_character_pre_notifications(status_ids: List[int]) -> int:
+    """Gönderilen ön bildirimleri kaydet (pre_notified = True), tek UPDATE."""
+    if not status_ids:
+        return 0
+
+    table = CharacterTaskStatus.__table__
+    return _record(
+        table.update().where(table.c.id.in_(status_ids)).values(pre_notified=True),
+        "Karakter ön bildirim kaydı hatası"
+    )
+
+
+def _record(stmt, error: str) -> int:
+    if not SessionLocal:
+        return 0
+
+    session = SessionLocal()
+    try:
+        result = session.execute(stmt)
+        session.commit()
+        return result.rowcount
+    except Exception as e:
+        session.rollback()
+        print(f"{error}: {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def delay_character_notification(
+    character_id: int,
+    task_id: int,
+    minutes: Optional[int] = None,
+    message_id: Optional[str] = None
+) -> bool:
+    """
+    Karakterin görev bildirimini `minutes` dakika sonraya ertele (None ise
+    bildirim bekleme süresi kadar, yani "geç"). last_notified_at geriye
+    kaydırılarak yapılır; ek durum tutulmaz. message_id verilirse tek koşullu
+    UPDATE'tir: satır o bildirimi taşımıyorsa (ör. aynı reaksiyon ikinci kez
+    işlendi) False döner, taşıyorsa bildirim tüketilir.
+    """
+    session = get_db_session()
+    if not session:
+        return False
+
+    try:
+        current = get_current_time_naive()  # FORCED NAIVE
+        cooldown = get_int_setting("notification_cooldown_minutes", 120)
+        if minutes is not None:
+            current -= timedelta(minutes=max(cooldown - minutes, 0))
+
+        query = session.query(CharacterTaskStatus).filter_by(character_id=character_id, task_id=task_id)
+        values = {CharacterTaskStatus.last_notified_at: current}
+        if message_id is not None:
+            query = query.filter(CharacterTaskStatus.notification_message_id == message_id)
+            values[CharacterTaskStatus.notification_message_id] = None
+        updated = query.update(values, synchronize_session=False)
+        session.commit()
+        return updated > 0
+    except Exception as e:
+        session.rollback()
+        print(f"Karakter erteleme hatası: {e}")
+        return False
+    finally:
+        session.close()
@@ -0,0 +1,497 @@
+"""
+Kesinti modu - veritabanına ulaşılamadığında yerel kopya ve reaksiyon günlüğü.
+
+Veritabanı devresi (pool.circuit) açıkken ya da bir çağrı bağlantı hatasıyla
+bittiğinde (operasyonlar hatayı yutup [] / None / False döndürse bile) bot
+sessizce "görev yok" görmez:
+
+    okuma       görev / kategori okumaları (!durum, !kontrol, zamanlayıcı,
+                reaksiyon çözümü) son başarılı okumanın yerel kopyasından
+                yapılır (local_snapshot). Kopya periyodik olarak yenilenip
+                dosyaya yazılır (DB_SNAPSHOT_PATH) ve soğuk başlangıçta ilk
+                bağlantıdan önce yüklenir; açık bildirim mesajları da dahildir
+    yazma       reaksiyon geçişleri (✅ / ❌ / ⏰) fsync'li yerel günlüğe
+                (reaction_journal, DB_JOURNAL_PATH) reaksiyon anıyla yazılır ve
+                yerel kopyaya uygulanır. Devre kapanınca sırayla yeniden
+                oynatılır; geçişler mesaj koşullu olduğundan iki kez uygulanmaz
+
+Kopyadaki günlük/haftalık tamamlanma okunurken reset sınırına göre yeniden
+türetilir (bkz. timers.is_completed_in_period). Kesinti sırasında kiralama
+alınamaz: çoklu replikada aynı bildirim birden fazla replikadan gidebilir.
+"""
+
+import inspect
+import json
+import os
+import threading
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.database import characters, operations
+from src.database.messages import message_registry
+from src.database.models import engine, current_guild, guild_scope, settings_cache, is_bot_active, is_character_mode
+from src.database.pool import circuit
+from src.database.records import TaskRecord, TASK_FIELDS
+from src.scheduler.timers import get_current_time_naive, is_completed_in_period, last_status_in_period
+
+
+DB_SNAPSHOT_PATH = os.getenv("DB_SNAPSHOT_PATH", "data/snapshot.json")
+DB_JOURNAL_PATH = os.getenv("DB_JOURNAL_PATH", "data/reaction_journal.jsonl")
+
+# Yerel kopyanın yenilenme aralığı (veritabanı erişilebilirken)
+DB_SNAPSHOT_MINUTES = int(os.getenv("DB_SNAPSHOT_MINUTES", "5"))
+
+_DATETIME_FIELDS = {
+    "created_at", "last_completed_at", "instance_entered_at", "last_notified_at",
+    "next_available_at", "closes_at", "pre_notify_at",
+}
+
+# Yerel günlüğe yazılan geçişler (operations fonksiyon adları)
+JOURNALED_OPERATIONS = (
+    "mark_task_completed", "mark_instance_entered", "update_task_last_status", "snooze_notification",
+)
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _record_to_json(record: TaskRecord) -> Dict:
+    data = {}
+    for field in TASK_FIELDS:
+        value = getattr(record, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def _record_from_json(data: Dict) -> TaskRecord:
+    return TaskRecord(**{
+        field: _parse_time(data.get(field)) if field in _DATETIME_FIELDS else data.get(field)
+        for field in TASK_FIELDS
+    })
+
+
+_record_values = attrgetter(*TASK_FIELDS)
+_FIELD_INDEX = {field: i for i, field in enumerate(TASK_FIELDS)}
+
+
+def _with_changes(record: TaskRecord, changes: Dict) -> TaskRecord:
+    """Kaydın değişikliklerle yeni kopyası (TaskRecord değiştirilemez); bilinmeyen anahtarlar atlanır."""
+    values = list(_record_values(record))
+    for key, value in changes.items():
+        index = _FIELD_INDEX.get(key)
+        if index is not None:
+            values[index] = value
+    return TaskRecord(*values)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Geçici dosyaya yaz, fsync, ardından yerine taşı (yarım dosya kalmaz)."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+# =============================================================================
+# Yerel kopya (last-known-good)
+# =============================================================================
+
+class LocalSnapshot:
+    """Sunucu başına son başarılı okuma: aktif görevler, kategoriler, ayarlar."""
+
+    def __init__(self, path: str = DB_SNAPSHOT_PATH):
+        self.path = path
+        self._guilds: Dict[str, Dict[str, Any]] = {}
+        # task_id -> sunucu (apply() için)
+        self._task_guilds: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        guild: str,
+        tasks: List[TaskRecord],
+        categories: List[Dict],
+        settings: Dict[str, str],
+        has_characters: bool,
+        updated_at: Optional[datetime] = None
+    ) -> None:
+        with self._lock:
+            old = self._guilds.get(guild)
+            if old:
+                for task_id in old["tasks"]:
+                    self._task_guilds.pop(task_id, None)
+            self._guilds[guild] = {
+                "tasks": {t.id: t for t in tasks},
+                "categories": list(categories),
+                "settings": dict(settings),
+                "has_characters": bool(has_characters),
+                "updated_at": updated_at or get_current_time_naive(),  # FORCED NAIVE
+            }
+            for task in tasks:
+                self._task_guilds[task.id] = guild
+
+    def has(self, guild: str) -> bool:
+        return guild in self._guilds
+
+    def updated_at(self, guild: str) -> Optional[datetime]:
+        data = self._guilds.get(guild)
+        return data["updated_at"] if data else None
+
+    def tasks(self, guild: str, now: Optional[datetime] = None) -> List[TaskRecord]:
+        """
+        Sunucunun görevleri; günlük/haftalık tamamlanma ve son durum `now`
+        anına göre yeniden türetilir (kopya önceki dönemde alınmış olabilir).
+        """
+        data = self._guilds.get(guild)
+        if not data:
+            return []
+
+        current = now or get_current_time_naive()  # FORCED NAIVE
+        return [
+            _with_changes(t, {
+                "is_completed": is_completed_in_period(t.reset_type, t.is_completed, t.last_completed_at, current),
+                "last_status": last_status_in_period(
+                    t.reset_type, t.last_status, t.last_notified_at, t.last_completed_at, current
+                ),
+            })
+            for t in list(data["tasks"].values())
+        ]
+
+    def categories(self, guild: str) -> List[Dict]:
+        data = self._guilds.get(guild)
+        return list(data["categories"]) if data else []
+
+    def has_characters(self, guild: str) -> bool:
+        data = self._guilds.get(guild)
+        return bool(data and data["has_characters"])
+
+    def apply(self, task_id: int, changes: Dict) -> None:
+        """Görev durumu değişikliğini kopyaya uygula (bildirim kaydı, günlüğe yazılan geçiş)."""
+        with self._lock:
+            guild = self._task_guilds.get(task_id)
+            if guild is None:
+                return
+            tasks = self._guilds[guild]["tasks"]
+            tasks[task_id] = _with_changes(tasks[task_id], changes)
+
+    def save(self) -> bool:
+        """Kopyayı (ve açık bildirim mesajlarını) dosyaya yaz."""
+        with self._lock:
+            guilds = {
+                guild: {
+                    "tasks": [_record_to_json(t) for t in data["tasks"].values()],
+                    "categories": data["categories"],
+                    "settings": data["settings"],
+                    "has_characters": data["has_characters"],
+                    "updated_at": data["updated_at"].isoformat(),
+                }
+                for guild, data in self._guilds.items()
+            }
+        messages = [
+            [e.message_id, e.channel_id, e.task_id, e.kind, e.created_at.isoformat()]
+            for e in message_registry.entries()
+        ]
+        try:
+            _write_atomic(self.path, json.dumps({"guilds": guilds, "messages": messages}, ensure_ascii=False))
+            return True
+        except OSError as e:
+            print(f"Yerel kopya yazma hatası: {e}")
+            return False
+
+    def load(self) -> int:
+        """
+        Dosyadaki kopyayı yükle (soğuk başlangıç); ayar önbelleği ve mesaj
+        kaydı da doldurulur. Yüklenen görev sayısını döndürür.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"Yerel kopya okuma hatası: {e}")
+            return 0
+
+        count = 0
+        for guild, data in payload.get("guilds", {}).items():
+            tasks = [_record_from_json(t) for t in data["tasks"]]
+            self.update(
+                guild, tasks, data["categories"], data["settings"], data["has_characters"],
+                _parse_time(data["updated_at"])
+            )
+            settings_cache.seed(guild, data["settings"])
+            count += len(tasks)
+
+        for message_id, channel_id, task_id, kind, created_at in payload.get("messages", []):
+            if message_registry.get(message_id) is None:
+                message_registry.add({
+                    "message_id": message_id, "channel_id": channel_id, "task_id": task_id,
+                    "kind": kind, "created_at": _parse_time(created_at),
+                })
+        return count
+
+
+local_snapshot = LocalSnapshot()
+
+
+def refresh_local_snapshot() -> bool:
+    """Aktif sunucunun kopyasını veritabanından yenile; okuma başarısızsa eski kopya kalır."""
+    guild = current_guild()
+    circuit.begin_call()
+    try:
+        tasks = operations.get_task_snapshot()
+        categories = operations.get_all_categories()
+        has_characters = characters.has_characters()
+        is_bot_active()  # ayarlar önbelleğe yüklensin
+    except Exception as e:
+        print(f"Yerel kopya yenileme hatası ({guild}): {e}")
+        return False
+    if circuit.call_failed():
+        return False
+
+    local_snapshot.update(guild, tasks, categories, settings_cache.values(guild) or {}, has_characters)
+    return True
+
+
+def save_local_snapshot() -> bool:
+    return local_snapshot.save()
+
+
+def load_local_snapshot() -> int:
+    return local_snapshot.load()
+
+
+# =============================================================================
+# Kopyadan okumalar (async_operations'taki yedekler)
+# =============================================================================
+
+def local_tasks_with_status(by_next_available: bool = False) -> List[TaskRecord]:
+    current = get_current_time_naive()  # FORCED NAIVE
+    tasks = [operations.get_task_with_status(t, current) for t in local_snapshot.tasks(current_guild(), current)]
+    if by_next_available:
+        tasks.sort(key=lambda t: t.next_available_at or datetime.min)
+    return tasks
+
+
+def local_tasks_by_category(category_id: int) -> List[TaskRecord]:
+    return [t for t in local_snapshot.tasks(current_guild()) if t.category_id == category_id]
+
+
+def local_task_by_id(task_id: int) -> Optional[TaskRecord]:
+    return next((t for t in local_snapshot.tasks(current_guild()) if t.id == task_id), None)
+
+
+def local_categories(include_inactive: bool = False) -> List[Dict]:
+    return local_snapshot.categories(current_guild())
+
+
+def local_category_by_channel_id(channel_id: str) -> Optional[Dict]:
+    return next(
+        (c for c in local_snapshot.categories(current_guild()) if c.get("discord_channel_id") == channel_id),
+        None
+    )
+
+
+def local_has_characters() -> bool:
+    return local_snapshot.has_characters(current_guild())
+
+
+def local_uses_character_notifications() -> bool:
+    return is_character_mode() and local_has_characters()
+
+
+def call_or_fallback(fn: Callable, fallback: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    fn'i çalıştır; devre açıksa ya da çağrı bağlantı hatasıyla bittiyse
+    (fn hatayı yutmuş olsa bile) fallback'in sonucunu döndür.
+    """
+    if circuit.allow():
+        circuit.begin_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            if not circuit.call_failed():
+                raise
+        else:
+            if not circuit.call_failed():
+                return result
+    return fallback(*args, **kwargs)
+
+
+# =============================================================================
+# Reaksiyon günlüğü
+# =============================================================================
+
+class ReactionJournal:
+    """
+    Kesinti sırasında gelen reaksiyon geçişleri - satır başına bir JSON
+    {"op", "guild", "at", "args"}, her satır fsync'li. Yeniden oynatılan
+    kayıtlar dosyadan atılır.
+    """
+
+    def __init__(self, path: str = DB_JOURNAL_PATH):
+        self.path = path
+        self._entries: Optional[List[Dict]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Dict]:
+        if self._entries is None:
+            entries = []
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            # Yazılırken kesilmiş son satır
+                            print(f"⚠️ Okunamayan günlük satırı atlandı: {line[:80]}")
+            except FileNotFoundError:
+                pass
+            self._entries = entries
+        return self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def append(self, op: str, guild: str, args: Dict, at: datetime) -> bool:
+        """Geçişi günlüğe yaz; aynı mesaja daha önce yazılmış geçiş varsa False."""
+        entry = {"op": op, "guild": guild, "at": at.isoformat(), "args": args}
+        message_id = args.get("message_id")
+        with self._lock:
+            entries = self._load()
+            if message_id is not None and any(e["args"].get("message_id") == message_id for e in entries):
+                return False
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            entries.append(entry)
+        return True
+
+    def replay(self) -> Tuple[int, int]:
+        """
+        Kayıtları sırayla, reaksiyon anıyla uygula. Bağlantı hatasında durur,
+        kalanlar sonraki denemeye kalır; başka bir hata alan kayıt atlanır.
+        (işlenen, geçiş yapılan) döndürür.
+        """
+        with self._lock:
+            entries = list(self._load())
+
+        done = applied = 0
+        for entry in entries:
+            fn = getattr(operations, entry["op"])
+            circuit.begin_call()
+            try:
+                with guild_scope(entry["guild"]):
+                    ok = fn(**entry["args"], now=_parse_time(entry["at"]))
+            except Exception as e:
+                if circuit.call_failed():
+                    break
+                print(f"❌ Günlük kaydı atlandı ({entry['op']} {entry['args']}): {e}")
+                ok = False
+            if circuit.call_failed():
+                break
+            done += 1
+            applied += bool(ok)
+
+        if done:
+            with self._lock:
+                self._entries = self._load()[done:]
+                _write_atomic(self.path, "".join(
+                    json.dumps(e, ensure_ascii=False) + "\n" for e in self._entries
+                ))
+        return done, applied
+
+
+reaction_journal = ReactionJournal()
+
+
+def _local_changes(op: str, args: Dict, at: datetime) -> Dict:
+    """Günlüğe yazılan geçişin yerel kopyaya uygulanan değerleri."""
+    if op == "mark_task_completed":
+        changes = operations.completed_values(at)
+    elif op == "mark_instance_entered":
+        changes = operations.entered_values(at)
+    elif op == "update_task_last_status":
+        changes = {"last_status": args["status_text"]}
+    else:
+        changes = {}
+    if args.get("message_id") is not None:
+        changes["notification_message_id"] = None
+    return changes
+
+
+def call_or_journal(fn: Callable[..., bool], *args: Any, **kwargs: Any) -> bool:
+    """
+    Reaksiyon geçişi: veritabanı erişilebilirse fn; devre açıksa ya da çağrı
+    bağlantı hatasıyla bittiyse geçiş günlüğe yazılır ve True döner (aynı
+    mesaja ikinci reaksiyon False). Görev kaydı (`task`) günlüğe yazılmaz.
+    """
+    if circuit.allow():
+        circuit.begin_call()
+        result = fn(*args, **kwargs)
+        if not circuit.call_failed():
+            return result
+
+    params = inspect.signature(fn).bind(*args, **kwargs).arguments
+    params = {k: v for k, v in params.items() if k not in ("task", "now")}
+    at = get_current_time_naive()  # FORCED NAIVE
+    if not reaction_journal.append(fn.__name__, current_guild(), params, at):
+        return False
+
+    task_id = params["task_id"]
+    local_snapshot.apply(task_id, _local_changes(fn.__name__, params, at))
+    message_registry.discard_task(task_id)
+    print(f"📝 Kesinti: {fn.__name__}({task_id}) yerel günlüğe yazıldı")
+    return True
+
+
+def replay_reaction_journal() -> Tuple[int, int]:
+    return reaction_journal.replay()
+
+
+def pending_journal_entries() -> int:
+    return len(reaction_journal)
+
+
+# =============================================================================
+# Durum
+# =============================================================================
+
+def probe_database() -> bool:
+    """Açık devrede deneme zamanı geldiyse tek bağlantı denemesi. Devre kapalıysa True."""
+    if not circuit.is_open:
+        return True
+    if engine is None or not circuit.allow():
+        return False
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        return False
+    return not circuit.is_open
+
+
+def degraded_notice() -> Optional[str]:
+    """Kesinti modunda okuma komutlarının başına eklenen uyarı (değilse None)."""
+    if not circuit.is_open:
+        return None
+    updated_at = local_snapshot.updated_at(current_guild())
+    when = updated_at.strftime("%d/%m %H:%M") if updated_at else "yok"
+    return (
+        f"⚠️ Veritabanına ulaşılamıyor - son kayıt ({when}) gösteriliyor, "
+        f"reaksiyonlar yerel günlüğe yazılıyor."
+    )
@@ -0,0 +1,103 @@
+"""
+Küçük tamsayı kodlu enum kolonları - categories.reset_type, task_status.last_status
+ve notification_messages.kind / state.
+
+Değerler veritabanında SMALLINT olarak saklanır (satır başına 2 bayt, tamsayı
+karşılaştırması); Python tarafı eskisi gibi metin görür:
+
+    Category.reset_type == "daily"      ->  categories.reset_type = 1
+    task.reset_type                     ->  "daily"
+
+Kod eşlemesi IntEnum'lardadır; üye adının küçük harfi metin değeridir. Kodlar
+kalıcıdır - yeni değerler sona eklenir, mevcut kodlar değiştirilmez (eski
+satırlar ve migrasyon 008 bu kodlarla yazılır).
+"""
+
+from enum import IntEnum
+from typing import Optional, Type, Union
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class ResetType(IntEnum):
+    """Kategori sıfırlama tipi."""
+    UNKNOWN = 0
+    DAILY = 1
+    WEEKLY = 2
+    COOLDOWN = 3
+    INSTANCE = 4
+
+
+class StatusCode(IntEnum):
+    """
+    task_status.last_status değerleri. timers.TaskState değerlerini de kapsar
+    (ilk durum yazımı ve SQL hazır olma ifadesi, bkz. schedule.readiness_exprs).
+    """
+    INITIALIZED = 0
+    AVAILABLE = 1
+    NOTIFIED = 2
+    COMPLETED = 3
+    ENTERED = 4
+    SKIPPED = 5
+    RESET = 6
+    ON_COOLDOWN = 7
+    OPEN = 8
+    UNKNOWN = 9
+
+
+class MessageKind(IntEnum):
+    """notification_messages.kind - botun gönderdiği mesajın türü."""
+    UNKNOWN = 0
+    NOTIFICATION = 1
+    PRE_NOTIFICATION = 2
+    CHARACTER = 3
+    CHARACTER_PRE = 4
+
+
+class MessageState(IntEnum):
+    """
+    notification_messages.state: açık (reaksiyon beklenir), tüketildi (görev
+    geçişi yapıldı) ya da Discord'dan silindi.
+    """
+    UNKNOWN = 0
+    OPEN = 1
+    CONSUMED = 2
+    DELETED = 3
+
+
+def enum_values(enum: Type[IntEnum]) -> tuple:
+    """Enum'un metin değerleri (kod sırasıyla)."""
+    return tuple(member.name.lower() for member in enum)
+
+
+class EnumCode(TypeDecorator):
+    """
+    Metin <-> SMALLINT kod dönüşümü yapan kolon tipi.
+    Yazarken metin, enum üyesi veya kod kabul eder; bilinmeyen metin ValueError'dır.
+    Okurken metin döndürür (henüz kodlanmamış metin değerler olduğu gibi geçer).
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum: Type[IntEnum]):
+        super().__init__()
+        self.enum = enum
+        self._codes = {member.name.lower(): member.value for member in enum}
+        self._names = {member.value: member.name.lower() for member in enum}
+
+    def process_bind_param(self, value: Union[str, int, None], dialect) -> Optional[int]:
+        if value is None or isinstance(value, int):
+            return None if value is None else int(value)
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise ValueError(f"Bilinmeyen {self.enum.__name__} değeri: {value!r}") from None
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        return self._names.get(value, value)
+
+    def code_case(self, column: str) -> str:
+        """Metin kolonunu koda çeviren SQL CASE ifadesi (migrasyon için); NULL korunur."""
+        whens = " ".join(f"WHEN {column} = '{name}' THEN {code}" for name, code in self._codes.items())
+        return f"CASE WHEN {column} IS NULL THEN NULL {whens} ELSE {self.enum.UNKNOWN.value} END"
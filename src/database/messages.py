@@ -0,0 +1,311 @@
+"""
+Bildirim mesajı kaydı - notification_messages tablosu ve bellek içi kopyası.
+
+Botun gönderdiği her bildirim mesajı (görev bildirimi, ön bildirim, karakter
+bildirimleri, yeniden gönderimler) kanal kimliğiyle kaydedilir. Açık mesajlar
+süreç başına bellekte de tutulur (message_registry):
+
+    reaksiyon       mesaj id -> görev bellekten; ilgisiz reaksiyonlar DB'ye gitmez
+    silme           kanal kimliği bilindiği için PartialMessage ile, getirmeden
+    geçiş           görevin açık mesajları tek koşullu UPDATE ile tüketilir
+                    (bkz. consume_task_messages, operations._apply_transition)
+
+Mesajlar gönderim anında belleğe eklenir, tabloya write-behind tampon ile
+yazılır (bkz. write_buffer.py). Bellek başlangıçta açık kayıtlarla doldurulur
+ve ana döngüde artımlı eşitlenir (başka replikaların gönderdikleri); eşitleme
+anından önce oluşturulmuş ve bellekte olmayan mesaj kayıtlı değildir (Discord
+mesaj kimliği oluşturulma zamanını taşır), yalnızca daha yeni bilinmeyen
+mesajlar için tek birincil anahtar araması yapılır.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.database.enums import MessageKind, MessageState, enum_values
+from src.database.models import SessionLocal, NotificationMessage, get_db_session
+from src.scheduler.timers import get_current_time_naive
+
+
+# Kayıtların tutulduğu süre (gün); daha eski mesajlara reaksiyon çözülmez
+NOTIFICATION_MESSAGE_RETENTION_DAYS = int(os.getenv("NOTIFICATION_MESSAGE_RETENTION_DAYS", "14"))
+
+# Eşitleme, başka replikanın tamponundaki (henüz yazılmamış) mesajları kaçırmasın
+REGISTRY_SYNC_MARGIN_SECONDS = int(os.getenv("REGISTRY_SYNC_MARGIN_SECONDS", "60"))
+
+# Discord snowflake: üst 42 bit, 2015-01-01'den beri milisaniye
+DISCORD_EPOCH_MS = 1_420_070_400_000
+
+KIND_NOTIFICATION = MessageKind.NOTIFICATION.name.lower()
+KIND_PRE_NOTIFICATION = MessageKind.PRE_NOTIFICATION.name.lower()
+KIND_CHARACTER = MessageKind.CHARACTER.name.lower()
+KIND_CHARACTER_PRE = MessageKind.CHARACTER_PRE.name.lower()
+
+STATE_OPEN = MessageState.OPEN.name.lower()
+STATE_CONSUMED = MessageState.CONSUMED.name.lower()
+STATE_DELETED = MessageState.DELETED.name.lower()
+
+# Görev durumu (task_status) geçişlerinin tükettiği türler; karakter mesajları
+# tüm karakterlerce paylaşılır ve karakter satırlarından tüketilir
+TASK_KINDS = (KIND_NOTIFICATION, KIND_PRE_NOTIFICATION)
+CHARACTER_KINDS = (KIND_CHARACTER, KIND_CHARACTER_PRE)
+
+_table = NotificationMessage.__table__
+
+
+class MessageEntry(NamedTuple):
+    """Açık bildirim mesajı (bellek içi kayıt)."""
+    message_id: str
+    channel_id: Optional[str]
+    task_id: int
+    kind: str
+    created_at: datetime
+
+
+def snowflake_time_ms(message_id: str) -> Optional[int]:
+    """Discord mesaj kimliğinden oluşturulma zamanı (epoch ms); kimlik sayı değilse None."""
+    try:
+        return (int(message_id) >> 22) + DISCORD_EPOCH_MS
+    except (TypeError, ValueError):
+        return None
+
+
+def message_row(
+    message_id: str,
+    channel_id: Optional[str],
+    task_id: int,
+    kind: str,
+    created_at: Optional[datetime] = None
+) -> Dict:
+    """notification_messages satırı (açık)."""
+    return {
+        "message_id": str(message_id),
+        "channel_id": str(channel_id) if channel_id is not None else None,
+        "task_id": task_id,
+        "kind": kind,
+        "created_at": created_at or get_current_time_naive(),  # FORCED NAIVE
+        "state": STATE_OPEN,
+    }
+
+
+# =============================================================================
+# Bellek içi kayıt
+# =============================================================================
+
+class MessageRegistry:
+    """Açık bildirim mesajları: mesaj id -> MessageEntry (tüm sunucular)."""
+
+    def __init__(self):
+        self._entries: Dict[str, MessageEntry] = {}
+        self._lock = threading.Lock()
+        # Bu andan (epoch ms) önce oluşturulmuş mesajlar için bellek kesindir
+        self._horizon_ms: Optional[int] = None
+        # Son eşitlemenin başlangıcı (created_at ile aynı biçim, NAIVE)
+        self._synced_at: Optional[datetime] = None
+
+    def add(self, row: Dict) -> MessageEntry:
+        """message_row() kaydını ekle."""
+        entry = MessageEntry(
+            row["message_id"], row.get("channel_id"), row["task_id"], row["kind"], row["created_at"]
+        )
+        with self._lock:
+            self._entries[entry.message_id] = entry
+        return entry
+
+    def get(self, message_id: str) -> Optional[MessageEntry]:
+        return self._entries.get(str(message_id))
+
+    def entries(self) -> List[MessageEntry]:
+        """Açık kayıtların anlık kopyası (ör. yerel kopyaya yazmak için)."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def is_known_absent(self, message_id: str) -> bool:
+        """
+        Mesaj bellekte yok ve son eşitlemeden önce oluşturulmuş: kayıtlı değildir
+        (ya da artık açık değildir), DB'ye bakmaya gerek yok.
+        """
+        if str(message_id) in self._entries or self._horizon_ms is None:
+            return False
+        created_ms = snowflake_time_ms(message_id)
+        return created_ms is not None and created_ms < self._horizon_ms
+
+    def discard(self, message_ids: Iterable[str]) -> None:
+        with self._lock:
+            for message_id in message_ids:
+                self._entries.pop(str(message_id), None)
+
+    def discard_task(self, task_id: int, kinds: Iterable[str] = TASK_KINDS) -> None:
+        """Görevin verilen türdeki mesajlarını bırak (geçiş hepsini tüketti)."""
+        kinds = set(kinds)
+        with self._lock:
+            for message_id, entry in list(self._entries.items()):
+                if entry.task_id == task_id and entry.kind in kinds:
+                    del self._entries[message_id]
+
+    def sync(self) -> int:
+        """
+        Açık kayıtları tablodan yükle: ilk çağrıda tümü, sonra son eşitlemeden
+        (pay ile) beri oluşturulanlar. Eklenen kayıt sayısını döndürür.
+        """
+        started_ms = int(time.time() * 1000)
+        started = get_current_time_naive()  # FORCED NAIVE
+        margin = timedelta(seconds=REGISTRY_SYNC_MARGIN_SECONDS)
+        since = self._synced_at - margin if self._synced_at else started - timedelta(
+            days=NOTIFICATION_MESSAGE_RETENTION_DAYS
+        )
+
+        rows = load_open_messages(since)
+        if rows is None:
+            return 0
+
+        with self._lock:
+            for row in rows:
+                self._entries[row.message_id] = MessageEntry(*row)
+            self._synced_at = started
+            self._horizon_ms = started_ms - REGISTRY_SYNC_MARGIN_SECONDS * 1000
+        return len(rows)
+
+    def prune(self, cutoff: datetime) -> None:
+        """cutoff'tan önce oluşturulmuş kayıtları bırak (tablo temizliğiyle aynı)."""
+        with self._lock:
+            for message_id, entry in list(self._entries.items()):
+                if entry.created_at < cutoff:
+                    del self._entries[message_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+message_registry = MessageRegistry()
+
+
+# =============================================================================
+# Tablo işlemleri
+# =============================================================================
+
+_OPEN_SINCE = (
+    select(_table.c.message_id, _table.c.channel_id, _table.c.task_id, _table.c.kind, _table.c.created_at)
+    .where(_table.c.state == STATE_OPEN, _table.c.created_at >= bindparam("since"))
+)
+
+_OPEN_BY_ID = (
+    select(_table.c.message_id, _table.c.channel_id, _table.c.task_id, _table.c.kind, _table.c.created_at)
+    .where(_table.c.message_id == bindparam("message_id"), _table.c.state == STATE_OPEN)
+)
+
+
+def load_open_messages(since: datetime) -> Optional[list]:
+    """since'tan beri oluşturulmuş açık kayıtlar (tüm sunucular); hata olursa None."""
+    if not SessionLocal:
+        return None
+
+    session = SessionLocal()
+    try:
+        return session.execute(_OPEN_SINCE, {"since": since}).all()
+    except Exception as e:
+        print(f"Mesaj kaydı yükleme hatası: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def get_notification_message(message_id: str) -> Optional[MessageEntry]:
+    """
+    Bellekte olmayan mesajın açık kaydı (başka replikanın henüz eşitlenmemiş
+    mesajı); bulunursa belleğe eklenir.
+    """
+    session = get_db_session()
+    if not session:
+        return None
+
+    try:
+        row = session.execute(_OPEN_BY_ID, {"message_id": str(message_id)}).first()
+    finally:
+        session.close()
+
+    if row is None:
+        return None
+    return message_registry.add(row._asdict())
+
+
+def write_notification_messages(rows: List[Dict], states: Dict[str, str]) -> int:
+    """
+    Tampondaki yeni mesaj kayıtlarını (zaten varsa atlanır) ve durum
+    değişikliklerini tek transaction'da yaz. Hata istisna olarak yükselir
+    (tampon kayıtları geri koyar). Yazılan kayıt sayısını döndürür.
+    """
+    if not (rows or states) or not SessionLocal:
+        return 0
+
+    session = SessionLocal()
+    try:
+        if rows:
+            insert = sqlite_insert if session.get_bind().dialect.name == "sqlite" else pg_insert
+            session.execute(
+                insert(_table).on_conflict_do_nothing(index_elements=[_table.c.message_id]), rows
+            )
+        if states:
+            session.execute(
+                _table.update()
+                .where(_table.c.message_id == bindparam("b_message_id"))
+                .values(state=bindparam("b_state")),
+                [{"b_message_id": m, "b_state": s} for m, s in states.items()]
+            )
+        session.commit()
+        return len(rows) + len(states)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def consume_task_messages(session, task_id: int) -> List[str]:
+    """
+    Görevin açık (görev durumu türündeki) mesajlarını tek UPDATE ... RETURNING
+    ile tüket ve kimliklerini döndür. Çağıranın transaction'ındadır: geçiş
+    yapılmazsa çağıran geri alır (bkz. operations._apply_transition).
+    """
+    return session.execute(
+        _table.update()
+        .where(
+            _table.c.task_id == task_id,
+            _table.c.state == STATE_OPEN,
+            _table.c.kind.in_(TASK_KINDS),
+        )
+        .values(state=STATE_CONSUMED)
+        .returning(_table.c.message_id)
+    ).scalars().all()
+
+
+def prune_notification_messages(retention_days: int = NOTIFICATION_MESSAGE_RETENTION_DAYS) -> int:
+    """Saklama süresinden eski kayıtları sil (bellekten de); silinen sayıyı döndürür."""
+    if not SessionLocal:
+        return 0
+
+    cutoff = get_current_time_naive() - timedelta(days=retention_days)  # FORCED NAIVE
+    session = SessionLocal()
+    try:
+        # Durum listesi (state, created_at) indeksinin aralık taramasıyla kullanılmasını sağlar
+        result = session.execute(
+            _table.delete().where(
+                _table.c.state.in_(enum_values(MessageState)),
+                _table.c.created_at < cutoff,
+            )
+        )
+        session.commit()
+        message_registry.prune(cutoff)
+        return result.rowcount
+    except Exception as e:
+        session.rollback()
+        print(f"Mesaj kaydı temizleme hatası: {e}")
+        return 0
+    finally:
+        session.close()
@@ -0,0 +1,376 @@
+"""
+Şema migrasyonları - sürümlü, başlangıçta kilit altında çalışır.
+
+Her migrasyon (sürüm, ad, fonksiyon) üçlüsüdür ve bir kez uygulanır;
+uygulananlar schema_migrations tablosuna yazılır. Yeni kurulumlarda
+create_all() tabloları zaten son haliyle oluşturduğu için migrasyonlar
+idempotent yazılır (IF NOT EXISTS / kolon kontrolü).
+"""
+
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Integer, MetaData, Table, func, inspect, literal, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.database.enums import MessageKind, MessageState
+from src.database.models import (
+    Base, SchemaMigration, Category, Task, Setting, TaskStatus, CharacterTaskStatus,
+    NotificationMessage, TASK_STATUS_READ_COLUMNS
+)
+from src.database.schedule import refresh_schedules
+from src.scheduler.timers import get_current_time_naive
+
+
+# Birden fazla süreç (bot + dashboard) aynı anda açılırsa tek biri migrasyon yapar
+MIGRATION_LOCK_KEY = 7_104_202_501
+
+# task_events için içinde bulunulan aydan sonra kaç aylık bölüm önceden açılır
+EVENT_PARTITION_MONTHS_AHEAD = 2
+
+
+# =============================================================================
+# Yardımcılar
+# =============================================================================
+
+def _create_index(
+    conn: Connection, name: str, table: str, columns: str, unique: bool = False, include: str = ""
+) -> None:
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    suffix = f" INCLUDE ({include})" if include else ""
+    conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns}){suffix}"))
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _is_integer_column(conn: Connection, table: str, column: str) -> bool:
+    return any(
+        c["name"] == column and isinstance(c["type"], Integer)
+        for c in inspect(conn).get_columns(table)
+    )
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _has_unique(conn: Connection, table: str, columns: List[str]) -> Optional[str]:
+    """Kolonlar üzerinde tekil kısıt varsa adı (SQLite'ta adsız olabilir: ""), yoksa None."""
+    for constraint in inspect(conn).get_unique_constraints(table):
+        if constraint["column_names"] == columns:
+            return constraint["name"] or ""
+    return None
+
+
+def _rebuild_sqlite_table(conn: Connection, table: Table) -> None:
+    """
+    SQLite'ta kısıt / birincil anahtar değiştirmenin tek yolu: tabloyu güncel
+    tanımıyla yeniden kur ve satırları taşı. Yeni kolonlar server_default alır.
+    Yabancı anahtarlar kapalı olmalı (bkz. run_migrations), yoksa DROP TABLE
+    bağlı tablolarda ON DELETE CASCADE tetikler.
+    """
+    old_columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    columns = ", ".join(c.name for c in table.columns if c.name in old_columns)
+    
+    # Yabancı anahtar hedefleri DDL derlenebilsin diye aynı metadata'ya kopyalanır
+    metadata = MetaData()
+    for fk in table.foreign_keys:
+        fk.column.table.to_metadata(metadata)
+    staging = table.to_metadata(metadata, name=f"{table.name}_new")
+    staging.indexes.clear()
+    staging.create(conn)
+    
+    conn.execute(text(f"INSERT INTO {staging.name} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {staging.name} RENAME TO {table.name}"))
+    
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _encode_enum_columns(conn: Connection, table: Table, columns: List[str]) -> None:
+    """
+    Metin enum kolonlarını SMALLINT koda çevir (bkz. enums.EnumCode); zaten
+    tamsayıysa dokunma.
+    PostgreSQL'de tablo yeniden yazılmaz: kod kolonu eklenir (yalnızca katalog),
+    tek UPDATE ile doldurulur (okumalar MVCC ile sürer, yalnızca satır kilidi),
+    eski kolon düşürülüp yenisinin adı değiştirilir (yalnızca katalog). Eski
+    metin değerlerin yeri satırlar güncellendikçe / VACUUM ile geri kazanılır.
+    SQLite'ta tablo güncel tanımıyla yeniden kurulur ve kodlar yerinde yazılır.
+    """
+    pending = [c for c in columns if not _is_integer_column(conn, table.name, c)]
+    if not pending:
+        return
+    
+    if conn.dialect.name == "sqlite":
+        _rebuild_sqlite_table(conn, table)
+        assignments = ", ".join(f"{c} = {table.c[c].type.code_case(c)}" for c in pending)
+        conn.execute(text(f"UPDATE {table.name} SET {assignments}"))
+        return
+    
+    for column in pending:
+        staged = f"{column}_code"
+        _add_column(conn, table.name, staged, "SMALLINT")
+        conn.execute(text(f"UPDATE {table.name} SET {staged} = {table.c[column].type.code_case(column)}"))
+        conn.execute(text(f"ALTER TABLE {table.name} DROP COLUMN {column}"))
+        conn.execute(text(f"ALTER TABLE {table.name} RENAME COLUMN {staged} TO {column}"))
+        if not table.c[column].nullable:
+            conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {column} SET NOT NULL"))
+
+
+def _set_sqlite_foreign_keys(conn: Connection, enabled: bool) -> None:
+    """PRAGMA foreign_keys transaction içinde etkisizdir; bağlantıya doğrudan verilir."""
+    if conn.dialect.name == "sqlite":
+        conn.connection.dbapi_connection.execute(f"PRAGMA foreign_keys={'ON' if enabled else 'OFF'}")
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_event_partitions(conn: Connection, months_ahead: int = EVENT_PARTITION_MONTHS_AHEAD) -> None:
+    """
+    task_events için DEFAULT + aylık bölümler (yalnızca PostgreSQL).
+    DEFAULT bölüm eksik ay olursa yazımların düşmemesi içindir; aynı aralıkta
+    satır içeriyorsa o ayın bölümü oluşturulamaz ve atlanır.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    
+    conn.execute(text("CREATE TABLE IF NOT EXISTS task_events_default PARTITION OF task_events DEFAULT"))
+    
+    this_month = get_current_time_naive().date().replace(day=1)
+    for i in range(months_ahead + 1):
+        start = _add_months(this_month, i)
+        end = _add_months(this_month, i + 1)
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS task_events_{start:%Y%m} PARTITION OF task_events "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+        except Exception as e:
+            print(f"⚠️ task_events_{start:%Y%m} bölümü oluşturulamadı: {e}")
+
+
+# =============================================================================
+# Migrasyonlar
+# =============================================================================
+
+def _m001_hot_path_indexes(conn: Connection) -> None:
+    """Reaksiyon, eski bildirim ve kanal aramaları için indeksler."""
+    _create_index(conn, "ix_task_status_notification_message_id",
+                  "task_status", "notification_message_id")
+    _create_index(conn, "ix_task_status_last_status_notified_at",
+                  "task_status", "last_status, last_notified_at")
+    _create_index(conn, "ix_categories_discord_channel_id",
+                  "categories", "discord_channel_id")
+
+
+def _m002_task_events(conn: Connection) -> None:
+    """Olay günlüğü bölümleri (tablolar create_all ile oluşur)."""
+    _create_event_partitions(conn)
+
+
+def _m003_task_leases(conn: Connection) -> None:
+    """Çoklu replika bildirim kiraları (job_runs create_all ile oluşur)."""
+    _add_column(conn, "task_status", "claimed_by", "VARCHAR(100)")
+    _add_column(conn, "task_status", "lease_expires_at", "TIMESTAMP")
+
+
+def _m004_task_schedule(conn: Connection) -> None:
+    """Saklanan zaman çizelgesi kolonları + indeksler, mevcut satırlar için backfill."""
+    _add_column(conn, "task_status", "next_available_at", "TIMESTAMP")
+    _add_column(conn, "task_status", "closes_at", "TIMESTAMP")
+    _add_column(conn, "task_status", "pre_notify_at", "TIMESTAMP")
+    _create_index(conn, "ix_task_status_next_available_at", "task_status", "next_available_at")
+    _create_index(conn, "ix_task_status_pre_notify_at", "task_status", "pre_notify_at")
+    refresh_schedules(conn)
+
+
+def _m005_task_natural_key(conn: Connection) -> None:
+    """Toplu içe aktarımın (kategori, görev adı) eşleştirmesi için indeks."""
+    _create_index(conn, "ix_tasks_category_id_name", "tasks", "category_id, name")
+
+
+def _m006_guild_partitioning(conn: Connection) -> None:
+    """
+    Sunucu (guild) boyutu: kategoriler, görevler ve ayarlar guild_id ile bölünür.
+    Kategori adı sunucu içinde tekil olur, ayarların anahtarı (guild_id, key) olur.
+    Mevcut satırlar atanmamış ('') kalır ve bot bağlandığında devredilir.
+    """
+    if conn.dialect.name == "sqlite":
+        if not _has_column(conn, "categories", "guild_id") or _has_unique(conn, "categories", ["name"]) is not None:
+            _rebuild_sqlite_table(conn, Category.__table__)
+        if not _has_column(conn, "settings", "guild_id"):
+            _rebuild_sqlite_table(conn, Setting.__table__)
+    else:
+        _add_column(conn, "categories", "guild_id", "VARCHAR(32) NOT NULL DEFAULT ''")
+        unique_name = _has_unique(conn, "categories", ["name"])
+        if unique_name:
+            conn.execute(text(f'ALTER TABLE categories DROP CONSTRAINT "{unique_name}"'))
+        
+        if not _has_column(conn, "settings", "guild_id"):
+            pk_name = inspect(conn).get_pk_constraint("settings")["name"]
+            _add_column(conn, "settings", "guild_id", "VARCHAR(32) NOT NULL DEFAULT ''")
+            conn.execute(text(
+                f'ALTER TABLE settings DROP CONSTRAINT "{pk_name}", ADD PRIMARY KEY (guild_id, key)'
+            ))
+    
+    _add_column(conn, "tasks", "guild_id", "VARCHAR(32) NOT NULL DEFAULT ''")
+    _create_index(conn, "ux_categories_guild_id_name", "categories", "guild_id, name", unique=True)
+    _create_index(conn, "ix_tasks_guild_id_category_id", "tasks", "guild_id, category_id")
+
+
+def _m007_character_status(conn: Connection) -> None:
+    """Karakter başına görev durumu (characters / character_task_status create_all ile oluşur)."""
+    _create_index(conn, "ux_character_task_status_character_task",
+                  "character_task_status", "character_id, task_id", unique=True)
+    _create_index(conn, "ix_character_task_status_task_id", "character_task_status", "task_id")
+    _create_index(conn, "ix_character_task_status_next_available_at",
+                  "character_task_status", "next_available_at")
+    _create_index(conn, "ix_character_task_status_pre_notify_at",
+                  "character_task_status", "pre_notify_at")
+
+
+def _m008_enum_codes(conn: Connection) -> None:
+    """
+    Şema v2: reset_type / last_status SMALLINT kod olarak saklanır (bkz. enums.py);
+    görev okumalarının task_status JOIN'i için kapsayan indeks (yalnızca PostgreSQL).
+    """
+    _encode_enum_columns(conn, Category.__table__, ["reset_type"])
+    _encode_enum_columns(conn, TaskStatus.__table__, ["last_status"])
+    # PostgreSQL'de eski kolonla birlikte düşen indeks
+    _create_index(conn, "ix_task_status_last_status_notified_at",
+                  "task_status", "last_status, last_notified_at")
+    if conn.dialect.name == "postgresql":
+        _create_index(conn, "ix_task_status_task_id_covering", "task_status", "task_id",
+                      include=", ".join(TASK_STATUS_READ_COLUMNS))
+
+
+def _m009_notification_messages(conn: Connection) -> None:
+    """
+    Bildirim mesajı kaydı (notification_messages create_all ile oluşur): indeksler
+    ve görev / karakter satırlarındaki son mesaj kimliklerinden backfill. Kanal
+    kimliği kategorinin kanalından alınır (yoksa boş, silme mesajı getirerek yapılır).
+    """
+    _create_index(conn, "ix_notification_messages_task_id_state", "notification_messages", "task_id, state")
+    _create_index(conn, "ix_notification_messages_state_created_at",
+                  "notification_messages", "state, created_at")
+    
+    messages = NotificationMessage.__table__
+    now = get_current_time_naive()
+    columns = ["message_id", "channel_id", "task_id", "kind", "created_at", "state"]
+    
+    for status, kind in ((TaskStatus, MessageKind.NOTIFICATION), (CharacterTaskStatus, MessageKind.CHARACTER)):
+        # Karakter mesajı görevin tüm karakter satırlarında aynıdır: mesaj başına tek satır
+        source = (
+            select(
+                status.notification_message_id,
+                func.max(Category.discord_channel_id),
+                func.min(status.task_id),
+                literal(kind.value),
+                func.coalesce(func.max(status.last_notified_at), now),
+                literal(MessageState.OPEN.value),
+            )
+            .join(Task, Task.id == status.task_id)
+            .join(Category, Category.id == Task.category_id)
+            .where(
+                status.notification_message_id.isnot(None),
+                status.notification_message_id.notin_(select(messages.c.message_id)),
+            )
+            .group_by(status.notification_message_id)
+        )
+        conn.execute(messages.insert().from_select(columns, source))
+
+
+def _m010_character_leases(conn: Connection) -> None:
+    """Karakter bildirimi kiraları: last_notified_at / pre_notified gönderimden sonra yazılır."""
+    _add_column(conn, "character_task_status", "claimed_by", "VARCHAR(100)")
+    _add_column(conn, "character_task_status", "lease_expires_at", "TIMESTAMP")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hot_path_indexes", _m001_hot_path_indexes),
+    (2, "task_events", _m002_task_events),
+    (3, "task_leases", _m003_task_leases),
+    (4, "task_schedule", _m004_task_schedule),
+    (5, "task_natural_key", _m005_task_natural_key),
+    (6, "guild_partitioning", _m006_guild_partitioning),
+    (7, "character_status", _m007_character_status),
+    (8, "enum_codes", _m008_enum_codes),
+    (9, "notification_messages", _m009_notification_messages),
+    (10, "character_leases", _m010_character_leases),
+]
+
+
+# =============================================================================
+# Çalıştırıcı
+# =============================================================================
+
+def _acquire_lock(conn: Connection) -> None:
+    """
+    Transaction sonuna kadar tutulan migrasyon kilidi.
+    SQLite'ta ayrıca gerekmez: transaction BEGIN IMMEDIATE ile açılır (bkz. run_migrations).
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Eksik tabloları oluştur ve bekleyen migrasyonları sırayla uygula.
+    Tamamı tek transaction'da, kilit altında çalışır. Uygulanan sürümleri döndürür.
+    """
+    applied_now = []
+
+    with engine.connect().execution_options(sqlite_begin_immediate=True) as conn:
+        # SQLite tablo yeniden kurulumu için (bkz. _rebuild_sqlite_table);
+        # bütünlük commit öncesinde foreign_key_check ile doğrulanır
+        _set_sqlite_foreign_keys(conn, False)
+        try:
+            with conn.begin():
+                _acquire_lock(conn)
+
+                Base.metadata.create_all(bind=conn)
+
+                applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+                for version, name, migrate in MIGRATIONS:
+                    if version in applied:
+                        continue
+
+                    print(f"🧱 Migrasyon {version:03d}: {name}")
+                    migrate(conn)
+                    conn.execute(
+                        SchemaMigration.__table__.insert().values(
+                            version=version, name=name, applied_at=datetime.utcnow()
+                        )
+                    )
+                    applied_now.append(version)
+
+                if conn.dialect.name == "sqlite" and conn.execute(text("PRAGMA foreign_key_check")).first():
+                    raise RuntimeError("Migrasyon sonrası yabancı anahtar ihlali")
+        finally:
+            _set_sqlite_foreign_keys(conn, True)
+
+    return applied_now
+
+
+def current_version(engine: Engine) -> int:
+    """Uygulanmış en yüksek migrasyon sürümü (yoksa 0)."""
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT MAX(version) FROM schema_migrations")).first()
+        return (row[0] or 0) if row else 0
+
+
+def ensure_event_partitions(engine: Optional[Engine]) -> None:
+    """Önümüzdeki aylar için task_events bölümlerini aç (başlangıçta ve günlük)."""
+    if engine is None or engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        _create_event_partitions(conn)
@@ -1,17 +1,27 @@
 """
-Database Models - SQLAlchemy ORM with PostgreSQL support.
+Database Models - SQLAlchemy ORM with PostgreSQL and SQLite (WAL) support.
 Includes one-time seed for default categories and tasks.
 """
 
 import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, List, Callable, Union
 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import create_engine, make_url, Column, Integer, String, Boolean, Text, DateTime, Date, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from dotenv import load_dotenv
 
+from src.database.enums import EnumCode, ResetType, StatusCode, MessageKind, MessageState
+from src.database.pool import pool_engine_kwargs, instrument_engine, start_health_checker
+from src.database.sqlite_backend import (
+    is_sqlite_url, sqlite_engine_kwargs, configure_sqlite, refresh_sqlite_statistics
+)
+
 load_dotenv()
 
 # Database URL from environment (Railway provides DATABASE_URL)
@@ -21,9 +31,23 @@ DATABASE_URL = os.getenv("DATABASE_URL", "")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# psycopg 3 (postgresql+psycopg://): aynı ifade bu kadar çalıştırılınca sunucu
+# tarafında hazırlanır. psycopg2 hazırlanmış ifade desteklemez.
+PG_PREPARE_THRESHOLD = int(os.getenv("PG_PREPARE_THRESHOLD", "5"))
+
 # Create engine and session
 if DATABASE_URL:
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    # pool_pre_ping yerine pool_recycle + arka plan sağlık kontrolü (bkz. pool.py)
+    engine_kwargs = pool_engine_kwargs()
+    if is_sqlite_url(DATABASE_URL):
+        # Tek sunuculu kurulum: yerel SQLite dosyası, WAL modu (bkz. sqlite_backend.py)
+        engine_kwargs.update(sqlite_engine_kwargs(DATABASE_URL))
+    elif make_url(DATABASE_URL).get_driver_name() == "psycopg":
+        engine_kwargs["connect_args"] = {"prepare_threshold": PG_PREPARE_THRESHOLD}
+    engine = create_engine(DATABASE_URL, **engine_kwargs)
+    if engine.dialect.name == "sqlite":
+        configure_sqlite(engine)
+    instrument_engine(engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 else:
     engine = None
@@ -31,6 +55,17 @@ else:
 
 Base = declarative_base()
 
+# Aktif birim-iş (unit of work) oturumu - bkz. unit_of_work()
+_current_unit_of_work: ContextVar[Optional["_UnitOfWorkSession"]] = ContextVar(
+    "current_unit_of_work", default=None
+)
+
+# Sunucuya atanmamış veri (tek sunuculu eski kurulumlar, dashboard / CLI varsayılanı)
+DEFAULT_GUILD_ID = ""
+
+# Aktif Discord sunucusu - bkz. guild_scope()
+_current_guild: ContextVar[str] = ContextVar("current_guild", default=DEFAULT_GUILD_ID)
+
 
 # =============================================================================
 # ORM Models
@@ -41,10 +76,11 @@ class Category(Base):
     __tablename__ = "categories"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(255), unique=True, nullable=False)
+    guild_id = Column(String(32), nullable=False, default=DEFAULT_GUILD_ID, server_default="")
+    name = Column(String(255), nullable=False)
     description = Column(Text, default="")
-    reset_type = Column(String(50), nullable=False)  # daily, weekly, cooldown, instance
-    discord_channel_id = Column(String(100), default=None)
+    reset_type = Column(EnumCode(ResetType), nullable=False)  # daily, weekly, cooldown, instance
+    discord_channel_id = Column(String(100), default=None, index=True)
     is_active = Column(Boolean, default=True)
     pre_notify_minutes = Column(Integer, default=0)
     show_resource_reminder = Column(Boolean, default=False)
@@ -52,6 +88,11 @@ class Category(Base):
     
     # Relationships
     tasks = relationship("Task", back_populates="category", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Kategori adları sunucu içinde tekildir
+        Index("ux_categories_guild_id_name", "guild_id", "name", unique=True),
+    )
 
 
 class Task(Base):
@@ -60,6 +101,8 @@ class Task(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    # Kategorinin sunucusu (sunucu başına sorgular JOIN'siz daraltılsın diye tekrarlanır)
+    guild_id = Column(String(32), nullable=False, default=DEFAULT_GUILD_ID, server_default="")
     name = Column(String(255), nullable=False)
     description = Column(Text, default="")
     cooldown_minutes = Column(Integer, default=0)
@@ -70,6 +113,21 @@ class Task(Base):
     # Relationships
     category = relationship("Category", back_populates="tasks")
     status = relationship("TaskStatus", back_populates="task", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Toplu içe aktarım: görevler (kategori, ad) doğal anahtarıyla eşleştirilir (bkz. bulk.py)
+        Index("ix_tasks_category_id_name", "category_id", "name"),
+        # Sunucu başına görev listeleri ve scheduler döngüsü
+        Index("ix_tasks_guild_id_category_id", "guild_id", "category_id"),
+    )
+
+
+# Görev okumalarının (operations._task_select) task_status'tan aldığı kolonlar
+TASK_STATUS_READ_COLUMNS = (
+    "is_completed", "last_completed_at", "instance_entered_at", "notification_message_id",
+    "last_notified_at", "last_status", "pre_notified", "next_available_at", "closes_at",
+    "pre_notify_at",
+)
 
 
 class TaskStatus(Base):
@@ -81,23 +139,192 @@ class TaskStatus(Base):
     is_completed = Column(Boolean, default=False)
     last_completed_at = Column(DateTime, default=None)
     instance_entered_at = Column(DateTime, default=None)
-    notification_message_id = Column(String(100), default=None)
+    notification_message_id = Column(String(100), default=None, index=True)
     last_notified_at = Column(DateTime, default=None)
-    last_status = Column(String(50), default="initialized")
+    last_status = Column(EnumCode(StatusCode), default="initialized")
     pre_notified = Column(Boolean, default=False)
+    # Çoklu replika: bildirimi gönderme hakkını alan süreç ve kira süresi (bkz. claim_tasks)
+    claimed_by = Column(String(100), default=None)
+    lease_expires_at = Column(DateTime, default=None)
+    # Saklanan zaman çizelgesi (timers.calculate_schedule) - yalnızca tamamlama,
+    # giriş, reset ve düzenlemede yeniden hesaplanır (bkz. schedule.refresh_schedules)
+    next_available_at = Column(DateTime, default=None)
+    closes_at = Column(DateTime, default=None)
+    pre_notify_at = Column(DateTime, default=None)
     
     # Relationships
     task = relationship("Task", back_populates="status")
+    
+    __table_args__ = (
+        # get_stale_notifications: last_status = 'notified' AND last_notified_at < cutoff
+        Index("ix_task_status_last_status_notified_at", "last_status", "last_notified_at"),
+        # Görev okumalarının JOIN'i (PostgreSQL): durum kolonları indeksten, tabloya gitmeden
+        Index(
+            "ix_task_status_task_id_covering", "task_id",
+            postgresql_include=list(TASK_STATUS_READ_COLUMNS),
+        ).ddl_if(dialect="postgresql"),
+        # Hazır olma / ön bildirim aralık taramaları
+        Index("ix_task_status_next_available_at", "next_available_at"),
+        Index("ix_task_status_pre_notify_at", "pre_notify_at"),
+    )
+
+
+class Character(Base):
+    """
+    Oyuncu karakteri - bir Discord kullanıcısının sunucudaki karakterleri (ana + alt'lar).
+    Kullanıcının reaksiyonları is_active karakterine yazılır.
+    """
+    __tablename__ = "characters"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(String(32), nullable=False, default=DEFAULT_GUILD_ID, server_default="")
+    discord_user_id = Column(String(32), nullable=False)
+    name = Column(String(100), nullable=False)
+    is_active = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    statuses = relationship("CharacterTaskStatus", back_populates="character", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Karakter adları kullanıcı başına tekildir; reaksiyonda aktif karakter araması
+        Index("ux_characters_guild_id_user_name", "guild_id", "discord_user_id", "name", unique=True),
+    )
+
+
+class CharacterTaskStatus(Base):
+    """
+    Karakter başına görev durumu - her (karakter, görev) çifti için bir satır.
+    TaskStatus'un karakter karşılığı; zaman çizelgesi aynı şekilde saklanır
+    (bkz. schedule.refresh_schedules).
+    """
+    __tablename__ = "character_task_status"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    character_id = Column(Integer, ForeignKey("characters.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    is_completed = Column(Boolean, default=False)
+    last_completed_at = Column(DateTime, default=None)
+    instance_entered_at = Column(DateTime, default=None)
+    # Görev başına tek mesajda listelenen karakterlerin hepsi aynı mesaj kimliğini taşır
+    notification_message_id = Column(String(100), default=None)
+    last_notified_at = Column(DateTime, default=None)
+    pre_notified = Column(Boolean, default=False)
+    next_available_at = Column(DateTime, default=None)
+    closes_at = Column(DateTime, default=None)
+    pre_notify_at = Column(DateTime, default=None)
+    # Çoklu replika: bildirim kirası (bkz. characters.claim_character_notifications)
+    claimed_by = Column(String(100), default=None)
+    lease_expires_at = Column(DateTime, default=None)
+    
+    # Relationships
+    character = relationship("Character", back_populates="statuses")
+    
+    __table_args__ = (
+        Index("ux_character_task_status_character_task", "character_id", "task_id", unique=True),
+        # Görev silme (CASCADE), görev başına yenileme ve reset
+        Index("ix_character_task_status_task_id", "task_id"),
+        Index("ix_character_task_status_notification_message_id", "notification_message_id"),
+        # Hazır olma / ön bildirim aralık taramaları
+        Index("ix_character_task_status_next_available_at", "next_available_at"),
+        Index("ix_character_task_status_pre_notify_at", "pre_notify_at"),
+    )
+
+
+class NotificationMessage(Base):
+    """
+    Botun gönderdiği bildirim mesajları - görev başına yalnızca sonuncusu değil,
+    ön bildirimler ve yeniden gönderimler dahil hepsi. Açık olanlar bellekte
+    de tutulur (bkz. messages.message_registry); reaksiyonlar ve silme buradan
+    çözülür. Kanal kimliği sayesinde mesaj getirilmeden silinebilir.
+    """
+    __tablename__ = "notification_messages"
+    
+    message_id = Column(String(32), primary_key=True)
+    # Migrasyon 009 öncesi mesajlarda kategori kanalı bilinmiyorsa boş
+    channel_id = Column(String(32), default=None)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(EnumCode(MessageKind), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    state = Column(EnumCode(MessageState), nullable=False, default="open")
+    
+    __table_args__ = (
+        # Geçişte görevin açık mesajları / görev silme (CASCADE)
+        Index("ix_notification_messages_task_id_state", "task_id", "state"),
+        # Başlangıç yüklemesi, artımlı eşitleme ve eski kayıt temizliği
+        Index("ix_notification_messages_state_created_at", "state", "created_at"),
+    )
+
+
+# Görev olay tipleri - task_events.event_type
+EVENT_COMPLETED = "completed"
+EVENT_ENTERED = "entered"
+EVENT_SKIPPED = "skipped"
+EVENT_SNOOZED = "snoozed"
+EVENT_NOTIFIED = "notified"
+EVENT_TYPES = (EVENT_COMPLETED, EVENT_ENTERED, EVENT_SKIPPED, EVENT_SNOOZED, EVENT_NOTIFIED)
+
+
+class TaskEvent(Base):
+    """
+    Append-only görev olay günlüğü.
+    PostgreSQL'de occurred_at'e göre aylık bölümlenir (bkz. migrations.ensure_event_partitions).
+    Bölümlenmiş tabloda tekil anahtar bölüm kolonunu içermek zorunda olduğundan
+    veritabanı PK'sı yoktur; ORM anahtarı __mapper_args__ ile verilir.
+    Görev silinse de geçmiş kalsın diye task_id yabancı anahtar değildir.
+    """
+    __tablename__ = "task_events"
+    
+    task_id = Column(Integer, nullable=False)
+    event_type = Column(String(20), nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_task_events_task_id_occurred_at", "task_id", "occurred_at"),
+        Index("ix_task_events_occurred_at", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+    __mapper_args__ = {"primary_key": [task_id, event_type, occurred_at]}
+
+
+class TaskEventDaily(Base):
+    """Günlük olay sayıları - her olay yazımında aynı transaction'da artırılır."""
+    __tablename__ = "task_event_daily"
+    
+    day = Column(Date, primary_key=True)
+    task_id = Column(Integer, primary_key=True)
+    event_type = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class JobRun(Base):
+    """Zamanlanmış işlerin (reset, hatırlatma) çalıştırma hakkı - replika başına değil, bir kez."""
+    __tablename__ = "job_runs"
+    
+    job_name = Column(String(100), primary_key=True)
+    run_key = Column(String(50), primary_key=True)
+    claimed_by = Column(String(100), nullable=False)
+    claimed_at = Column(DateTime, nullable=False)
 
 
 class Setting(Base):
-    """Ayarlar modeli."""
+    """Ayarlar modeli - sunucu başına."""
     __tablename__ = "settings"
     
+    guild_id = Column(String(32), primary_key=True, default=DEFAULT_GUILD_ID, server_default="")
     key = Column(String(100), primary_key=True)
     value = Column(Text, nullable=False)
 
 
+class SchemaMigration(Base):
+    """Uygulanmış şema migrasyonları - bkz. migrations.py."""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
 # =============================================================================
 # Database Initialization
 # =============================================================================
@@ -108,13 +335,19 @@ def init_db():
         return False
 
     try:
-        Base.metadata.create_all(bind=engine)
+        from src.database.migrations import run_migrations, ensure_event_partitions
+        run_migrations(engine)
+        ensure_event_partitions(engine)
+        refresh_sqlite_statistics(engine)
+        start_health_checker(engine)
 
         session = SessionLocal()
         try:
+            # Boş veritabanı: varsayılan veri atanmamış olarak eklenir,
+            # bot bağlandığında ilk sunucuya devredilir (bkz. prepare_guild)
             category_count = session.query(Category).count()
             if category_count == 0:
-                seed_database()
+                seed_database(DEFAULT_GUILD_ID)
             else:
                 print(f"📦 Seed atlandı, {category_count} kategori zaten var.")
         finally:
@@ -127,18 +360,29 @@ def init_db():
         return False
 
 
-def seed_database():
+def get_backend_name() -> str:
+    """Kullanıcıya gösterilecek veritabanı türü."""
+    if not engine:
+        return "Yok"
+    if engine.dialect.name == "sqlite":
+        return "SQLite (WAL)"
+    return "PostgreSQL"
+
+
+def seed_database(guild_id: Union[int, str, None] = None):
     """
-    Varsayılan kategorileri ve görevleri ekle.
-    SADECE tablolar boşsa çalışır (one-time seed).
+    Varsayılan kategorileri ve görevleri sunucuya ekle (verilmezse aktif sunucu).
+    SADECE sunucunun kategorisi yoksa çalışır (one-time seed).
     """
     if not SessionLocal:
         return
     
+    guild = current_guild() if guild_id is None else guild_key(guild_id)
+    
     session = SessionLocal()
     try:
         # Kategori sayısını kontrol et - zaten veri varsa atla
-        category_count = session.query(Category).count()
+        category_count = session.query(Category).filter(Category.guild_id == guild).count()
         if category_count > 0:
             print(f"📦 Veritabanında {category_count} kategori mevcut, seed atlandı.")
             return
@@ -160,7 +404,7 @@ def seed_database():
         
         category_map = {}
         for cat_data in categories_data:
-            cat = Category(**cat_data)
+            cat = Category(guild_id=guild, **cat_data)
             session.add(cat)
             session.flush()  # ID almak için
             category_map[cat_data["name"]] = cat.id
@@ -208,6 +452,7 @@ def seed_database():
             
             task = Task(
                 category_id=category_map[cat_name],
+                guild_id=guild,
                 name=task_data["name"],
                 description=task_data["description"],
                 cooldown_minutes=task_data["cooldown"],
@@ -228,15 +473,17 @@ def seed_database():
             ("notification_cooldown_minutes", "120"),
             ("bot_active", "true"),
             ("auto_refresh_minutes", "60"),
+            ("character_notifications", "false"),
         ]
         
         for key, val in settings_data:
-            setting = Setting(key=key, value=val)
+            setting = Setting(guild_id=guild, key=key, value=val)
             session.add(setting)
         
         session.commit()
+        _invalidate_settings(guild)
         
-        task_count = session.query(Task).count()
+        task_count = session.query(Task).filter(Task.guild_id == guild).count()
         print(f"✅ Seed tamamlandı: {len(categories_data)} kategori, {task_count} görev eklendi!")
         
     except Exception as e:
@@ -246,37 +493,274 @@ def seed_database():
         session.close()
 
 
-# =============================================================================
-# Settings Helpers
-# =============================================================================
+def prepare_guild(guild_id: Union[int, str]) -> str:
+    """
+    Bot bir sunucuya bağlandığında sunucunun verisini hazırla.
+    Sunucunun kategorisi yoksa atanmamış veri (tek sunuculu eski kurulum veya
+    init_db seed'i) bu sunucuya devredilir; o da yoksa varsayılan veri eklenir.
+    "existing", "adopted" veya "seeded" döndürür.
+    """
+    if not SessionLocal:
+        return "existing"
+    
+    guild = guild_key(guild_id)
+    
+    session = SessionLocal()
+    try:
+        if session.query(Category.id).filter(Category.guild_id == guild).first():
+            return "existing"
+        
+        unassigned = session.query(Category.id).filter(Category.guild_id == DEFAULT_GUILD_ID).first()
+        if unassigned and guild != DEFAULT_GUILD_ID:
+            for model in (Category, Task):
+                session.query(model).filter(model.guild_id == DEFAULT_GUILD_ID).update(
+                    {model.guild_id: guild}, synchronize_session=False
+                )
+            # Devredilen ayarlar sunucuda önceden yazılmış olanların yerini alır
+            session.query(Setting).filter(
+                Setting.guild_id == guild,
+                Setting.key.in_(session.query(Setting.key).filter(Setting.guild_id == DEFAULT_GUILD_ID))
+            ).delete(synchronize_session=False)
+            session.query(Setting).filter(Setting.guild_id == DEFAULT_GUILD_ID).update(
+                {Setting.guild_id: guild}, synchronize_session=False
+            )
+            session.commit()
+            _invalidate_settings()
+            print(f"📦 Atanmamış veri {guild} sunucusuna devredildi.")
+            return "adopted"
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Sunucu hazırlama hatası ({guild}): {e}")
+        return "existing"
+    finally:
+        session.close()
+    
+    seed_database(guild)
+    return "seeded"
 
-def get_setting(key: str, default: str = "") -> str:
-    """Ayar değerini al."""
+
+def reset_guild_data(guild_id: Union[int, str, None] = None) -> None:
+    """
+    Sunucunun kategorilerini (görevler ve durumlar ON DELETE CASCADE ile gider),
+    karakterlerini ve ayarlarını sil, varsayılan veriyi yeniden ekle.
+    Diğer sunuculara dokunmaz.
+    """
     if not SessionLocal:
-        return default
+        return
+    
+    guild = current_guild() if guild_id is None else guild_key(guild_id)
     
     session = SessionLocal()
     try:
-        setting = session.query(Setting).filter_by(key=key).first()
-        return setting.value if setting else default
-    except:
-        return default
+        session.query(Category).filter(Category.guild_id == guild).delete(synchronize_session=False)
+        session.query(Character).filter(Character.guild_id == guild).delete(synchronize_session=False)
+        session.query(Setting).filter(Setting.guild_id == guild).delete(synchronize_session=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
     finally:
         session.close()
+        _invalidate_settings(guild)
+    
+    seed_database(guild)
+
+
+# =============================================================================
+# Guild Scope
+# =============================================================================
+
+def guild_key(guild_id: Union[int, str, None]) -> str:
+    """Discord sunucu kimliğinin saklanan biçimi (None -> atanmamış)."""
+    return DEFAULT_GUILD_ID if guild_id is None else str(guild_id)
+
+
+def current_guild() -> str:
+    """Aktif sunucu; kapsam verilmemişse atanmamış veri."""
+    return _current_guild.get()
+
+
+def set_current_guild(guild_id: Union[int, str, None]) -> Token:
+    """
+    Aktif sunucuyu bu context için ayarla (ör. komut başında).
+    Her gateway olayı kendi asyncio task'ında çalıştığı için olayın sonunda
+    kendiliğinden düşer; uzun ömürlü kodda guild_scope() kullanın.
+    """
+    return _current_guild.set(guild_key(guild_id))
+
+
+@contextmanager
+def guild_scope(guild_id: Union[int, str, None]):
+    """
+    Blok içindeki kategori / görev / ayar operasyonlarını tek sunucuya daralt.
+    Async katman context'i DB thread'ine kopyaladığı için await db.* çağrıları
+    da aynı sunucuyu görür.
+    
+        with guild_scope(guild.id):
+            tasks = get_all_tasks_with_status()
+    """
+    token = _current_guild.set(guild_key(guild_id))
+    try:
+        yield
+    finally:
+        _current_guild.reset(token)
+
+
+# =============================================================================
+# Settings Helpers
+# =============================================================================
+
+SETTINGS_CACHE_TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "60"))
+
+
+class SettingsCache:
+    """
+    Ayarlar için süreç-içi, sunucu başına TTL önbelleği.
+    Bir sunucunun ayarları küçük olduğu için ıskalamada tamamı tek sorguyla
+    yüklenir; TTL dolana kadar her okuma iki dict araması maliyetindedir.
+    Sunucular birbirinden bağımsız yüklenir ve geçersiz kılınır.
+    set_setting() önbelleği yazım commit edilince geçersiz kılar (birim-iş
+    içindeyse birim bitince, bkz. _invalidate_settings). Yükleme sürerken
+    geçersiz kılma olduysa yüklenen (eski olabilecek) değerler önbelleğe
+    alınmaz. Başka bir süreçte
+    (ör. dashboard) yapılan değişiklikler en geç TTL sonunda görülür.
+    Yükleme başarısız olursa (veritabanı kesintisi) süresi dolmuş değerler
+    kullanılmaya devam eder.
+    """
+    
+    def __init__(self, ttl_seconds: float = SETTINGS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._values: Dict[str, Dict[str, str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, default: str = "", guild_id: Optional[str] = None) -> str:
+        guild = current_guild() if guild_id is None else guild_id
+        with self._lock:
+            values = self._values.get(guild)
+            fresh = values is not None and time.monotonic() - self._loaded_at.get(guild, 0.0) < self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            return values.get(key, default)
+        
+        loaded = self._load(guild)
+        if loaded is not None:
+            values = loaded
+        if values is None:
+            return default
+        return values.get(key, default)
+    
+    def values(self, guild_id: str) -> Optional[Dict[str, str]]:
+        """Sunucunun önbellekteki ayarları (yerel kopya için); yoksa None."""
+        values = self._values.get(guild_id)
+        return dict(values) if values is not None else None
+    
+    def seed(self, guild_id: str, values: Dict[str, str]) -> None:
+        """Soğuk başlangıç: yerel kopyadaki ayarlar, süresi dolmuş olarak (ilk okuma DB'yi dener)."""
+        with self._lock:
+            self._values.setdefault(guild_id, dict(values))
+            self._loaded_at.setdefault(guild_id, float("-inf"))
+    
+    def invalidate(self, guild_id: Optional[str] = None) -> None:
+        """Sunucunun (verilmezse tüm sunucuların) ayarlarını düşür."""
+        with self._lock:
+            self._generation += 1
+            if guild_id is None:
+                self._values.clear()
+                self._loaded_at.clear()
+            else:
+                self._values.pop(guild_id, None)
+                self._loaded_at.pop(guild_id, None)
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses, guilds = self.hits, self.misses, len(self._values)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total) if total else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+            "guilds": guilds,
+        }
+    
+    def _load(self, guild: str) -> Optional[Dict[str, str]]:
+        """Sunucunun tüm ayarlarını yükle; hata olursa None (önbelleğe alınmaz)."""
+        if not SessionLocal:
+            return None
+        
+        with self._lock:
+            generation = self._generation
+        
+        session = get_db_session()
+        try:
+            values = {
+                s.key: s.value
+                for s in session.query(Setting).filter(Setting.guild_id == guild).all()
+            }
+        except Exception:
+            return None
+        finally:
+            session.close()
+        
+        with self._lock:
+            # Okuma sırasında yazılan ayar: eski olabilecek değerler önbelleğe alınmaz
+            if generation == self._generation:
+                self._values[guild] = values
+                self._loaded_at[guild] = time.monotonic()
+        return values
+
+
+settings_cache = SettingsCache()
+
+
+def _invalidate_settings(guild_id: Optional[str] = None) -> None:
+    """
+    Ayar önbelleğini geçersiz kıl. Birim-iş içindeysek dış transaction bitince
+    (bkz. after_unit_of_work): daha önce kılınırsa eşzamanlı bir okuma eski
+    değeri commit'ten önce yeniden önbelleğe alıp TTL boyunca sunabilir.
+    """
+    after_unit_of_work(lambda: settings_cache.invalidate(guild_id))
+
+
+def get_setting(key: str, default: str = "") -> str:
+    """Aktif sunucunun ayar değerini al (önbellekten)."""
+    return settings_cache.get(key, default)
+
+
+def get_int_setting(key: str, default: int) -> int:
+    """Tam sayı ayar değerini al; geçersizse varsayılan döner."""
+    try:
+        return int(settings_cache.get(key, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_bool_setting(key: str, default: bool = False) -> bool:
+    """Boolean ayar değerini al ("true"/"false")."""
+    return settings_cache.get(key, "true" if default else "false").lower() == "true"
 
 
 def set_setting(key: str, value: str) -> None:
-    """Ayar değerini kaydet."""
+    """Aktif sunucunun ayar değerini kaydet."""
     if not SessionLocal:
         return
     
-    session = SessionLocal()
+    guild = current_guild()
+    
+    session = get_db_session()
     try:
-        setting = session.query(Setting).filter_by(key=key).first()
+        setting = session.query(Setting).filter_by(guild_id=guild, key=key).first()
         if setting:
             setting.value = value
         else:
-            setting = Setting(key=key, value=value)
+            setting = Setting(guild_id=guild, key=key, value=value)
             session.add(setting)
         session.commit()
     except Exception as e:
@@ -284,21 +768,164 @@ def set_setting(key: str, value: str) -> None:
         print(f"Ayar kaydetme hatası: {e}")
     finally:
         session.close()
+        _invalidate_settings(guild)
 
 
 def is_bot_active() -> bool:
-    """Bot aktif mi?"""
-    return get_setting("bot_active", "true").lower() == "true"
+    """Bot bu sunucuda aktif mi?"""
+    return get_bool_setting("bot_active", True)
 
 
 def set_bot_active(active: bool) -> None:
-    """Bot durumunu ayarla."""
+    """Bot durumunu ayarla (aktif sunucu için)."""
     set_setting("bot_active", "true" if active else "false")
 
 
+def is_character_mode() -> bool:
+    """Sunucu bildirimleri karakter başına mı gönderiyor? (varsayılan: ortak bildirim)"""
+    return get_bool_setting("character_notifications", False)
+
+
+def set_character_mode(enabled: bool) -> None:
+    """Karakter başına bildirim modunu ayarla (aktif sunucu için)."""
+    set_setting("character_notifications", "true" if enabled else "false")
+
+
 def get_db_session():
-    """Veritabanı oturumu al."""
+    """
+    Veritabanı oturumu al.
+    Bir unit_of_work() içindeysek o döngünün paylaşılan oturumu, bu operasyonun
+    SAVEPOINT'iyle döner (bkz. _UnitOfWorkOperation).
+    """
     if not SessionLocal:
         return None
+    
+    shared = _current_unit_of_work.get()
+    if shared is not None:
+        return shared.operation()
+    
     return SessionLocal()
 
+
+# =============================================================================
+# Unit of Work
+# =============================================================================
+
+class _UnitOfWorkSession:
+    """
+    Birim-işin oturumu: döngü boyunca tek bağlantı ve tek transaction.
+    Operasyonlar bunu doğrudan değil, operation() ile kendi SAVEPOINT'leri
+    içinde kullanır; transaction yalnızca finish_unit_of_work() ile biter.
+    """
+    
+    def __init__(self, session):
+        self._session = session
+        self._after: List[Callable[[], None]] = []
+    
+    def operation(self) -> "_UnitOfWorkOperation":
+        return _UnitOfWorkOperation(self._session)
+
+
+class _UnitOfWorkOperation:
+    """
+    Birim-iş içindeki tek operasyonun oturumu - kendi SAVEPOINT'i içinde:
+    commit() -> RELEASE SAVEPOINT (gerçek commit unit_of_work() çıkışında),
+    rollback() -> ROLLBACK TO SAVEPOINT (yalnızca bu operasyonun yazımları),
+    close() -> commit edilmemiş yazımlar geri alınır, bağlantı döngü sonuna kadar tutulur.
+    Böylece hatasını kendisi yakalayıp geri alan bir operasyon döngünün
+    önceki yazımlarını silmez. SAVEPOINT oturum ilk kullanıldığında açılır.
+    """
+    
+    def __init__(self, session):
+        self._session = session
+        self._nested = None
+    
+    def commit(self) -> None:
+        nested, self._nested = self._nested, None
+        if nested is not None and nested.is_active:
+            nested.commit()
+    
+    def rollback(self) -> None:
+        nested, self._nested = self._nested, None
+        if nested is not None and nested.is_active:
+            nested.rollback()
+    
+    def close(self) -> None:
+        self.rollback()
+    
+    def __getattr__(self, name):
+        if self._nested is None:
+            self._nested = self._session.begin_nested()
+        return getattr(self._session, name)
+
+
+def begin_unit_of_work() -> "_UnitOfWorkSession":
+    """Birim-iş oturumunu aç (PostgreSQL'de REPEATABLE READ)."""
+    session = SessionLocal()
+    if engine.dialect.name == "postgresql":
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    return _UnitOfWorkSession(session)
+
+
+def finish_unit_of_work(shared: "_UnitOfWorkSession", commit: bool) -> None:
+    """
+    Birim-işi commit et (commit=False ise geri al), bağlantıyı bırak ve
+    after_unit_of_work() ile bekletilen işleri çalıştır.
+    """
+    session = shared._session
+    try:
+        if commit:
+            session.commit()
+        else:
+            session.rollback()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+        callbacks, shared._after = shared._after, []
+        for callback in callbacks:
+            callback()
+
+
+def after_unit_of_work(callback: Callable[[], None]) -> None:
+    """
+    callback'i aktif birim-iş bittikten sonra çalıştır (commit veya geri alma);
+    birim-iş yoksa hemen. Önbellek geçersiz kılma gibi işler içindir: birim
+    içinde ayrı oturumla commit edilen yazımlar birim geri alınsa da kalır.
+    """
+    shared = _current_unit_of_work.get()
+    if shared is None:
+        callback()
+    else:
+        shared._after.append(callback)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Döngü kapsamlı birim-iş.
+    İçerideki tüm operasyonlar tek bağlantı ve tek transaction paylaşır;
+    PostgreSQL'de REPEATABLE READ ile tutarlı tek bir okuma snapshot'ı alınır.
+    Yazımlar blok sonunda birlikte commit edilir, blok hatayla biterse hepsi
+    geri alınır; tek operasyonun geri alması yalnızca kendi SAVEPOINT'ine döner.
+    İç içe çağrılar dıştaki birime katılır. Transaction açık kaldığı sürece
+    bağlantı tutulur: blok içinde Discord gönderimi gibi uzun beklemeler yapılmaz.
+    
+        with unit_of_work():
+            tasks = get_all_tasks_with_status()
+            mark_pre_notified(task_id)
+    """
+    if not SessionLocal or _current_unit_of_work.get() is not None:
+        yield _current_unit_of_work.get()
+        return
+    
+    shared = begin_unit_of_work()
+    token = _current_unit_of_work.set(shared)
+    ok = False
+    try:
+        yield shared
+        ok = True
+    finally:
+        _current_unit_of_work.reset(token)
+        finish_unit_of_work(shared, ok)
@@ -3,16 +3,63 @@ Database CRUD Operations - SQLAlchemy ORM with PostgreSQL.
 Uses FORCED NAIVE datetime strategy from timers.py.
 """
 
+import os
+import socket
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from functools import lru_cache
+from typing import Optional, List, Dict, Callable, Tuple, Set
+
+from sqlalchemy import (
+    update, bindparam, select, func, or_, and_, not_, case, false, type_coerce,
+    Boolean, DateTime, Integer
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from src.database.models import (
-    SessionLocal, Category, Task, TaskStatus, Setting,
-    get_setting, get_db_session
+    SessionLocal, Category, Task, TaskStatus, CharacterTaskStatus, Setting, TaskEvent, TaskEventDaily, JobRun,
+    EVENT_COMPLETED, EVENT_ENTERED, EVENT_SKIPPED, EVENT_NOTIFIED, EVENT_SNOOZED,
+    get_setting, get_int_setting, get_db_session, current_guild
+)
+from src.database.characters import ensure_character_statuses
+from src.database.messages import message_registry, consume_task_messages
+from src.database.records import TaskRecord
+from src.database.schedule import (
+    READY_STATES, readiness_exprs, refresh_schedules,
+    refresh_rows, schedule_after, reset_boundaries, completed_in_period, status_in_period
 )
+from src.database.sql_time import minutes_after
 from src.utils.time_utils import format_duration
-from src.scheduler.timers import get_current_time_naive, to_naive_datetime
+from src.scheduler.timers import get_current_time_naive
+
+
+# Bu sürecin kimliği - çoklu replikada bildirim kiraları bununla alınır
+REPLICA_ID = (
+    os.getenv("REPLICA_ID")
+    or os.getenv("RAILWAY_REPLICA_ID")
+    or f"{socket.gethostname()}-{os.getpid()}"
+)
 
+# Kira süresi write-behind flush aralığından (varsayılan 5 sn) uzun olmalı:
+# kira bitmeden bildirim kaydı yazılmış olur, diğer replika görevi yeniden seçmez
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "120"))
+
+# Kategori değişikliğinde çağrılır (ör. kanal yönlendirme tablosunu geçersiz kılmak için)
+_category_listeners: List[Callable[[], None]] = []
+
+
+def add_category_listener(callback: Callable[[], None]) -> None:
+    """Kategori eklenince/güncellenince/silinince çağrılacak fonksiyonu kaydet."""
+    _category_listeners.append(callback)
+
+
+def _notify_category_change() -> None:
+    for callback in _category_listeners:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Kategori dinleyici hatası: {e}")
 
 
 # =============================================================================
@@ -20,13 +67,13 @@ from src.scheduler.timers import get_current_time_naive, to_naive_datetime
 # =============================================================================
 
 def get_all_categories(include_inactive: bool = False) -> List[Dict]:
-    """Tüm kategorileri al."""
+    """Aktif sunucunun tüm kategorilerini al."""
     session = get_db_session()
     if not session:
         return []
     
     try:
-        query = session.query(Category)
+        query = session.query(Category).filter(Category.guild_id == current_guild())
         if not include_inactive:
             query = query.filter(Category.is_active == True)
         
@@ -39,6 +86,22 @@ def get_all_categories(include_inactive: bool = False) -> List[Dict]:
         session.close()
 
 
+def get_guild_ids() -> List[str]:
+    """Kategorisi olan sunucular (atanmamış veri '' olarak)."""
+    session = get_db_session()
+    if not session:
+        return []
+    
+    try:
+        rows = session.query(Category.guild_id).distinct().order_by(Category.guild_id).all()
+        return [r.guild_id for r in rows]
+    except Exception as e:
+        print(f"Sunucu listesi hatası: {e}")
+        return []
+    finally:
+        session.close()
+
+
 def get_category_by_id(category_id: int) -> Optional[Dict]:
     """ID ile kategori al."""
     session = get_db_session()
@@ -46,48 +109,53 @@ def get_category_by_id(category_id: int) -> Optional[Dict]:
         return None
     
     try:
-        cat = session.query(Category).filter_by(id=category_id).first()
+        cat = session.query(Category).filter(
+            Category.id == category_id,
+            Category.guild_id == current_guild()
+        ).first()
         return _category_to_dict(cat) if cat else None
     finally:
         session.close()
 
 
 def get_category_by_channel_id(channel_id: str) -> Optional[Dict]:
-    """Discord kanal ID'si ile kategori bul (PostgreSQL)."""
+    """Discord kanal ID'si ile kategori bul."""
     session = get_db_session()
     if not session:
         return None
     
     try:
-        # PostgreSQL string karşılaştırması
+        # String karşılaştırması (kanal ID'leri metin olarak saklanır)
         cat = session.query(Category).filter(
+            Category.guild_id == current_guild(),
             Category.discord_channel_id == channel_id,
             Category.is_active == True
         ).first()
         
         if cat:
-            print(f"✅ PostgreSQL: Kategori bulundu - {cat.name} (kanal: {channel_id})")
+            print(f"✅ DB: Kategori bulundu - {cat.name} (kanal: {channel_id})")
             return _category_to_dict(cat)
         
-        print(f"⚠️ PostgreSQL: Kategori bulunamadı (kanal: {channel_id})")
+        print(f"⚠️ DB: Kategori bulunamadı (kanal: {channel_id})")
         return None
     except Exception as e:
-        print(f"❌ PostgreSQL sorgu hatası: {e}")
+        print(f"❌ DB sorgu hatası: {e}")
         return None
     finally:
         session.close()
 
 
 def add_category(name: str, description: str, reset_type: str) -> int:
-    """Yeni kategori ekle."""
+    """Aktif sunucuya yeni kategori ekle."""
     session = get_db_session()
     if not session:
         return -1
     
     try:
-        cat = Category(name=name, description=description, reset_type=reset_type)
+        cat = Category(guild_id=current_guild(), name=name, description=description, reset_type=reset_type)
         session.add(cat)
         session.commit()
+        _notify_category_change()
         return cat.id
     except Exception as e:
         session.rollback()
@@ -111,7 +179,10 @@ def update_category(
         return False
     
     try:
-        cat = session.query(Category).filter_by(id=category_id).first()
+        cat = session.query(Category).filter(
+            Category.id == category_id,
+            Category.guild_id == current_guild()
+        ).first()
         if not cat:
             return False
         
@@ -122,7 +193,11 @@ def update_category(
         cat.pre_notify_minutes = pre_notify_minutes
         cat.show_resource_reminder = show_resource_reminder
         
+        # Reset tipi / ön bildirim süresi görevlerin zaman çizelgesini değiştirir
+        refresh_schedules(session, category_id=category_id)
+        
         session.commit()
+        _notify_category_change()
         return True
     except Exception as e:
         session.rollback()
@@ -139,10 +214,14 @@ def set_category_channel(category_id: int, channel_id: str) -> bool:
         return False
     
     try:
-        cat = session.query(Category).filter_by(id=category_id).first()
+        cat = session.query(Category).filter(
+            Category.id == category_id,
+            Category.guild_id == current_guild()
+        ).first()
         if cat:
             cat.discord_channel_id = channel_id
             session.commit()
+            _notify_category_change()
             return True
         return False
     except:
@@ -159,10 +238,14 @@ def set_category_active(category_id: int, is_active: bool) -> bool:
         return False
     
     try:
-        cat = session.query(Category).filter_by(id=category_id).first()
+        cat = session.query(Category).filter(
+            Category.id == category_id,
+            Category.guild_id == current_guild()
+        ).first()
         if cat:
             cat.is_active = is_active
             session.commit()
+            _notify_category_change()
             return True
         return False
     except:
@@ -179,10 +262,14 @@ def delete_category(category_id: int) -> bool:
         return False
     
     try:
-        cat = session.query(Category).filter_by(id=category_id).first()
+        cat = session.query(Category).filter(
+            Category.id == category_id,
+            Category.guild_id == current_guild()
+        ).first()
         if cat:
             session.delete(cat)
             session.commit()
+            _notify_category_change()
             return True
         return False
     except:
@@ -198,6 +285,7 @@ def _category_to_dict(cat: Category) -> Dict:
         return {}
     return {
         "id": cat.id,
+        "guild_id": cat.guild_id,
         "name": cat.name,
         "description": cat.description,
         "reset_type": cat.reset_type,
@@ -213,20 +301,129 @@ def _category_to_dict(cat: Category) -> Dict:
 # Task Operations
 # =============================================================================
 
-def get_all_tasks(include_inactive_categories: bool = False) -> List[Dict]:
-    """Tüm görevleri al."""
+_tasks = Task.__table__
+_categories = Category.__table__
+_status = TaskStatus.__table__
+
+
+def _status_or(column, default):
+    """task_status satırı yoksa (LEFT JOIN) varsayılan değer; satır varsa kolon olduğu gibi."""
+    return case((_status.c.task_id.is_(None), default), else_=column)
+
+
+# Günlük/haftalık dönem sınırları - _fetch_records her okumada verir
+_DAILY_RESET = bindparam("daily_reset", type_=DateTime)
+_WEEKLY_RESET = bindparam("weekly_reset", type_=DateTime)
+
+# Okunan is_completed / last_status dönemden türetilir (bkz. schedule.completed_in_period)
+_PERIOD_COMPLETED = type_coerce(
+    completed_in_period(_categories.c.reset_type, _status.c, _DAILY_RESET, _WEEKLY_RESET), Boolean
+)
+_PERIOD_STATUS = status_in_period(_categories.c.reset_type, _status.c, _DAILY_RESET, _WEEKLY_RESET)
+
+
+def _task_select(status_required: bool = False):
+    """
+    Aktif sunucunun görevleri: tasks + categories + task_status tek JOIN, TASK_FIELDS sırasında.
+    status_required=True ise task_status INNER JOIN edilir: filtre durum
+    kolonundaysa planlayıcı aramaya o kolonun indeksinden başlayabilir.
+    ORM nesnesi ve identity map kurulmaz; satırlar doğrudan TaskRecord(*row) olur.
+    is_completed ve last_status günlük/haftalık görevlerde son reset sınırına
+    göre türetilmiş değerlerdir (daily_reset / weekly_reset parametreleri).
+    Sunucu `guild_id` parametresiyle verilir, böylece derlenmiş ifade tüm
+    sunucular için aynı kalır (SQLAlchemy derleme önbelleği; SQLite / psycopg 3
+    tarafında hazırlanmış ifade yeniden kullanımı, bkz. models.py).
+    """
+    return (
+        select(
+            _tasks.c.id,
+            _tasks.c.category_id,
+            _tasks.c.name,
+            _tasks.c.description,
+            _tasks.c.cooldown_minutes,
+            _tasks.c.active_duration_minutes,
+            _tasks.c.is_active,
+            _tasks.c.created_at,
+            _categories.c.name,
+            _categories.c.reset_type,
+            _categories.c.discord_channel_id,
+            _categories.c.pre_notify_minutes,
+            _categories.c.show_resource_reminder,
+            _PERIOD_COMPLETED,
+            _status.c.last_completed_at,
+            _status.c.instance_entered_at,
+            _status.c.notification_message_id,
+            _status.c.last_notified_at,
+            _PERIOD_STATUS,
+            _status_or(_status.c.pre_notified, false()),
+            _status.c.next_available_at,
+            _status.c.closes_at,
+            _status.c.pre_notify_at,
+        )
+        .select_from(
+            _tasks
+            .join(_categories, _categories.c.id == _tasks.c.category_id)
+            .join(_status, _status.c.task_id == _tasks.c.id, isouter=not status_required)
+        )
+        .where(_tasks.c.guild_id == bindparam("guild_id"))
+    )
+
+
+# Sabit ifadeler modül yüklenirken bir kez kurulur
+_TASK_SELECT = _task_select()
+_TASK_BY_ID = _TASK_SELECT.where(_tasks.c.id == bindparam("task_id"))
+_TASK_BY_MESSAGE = _task_select(status_required=True).where(_status.c.notification_message_id == bindparam("message_id")).limit(1)
+_TASKS_BY_CATEGORY = _TASK_SELECT.where(
+    _tasks.c.category_id == bindparam("category_id"),
+    _tasks.c.is_active == True
+).order_by(_tasks.c.name)
+
+
+@lru_cache(maxsize=None)
+def _snapshot_select(include_inactive_categories: bool, by_next_available: bool):
+    stmt = _TASK_SELECT.where(_tasks.c.is_active == True)
+    
+    if not include_inactive_categories:
+        stmt = stmt.where(_categories.c.is_active == True)
+    
+    if by_next_available:
+        return stmt.order_by(_status.c.next_available_at.asc().nullsfirst(), _categories.c.id, _tasks.c.name)
+    return stmt.order_by(_categories.c.id, _tasks.c.name)
+
+
+def _fetch_records(session, stmt, now: Optional[datetime] = None, **params) -> List[TaskRecord]:
+    """
+    Core SELECT'i oturumun bağlantısında çalıştır (unit_of_work içindeyse aynı
+    transaction) ve satırları TaskRecord'a aç. DateTime kolonları naive döner.
+    Günlük/haftalık dönem `now` anına göre (verilmezse şu an) belirlenir.
+    """
+    daily_reset, weekly_reset = reset_boundaries(now or get_current_time_naive())  # FORCED NAIVE
+    rows = session.connection().execute(stmt, {
+        "guild_id": current_guild(),
+        "daily_reset": daily_reset,
+        "weekly_reset": weekly_reset,
+        **params
+    })
+    return [TaskRecord(*row) for row in rows]
+
+
+def get_task_snapshot(
+    include_inactive_categories: bool = False,
+    by_next_available: bool = False,
+    now: Optional[datetime] = None
+) -> List[TaskRecord]:
+    """
+    Aktif görevlerin anlık görüntüsü - görev sayısından bağımsız olarak tek sorgu.
+    Tüm get_*_with_status fonksiyonları bu yükleyiciyi kullanır.
+    by_next_available=True ise saklanan next_available_at'e göre (hazır olanlar
+    önce) sıralanır. Günlük/haftalık tamamlanma `now` anına göre türetilir.
+    """
     session = get_db_session()
     if not session:
         return []
     
     try:
-        query = session.query(Task).join(Category).filter(Task.is_active == True)
-        
-        if not include_inactive_categories:
-            query = query.filter(Category.is_active == True)
-        
-        tasks = query.order_by(Category.id, Task.name).all()
-        return [_task_to_dict(t) for t in tasks]
+        return _fetch_records(session, _snapshot_select(include_inactive_categories, by_next_available), now=now)
     except Exception as e:
         print(f"Görev listesi hatası: {e}")
         return []
@@ -234,31 +431,32 @@ def get_all_tasks(include_inactive_categories: bool = False) -> List[Dict]:
         session.close()
 
 
-def get_tasks_by_category(category_id: int) -> List[Dict]:
+def get_all_tasks(include_inactive_categories: bool = False) -> List[TaskRecord]:
+    """Tüm görevleri al."""
+    return get_task_snapshot(include_inactive_categories)
+
+
+def get_tasks_by_category(category_id: int) -> List[TaskRecord]:
     """Kategorideki görevleri al."""
     session = get_db_session()
     if not session:
         return []
     
     try:
-        tasks = session.query(Task).filter_by(
-            category_id=category_id, 
-            is_active=True
-        ).order_by(Task.name).all()
-        return [_task_to_dict(t) for t in tasks]
+        return _fetch_records(session, _TASKS_BY_CATEGORY, category_id=category_id)
     finally:
         session.close()
 
 
-def get_task_by_id(task_id: int) -> Optional[Dict]:
+def get_task_by_id(task_id: int) -> Optional[TaskRecord]:
     """ID ile görev al."""
     session = get_db_session()
     if not session:
         return None
     
     try:
-        task = session.query(Task).filter_by(id=task_id).first()
-        return _task_to_dict(task) if task else None
+        records = _fetch_records(session, _TASK_BY_ID, task_id=task_id)
+        return records[0] if records else None
     finally:
         session.close()
 
@@ -278,6 +476,8 @@ def add_task(
     try:
         task = Task(
             category_id=category_id,
+            # Görev kategorisinin sunucusunda yaşar
+            guild_id=select(Category.guild_id).where(Category.id == category_id).scalar_subquery(),
             name=name,
             description=description,
             cooldown_minutes=cooldown_minutes,
@@ -290,6 +490,9 @@ def add_task(
         status = TaskStatus(task_id=task.id, last_status="initialized")
         session.add(status)
         
+        # Sunucudaki her karakter için karakter durumu
+        ensure_character_statuses(session, task_id=task.id)
+        
         session.commit()
         return task.id
     except Exception as e:
@@ -312,7 +515,7 @@ def update_task(
         return False
     
     try:
-        task = session.query(Task).filter_by(id=task_id).first()
+        task = session.query(Task).filter(Task.id == task_id, Task.guild_id == current_guild()).first()
         if not task:
             return False
         
@@ -321,6 +524,8 @@ def update_task(
         task.cooldown_minutes = cooldown_minutes
         task.active_duration_minutes = active_duration_minutes
         
+        refresh_schedules(session, [task_id])
+        
         session.commit()
         return True
     except:
@@ -342,7 +547,7 @@ def hard_delete_task(task_id: int) -> bool:
         return False
     
     try:
-        task = session.query(Task).filter_by(id=task_id).first()
+        task = session.query(Task).filter(Task.id == task_id, Task.guild_id == current_guild()).first()
         if task:
             session.delete(task)
             session.commit()
@@ -355,276 +560,690 @@ def hard_delete_task(task_id: int) -> bool:
         session.close()
 
 
-def _task_to_dict(task: Task) -> Dict:
-    """Task objesini dict'e çevir."""
-    if not task:
-        return {}
-    
-    cat = task.category
-    status = task.status
-    
-    result = {
-        "id": task.id,
-        "category_id": task.category_id,
-        "name": task.name,
-        "description": task.description,
-        "cooldown_minutes": task.cooldown_minutes,
-        "active_duration_minutes": task.active_duration_minutes,
-        "is_active": task.is_active,
-        "created_at": task.created_at.isoformat() if task.created_at else None,
-        # Category info
-        "category_name": cat.name if cat else "Bilinmeyen",
-        "reset_type": cat.reset_type if cat else "unknown",
-        "discord_channel_id": cat.discord_channel_id if cat else None,
-        "pre_notify_minutes": cat.pre_notify_minutes if cat else 0,
-        "show_resource_reminder": cat.show_resource_reminder if cat else False,
+# =============================================================================
+# Status Operations
+# =============================================================================
+
+def completed_values(current: datetime) -> Dict:
+    """✅ geçişinin task_status değerleri (kesinti modunda yerel kopyaya da uygulanır)."""
+    return {
+        "is_completed": True,
+        "last_completed_at": current,
+        "last_status": "completed",
+        "pre_notified": False,
     }
-    
-    # Status info
-    if status:
-        result.update({
-            "is_completed": status.is_completed,
-            "last_completed_at": status.last_completed_at.isoformat() if status.last_completed_at else None,
-            "instance_entered_at": status.instance_entered_at.isoformat() if status.instance_entered_at else None,
-            "notification_message_id": status.notification_message_id,
-            "last_notified_at": status.last_notified_at.isoformat() if status.last_notified_at else None,
-            "last_status": status.last_status,
-            "pre_notified": status.pre_notified,
-        })
+
+
+def entered_values(current: datetime) -> Dict:
+    """Instance girişinin task_status değerleri (bkz. completed_values)."""
+    return {
+        "instance_entered_at": current,
+        "last_completed_at": current,
+        "last_status": "entered",
+        "pre_notified": False,
+    }
+
+
+def mark_task_completed(
+    task_id: int,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Görevi tamamlandı olarak işaretle - tek koşullu UPDATE (bkz. _transition).
+    message_id verilirse yalnızca görev hâlâ o bildirimdeyse geçer; geçiş
+    olmadıysa (ör. aynı mesaja ikinci ✅) False döner. `now` verilirse
+    (kesinti günlüğünün yeniden oynatılması) tamamlanma o ana yazılır.
+    """
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    return _transition_task(task_id, completed_values(current), EVENT_COMPLETED, current, message_id, task)
+
+
+def mark_instance_entered(
+    task_id: int,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None,
+    now: Optional[datetime] = None
+) -> bool:
+    """Instance'a girildi olarak işaretle - tek koşullu UPDATE (bkz. mark_task_completed)."""
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    return _transition_task(task_id, entered_values(current), EVENT_ENTERED, current, message_id, task)
+
+
+def snooze_notification(task_id: int, message_id: str, now: Optional[datetime] = None) -> bool:
+    """
+    ⏰ - bildirimi tüketir (durum değişmez, mesaj silinir ve tekrar bildirimi
+    reaksiyon işleyicisi zamanlar). Aynı mesaja ikinci ⏰ False alır.
+    """
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    return _transition_task(task_id, {}, EVENT_SNOOZED, current, message_id)
+
+
+def mark_character_task_completed(
+    character_id: int,
+    task_id: int,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None
+) -> bool:
+    """Görevi karakter için tamamlandı olarak işaretle (bkz. mark_task_completed)."""
+    return _mark_character(character_id, task_id, EVENT_COMPLETED, message_id, task)
+
+
+def mark_character_instance_entered(
+    character_id: int,
+    task_id: int,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None
+) -> bool:
+    """Instance'a karakter için girildi olarak işaretle (bkz. mark_task_completed)."""
+    return _mark_character(character_id, task_id, EVENT_ENTERED, message_id, task)
+
+
+def _mark_character(
+    character_id: int,
+    task_id: int,
+    event_type: str,
+    message_id: Optional[str],
+    task: Optional[TaskRecord]
+) -> bool:
+    current = get_current_time_naive()  # FORCED NAIVE
+    values = {
+        "last_completed_at": current,
+        "pre_notified": False,
+        # Tekrar hazır olduğunda bildirim beklemeden gönderilsin
+        "last_notified_at": None,
+        "notification_message_id": None,
+    }
+    if event_type == EVENT_ENTERED:
+        values["instance_entered_at"] = current
     else:
-        result.update({
-            "is_completed": False,
-            "last_completed_at": None,
-            "instance_entered_at": None,
-            "notification_message_id": None,
-            "last_notified_at": None,
-            "last_status": "initialized",
-            "pre_notified": False,
-        })
+        values["is_completed"] = True
     
-    return result
+    conditions = [CharacterTaskStatus.character_id == character_id, CharacterTaskStatus.task_id == task_id]
+    return _apply_transition(
+        CharacterTaskStatus, conditions, values, (task_id, event_type), current, message_id, task
+    )
 
 
-# =============================================================================
-# Status Operations
-# =============================================================================
+def _transition_task(
+    task_id: int,
+    values: Dict,
+    event_type: Optional[str],
+    current: datetime,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None
+) -> bool:
+    event = (task_id, event_type) if event_type else None
+    return _apply_transition(
+        TaskStatus, [TaskStatus.task_id == task_id], values, event, current, message_id, task,
+        message_task_id=task_id
+    )
 
-def mark_task_completed(task_id: int) -> bool:
-    """Görevi tamamlandı olarak işaretle."""
+
+def _apply_transition(
+    model,
+    conditions: list,
+    values: Dict,
+    event: Optional[Tuple[int, str]],
+    current: datetime,
+    message_id: Optional[str] = None,
+    task: Optional[TaskRecord] = None,
+    message_task_id: Optional[int] = None
+) -> bool:
+    """
+    Koşullu durum geçişi - tek UPDATE ... WHERE <beklenen durum> RETURNING id.
+    
+    message_id verilirse satır hâlâ o bildirimi taşımalıdır ve bildirim
+    tüketilir (notification_message_id boşaltılır): aynı mesaja ikinci
+    reaksiyon ya da aynı olayı işleyen ikinci replika satır bulamaz ve
+    False alır; reaksiyon işleyicileri yalnızca True'da onay gönderir.
+    
+    message_task_id verilirse (görev durumu geçişleri) görevin kayıtlı açık
+    mesajları önce tüketilir: mesaj aralarındaysa (eski bildirim, yeniden
+    gönderim, ön bildirim) satırdaki son mesaj kimliği aranmaz. Açık mesaj
+    yoksa ilk koşul geçerlidir; geçiş olmazsa tüketim geri alınır.
+    
+    Zaman çizelgesi girdileri değişiyorsa yeni çizelge `task` kaydından
+    hesaplanıp aynı UPDATE'te yazılır (bkz. schedule.schedule_after); kayıt
+    yoksa satır geçişten sonra yenilenir. Olay aynı transaction'da yazılır.
+    `model` TaskStatus ya da CharacterTaskStatus'tur.
+    """
+    table = model.__table__
+    values = dict(values)
+    guarded = conditions
+    if message_id is not None:
+        guarded = [*conditions, table.c.notification_message_id == message_id]
+        values["notification_message_id"] = None
+    
+    reschedule = bool(SCHEDULE_INPUT_COLUMNS.intersection(values))
+    if reschedule and task is not None:
+        schedule = schedule_after(task, values, current)
+        if schedule is not None:
+            values.update(schedule)
+            reschedule = False
+    
     session = get_db_session()
     if not session:
         return False
     
     try:
-        status = session.query(TaskStatus).filter_by(task_id=task_id).first()
-        if status:
-            status.is_completed = True
-            status.last_completed_at = get_current_time_naive()  # FORCED NAIVE
-            status.last_status = "completed"
-            status.pre_notified = False
-            session.commit()
-            return True
-        return False
-    except:
+        consumed = []
+        if message_id is not None and message_task_id is not None:
+            consumed = consume_task_messages(session, message_task_id)
+        where = conditions if str(message_id) in consumed else guarded
+        
+        row_id = session.execute(
+            table.update().where(*where).values(values).returning(table.c.id)
+        ).scalar()
+        if row_id is None:
+            session.rollback()
+            if message_id is not None:
+                message_registry.discard([message_id])
+            return False
+        
+        if reschedule:
+            refresh_rows(session, model, [row_id], now=current)
+        if event:
+            _record_events(session, [(*event, current)])
+        session.commit()
+        if consumed:
+            message_registry.discard_task(message_task_id)
+        return True
+    except Exception as e:
         session.rollback()
+        print(f"Durum geçişi hatası: {e}")
         return False
     finally:
         session.close()
 
 
-def mark_instance_entered(task_id: int) -> bool:
-    """Instance'a girildi olarak işaretle."""
+def reset_daily_tasks() -> int:
+    """Günlük görevleri elle sıfırla (dashboard)."""
+    return reset_tasks_by_type("daily")
+
+
+def reset_weekly_tasks() -> int:
+    """Haftalık görevleri elle sıfırla (dashboard)."""
+    return reset_tasks_by_type("weekly")
+
+
+def count_tasks_by_type(reset_type: str) -> int:
+    """
+    Aktif sunucuda reset tipindeki aktif görev sayısı (reset duyurusu için).
+    Günlük/haftalık tamamlanma okunurken türetildiğinden reset anında
+    yazılacak bir şey yoktur (bkz. schedule.completed_in_period).
+    """
     session = get_db_session()
     if not session:
-        return False
+        return 0
     
     try:
-        status = session.query(TaskStatus).filter_by(task_id=task_id).first()
-        if status:
-            current = get_current_time_naive()  # FORCED NAIVE
-            status.instance_entered_at = current
-            status.last_completed_at = current
-            status.last_status = "entered"
-            status.pre_notified = False
-            session.commit()
-            return True
-        return False
+        return session.execute(
+            select(func.count(Task.id))
+            .join(Category, Category.id == Task.category_id)
+            .where(
+                Task.guild_id == current_guild(),
+                Category.reset_type == reset_type,
+                Task.is_active == True,
+                Category.is_active == True
+            )
+        ).scalar() or 0
+    except Exception as e:
+        print(f"Görev sayımı hatası ({reset_type}): {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def update_notification_sent(task_id: int, message_id: str, status_text: str) -> bool:
+    """Bildirim gönderildi olarak güncelle (tek UPDATE)."""
+    ok = apply_status_updates([notification_sent_update(task_id, message_id, status_text)]) > 0
+    
+    if ok:
+        print(f"✅ NOTIFICATION UPDATE SUCCESS: task {task_id} (message_id={message_id})")
+    else:
+        print(f"❌ NOTIFICATION UPDATE FAILED: task {task_id}, message_id={message_id}, status={status_text}")
+    return ok
+
+
+def mark_pre_notified(task_id: int) -> bool:
+    """Ön bildirim gönderildi olarak işaretle (tek UPDATE)."""
+    return apply_status_updates([pre_notified_update(task_id)]) > 0
+
+
+def update_task_last_status(
+    task_id: int,
+    status_text: str,
+    message_id: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Görev durumunu güncelle (tek UPDATE). message_id verilirse koşullu geçiştir
+    (bkz. mark_task_completed): ❌ aynı mesaja ikinci kez False alır.
+    """
+    if message_id is None:
+        return apply_status_updates([{"task_id": task_id, "last_status": status_text}]) > 0
+    
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    return _transition_task(
+        task_id, {"last_status": status_text}, _STATUS_EVENTS.get(status_text), current, message_id
+    )
+
+
+def get_task_by_message_id(message_id: str) -> Optional[TaskRecord]:
+    """Mesaj ID'si ile görevi bul."""
+    session = get_db_session()
+    if not session:
+        return None
+    
+    try:
+        records = _fetch_records(session, _TASK_BY_MESSAGE, message_id=message_id)
+        return records[0] if records else None
+    finally:
+        session.close()
+
+
+_STALE_SELECT = _task_select(status_required=True).where(
+    _status.c.last_notified_at < bindparam("cutoff"),
+    _status.c.last_status == "notified",
+    # Önceki dönemden kalan günlük/haftalık bildirim yenilenmez, yeni dönemde yeniden gönderilir
+    _PERIOD_STATUS == "notified",
+    _status.c.notification_message_id.isnot(None),
+    _tasks.c.is_active == True,
+    _categories.c.is_active == True
+).order_by(_status.c.last_notified_at)
+_STALE_SELECT_LIMITED = _STALE_SELECT.limit(bindparam("limit", type_=Integer))
+
+
+def get_stale_notifications(stale_minutes: int = 60, limit: Optional[int] = None) -> List[TaskRecord]:
+    """Eski bildirimleri al (en eskiler önce, en fazla `limit` tane) - FORCED NAIVE."""
+    session = get_db_session()
+    if not session:
+        return []
+    
+    try:
+        cutoff = get_current_time_naive() - timedelta(minutes=stale_minutes)  # FORCED NAIVE
+        
+        if limit is None:
+            return _fetch_records(session, _STALE_SELECT, cutoff=cutoff)
+        return _fetch_records(session, _STALE_SELECT_LIMITED, cutoff=cutoff, limit=max(limit, 0))
     except:
-        session.rollback()
-        return False
+        return []
     finally:
         session.close()
 
 
-def reset_daily_tasks() -> int:
-    """Günlük görevleri sıfırla."""
+# =============================================================================
+# Bulk Status Mutations
+# =============================================================================
+
+# apply_status_updates() ile güncellenebilen task_status kolonları
+STATUS_UPDATE_COLUMNS = {
+    "is_completed", "last_completed_at", "instance_entered_at",
+    "notification_message_id", "last_notified_at", "last_status", "pre_notified",
+}
+
+# Bu kolonlardan biri değişirse zaman çizelgesi yeniden hesaplanır
+SCHEDULE_INPUT_COLUMNS = {"is_completed", "last_completed_at", "instance_entered_at"}
+
+
+def notification_sent_update(
+    task_id: int,
+    message_id: str,
+    status_text: str = "notified",
+    notified_at: Optional[datetime] = None
+) -> Dict:
+    """Bildirim gönderimi için apply_status_updates() kaydı."""
+    return {
+        "task_id": task_id,
+        "notification_message_id": message_id,
+        "last_notified_at": notified_at or get_current_time_naive(),  # FORCED NAIVE
+        "last_status": status_text,
+    }
+
+
+def pre_notified_update(task_id: int) -> Dict:
+    """Ön bildirim için apply_status_updates() kaydı."""
+    return {"task_id": task_id, "pre_notified": True}
+
+
+def reset_tasks_by_type(reset_type: str) -> int:
+    """
+    Aktif sunucuda reset tipindeki aktif görevleri tek UPDATE ... FROM ile elle
+    sıfırla; görevlerin karakter satırları da ikinci bir UPDATE ile sıfırlanır.
+    Günlük/haftalık reset zamanı gelince bu çağrılmaz (tamamlanma son reset
+    sınırından türetilir); burada last_completed_at da boşaltılır ki türetilen
+    durum da sıfırlansın. Etkilenen task_status satırı sayısını döndürür.
+    """
     session = get_db_session()
     if not session:
         return 0
     
     try:
-        count = 0
-        tasks = session.query(Task).join(Category).filter(
-            Category.reset_type == "daily",
-            Task.is_active == True,
-            Category.is_active == True
-        ).all()
-        
-        for task in tasks:
-            if task.status:
-                task.status.is_completed = False
-                task.status.last_status = "reset"
-                task.status.pre_notified = False
-                count += 1
+        stmt = (
+            update(TaskStatus)
+            .where(
+                TaskStatus.task_id == Task.id,
+                Task.category_id == Category.id,
+                Task.guild_id == current_guild(),
+                Category.reset_type == reset_type,
+                Task.is_active == True,
+                Category.is_active == True
+            )
+            .values(
+                is_completed=False, last_completed_at=None, last_status="reset", pre_notified=False,
+                # Tamamlanmamış günlük/haftalık görevin bekleyeceği zaman yok
+                next_available_at=None, closes_at=None, pre_notify_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = session.execute(stmt)
         
+        session.execute(
+            update(CharacterTaskStatus)
+            .where(
+                CharacterTaskStatus.task_id == Task.id,
+                Task.category_id == Category.id,
+                Task.guild_id == current_guild(),
+                Category.reset_type == reset_type,
+                Task.is_active == True,
+                Category.is_active == True
+            )
+            .values(
+                is_completed=False, last_completed_at=None, pre_notified=False, last_notified_at=None,
+                next_available_at=None, closes_at=None, pre_notify_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
         session.commit()
-        return count
-    except:
+        return result.rowcount
+    except Exception as e:
         session.rollback()
+        print(f"Toplu reset hatası ({reset_type}): {e}")
         return 0
     finally:
         session.close()
 
 
-def reset_weekly_tasks() -> int:
-    """Haftalık görevleri sıfırla."""
+def apply_status_updates(updates: List[Dict], raise_errors: bool = False) -> int:
+    """
+    Görev başına task_status güncellemelerini toplu uygula.
+    Her kayıt {"task_id": ..., <kolon>: <değer>, ...} biçimindedir; aynı kolon
+    kümesine sahip kayıtlar tek bir executemany UPDATE ile gönderilir.
+    Güncellenen satır sayısını döndürür (sürücü toplu rowcount vermiyorsa gönderilen kayıt sayısı).
+    raise_errors=True ise veritabanı hatası 0 yerine istisna olarak yükselir.
+    "notified" / "skipped" durumları aynı transaction'da olay günlüğüne de yazılır.
+    """
+    current = get_current_time_naive()  # FORCED NAIVE
+    events: List[Tuple[int, str, datetime]] = []
+    groups: Dict[tuple, List[Dict]] = {}
+    reschedule: Set[int] = set()
+    for item in updates:
+        columns = tuple(sorted(k for k in item if k != "task_id"))
+        unknown = set(columns) - STATUS_UPDATE_COLUMNS
+        if unknown:
+            raise ValueError(f"Bilinmeyen task_status kolonları: {sorted(unknown)}")
+        if not columns:
+            continue
+        params = {f"b_{k}": v for k, v in item.items()}
+        groups.setdefault(columns, []).append(params)
+        
+        if SCHEDULE_INPUT_COLUMNS.intersection(columns):
+            reschedule.add(item["task_id"])
+        
+        event_type = _STATUS_EVENTS.get(item.get("last_status"))
+        if event_type:
+            events.append((item["task_id"], event_type, item.get("last_notified_at") or current))
+    
+    if not groups:
+        return 0
+    
     session = get_db_session()
     if not session:
         return 0
     
+    table = TaskStatus.__table__
+    
     try:
         count = 0
-        tasks = session.query(Task).join(Category).filter(
-            Category.reset_type == "weekly",
-            Task.is_active == True,
-            Category.is_active == True
-        ).all()
-        
-        for task in tasks:
-            if task.status:
-                task.status.is_completed = False
-                task.status.last_status = "reset"
-                task.status.pre_notified = False
-                count += 1
+        for columns, params in groups.items():
+            stmt = (
+                table.update()
+                .where(table.c.task_id == bindparam("b_task_id"))
+                .values({c: bindparam(f"b_{c}") for c in columns})
+            )
+            if len(params) == 1:
+                count += session.execute(stmt, params[0]).rowcount
+            else:
+                result = session.execute(stmt, params)
+                sane = session.get_bind().dialect.supports_sane_multi_rowcount
+                count += result.rowcount if sane else len(params)
         
+        if reschedule:
+            refresh_schedules(session, reschedule, now=current, characters=False)
+        _record_events(session, events)
         session.commit()
         return count
-    except:
+    except Exception as e:
         session.rollback()
+        print(f"Toplu durum güncelleme hatası: {e}")
+        if raise_errors:
+            raise
         return 0
     finally:
         session.close()
 
 
-def update_notification_sent(task_id: int, message_id: str, status_text: str) -> bool:
-    """Bildirim gönderildi olarak güncelle - DEBUG LOGGING."""
-    session = get_db_session()
-    if not session:
-        print(f"❌ NOTIFICATION UPDATE FAILED: No database session for task {task_id}")
-        return False
+# =============================================================================
+# Work Claiming (çoklu replika)
+# =============================================================================
+
+def claim_tasks(task_ids: List[int], lease_seconds: int = CLAIM_LEASE_SECONDS) -> Set[int]:
+    """
+    Görevlerin gönderim hakkını atomik olarak al; alınan task_id'leri döndür.
+    Kirası boş, süresi dolmuş ya da zaten bu replikada olan satırlar
+    FOR UPDATE SKIP LOCKED ile kilitlenip tek UPDATE ... RETURNING ile kiralanır.
+    Başka bir replikanın aynı anda kilitlediği satırlar beklenmeden atlanır.
+    
+    unit_of_work() dışında, kendi oturumunda çalışır ve hemen commit eder;
+    kira diğer replikalara döngü bitmeden görünmelidir.
+    """
+    if not task_ids or not SessionLocal:
+        return set()
+    
+    session = SessionLocal()
+    table = TaskStatus.__table__
     
     try:
-        status = session.query(TaskStatus).filter_by(task_id=task_id).first()
-        if status:
-            current_time = get_current_time_naive()
-            print(f"📝 Updating notification for task {task_id}: message_id={message_id}, time={current_time}")
-            
-            status.notification_message_id = message_id
-            status.last_notified_at = current_time
-            status.last_status = status_text
-            session.commit()
-            
-            print(f"✅ NOTIFICATION UPDATE SUCCESS: task {task_id}")
-            return True
-        else:
-            print(f"❌ NOTIFICATION UPDATE FAILED: TaskStatus not found for task {task_id}")
-            return False
+        current = get_current_time_naive()  # FORCED NAIVE
+        free = (
+            select(table.c.task_id)
+            .where(
+                table.c.task_id.in_(task_ids),
+                or_(
+                    table.c.lease_expires_at.is_(None),
+                    table.c.lease_expires_at < current,
+                    table.c.claimed_by == REPLICA_ID
+                )
+            )
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            table.update()
+            .where(table.c.task_id.in_(free))
+            .values(claimed_by=REPLICA_ID, lease_expires_at=current + timedelta(seconds=lease_seconds))
+            .returning(table.c.task_id)
+        )
+        claimed = set(session.execute(stmt).scalars().all())
+        session.commit()
+        return claimed
     except Exception as e:
         session.rollback()
-        print(f"❌ NOTIFICATION UPDATE FAILED: {e}")
-        print(f"   Task ID: {task_id}, Message ID: {message_id}, Status: {status_text}")
-        import traceback
-        traceback.print_exc()
-        return False
+        print(f"Görev kiralama hatası: {e}")
+        return set()
     finally:
         session.close()
 
 
-def mark_pre_notified(task_id: int) -> bool:
-    """Ön bildirim gönderildi olarak işaretle."""
-    session = get_db_session()
-    if not session:
+def claim_job_run(job_name: str, run_key: str) -> bool:
+    """
+    Zamanlanmış bir işin (ör. daily_reset, 2026-01-05) çalıştırma hakkını al.
+    Her (job_name, run_key) için yalnızca ilk replika True alır.
+    """
+    if not SessionLocal:
         return False
     
+    session = SessionLocal()
+    table = JobRun.__table__
+    
     try:
-        status = session.query(TaskStatus).filter_by(task_id=task_id).first()
-        if status:
-            status.pre_notified = True
-            session.commit()
-            return True
-        return False
-    except:
+        insert = sqlite_insert if session.get_bind().dialect.name == "sqlite" else pg_insert
+        stmt = insert(table).values(
+            job_name=job_name,
+            run_key=run_key,
+            claimed_by=REPLICA_ID,
+            claimed_at=get_current_time_naive()  # FORCED NAIVE
+        ).on_conflict_do_nothing(index_elements=[table.c.job_name, table.c.run_key])
+        claimed = session.execute(stmt).rowcount == 1
+        session.commit()
+        return claimed
+    except Exception as e:
         session.rollback()
+        print(f"İş kiralama hatası ({job_name}): {e}")
         return False
     finally:
         session.close()
 
 
-def update_task_last_status(task_id: int, status_text: str) -> bool:
-    """Görev durumunu güncelle."""
+# =============================================================================
+# Event Log
+# =============================================================================
+
+# apply_status_updates() ile yazılan last_status değerlerinin olay karşılıkları
+_STATUS_EVENTS = {
+    "notified": EVENT_NOTIFIED,
+    "skipped": EVENT_SKIPPED,
+}
+
+
+def _record_events(session, events: List[Tuple[int, str, datetime]]) -> None:
+    """
+    (task_id, event_type, occurred_at) olaylarını task_events'e ekle ve
+    task_event_daily sayaçlarını aynı transaction'da artır. Commit çağırana aittir.
+    """
+    if not events:
+        return
+    
+    session.execute(
+        TaskEvent.__table__.insert(),
+        [{"task_id": t, "event_type": e, "occurred_at": at} for t, e, at in events]
+    )
+    
+    daily = TaskEventDaily.__table__
+    counts = Counter((at.date(), t, e) for t, e, at in events)
+    insert = sqlite_insert if session.get_bind().dialect.name == "sqlite" else pg_insert
+    stmt = insert(daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[daily.c.day, daily.c.task_id, daily.c.event_type],
+        set_={"count": daily.c.count + stmt.excluded.count}
+    )
+    session.execute(stmt, [
+        {"day": day, "task_id": t, "event_type": e, "count": n}
+        for (day, t, e), n in counts.items()
+    ])
+
+
+def record_task_event(task_id: int, event_type: str) -> bool:
+    """Durum değiştirmeyen bir olayı (ör. snoozed) günlüğe yaz."""
     session = get_db_session()
     if not session:
         return False
     
     try:
-        status = session.query(TaskStatus).filter_by(task_id=task_id).first()
-        if status:
-            status.last_status = status_text
-            session.commit()
-            return True
-        return False
-    except:
+        _record_events(session, [(task_id, event_type, get_current_time_naive())])  # FORCED NAIVE
+        session.commit()
+        return True
+    except Exception as e:
         session.rollback()
+        print(f"Olay kaydı hatası: {e}")
         return False
     finally:
         session.close()
 
 
-def get_task_by_message_id(message_id: str) -> Optional[Dict]:
-    """Mesaj ID'si ile görevi bul."""
+# =============================================================================
+# Analytics (task_event_daily üzerinden - ham olaylar taranmaz)
+# =============================================================================
+
+def _rollup_since(days: int):
+    return get_current_time_naive().date() - timedelta(days=max(days, 1) - 1)
+
+
+def get_event_totals(days: int = 30) -> Dict[str, int]:
+    """Son `days` gündeki olay sayıları, tipe göre."""
     session = get_db_session()
     if not session:
-        return None
+        return {}
     
     try:
-        status = session.query(TaskStatus).filter_by(notification_message_id=message_id).first()
-        if status and status.task:
-            return _task_to_dict(status.task)
-        return None
+        rows = session.execute(
+            select(TaskEventDaily.event_type, func.sum(TaskEventDaily.count))
+            .where(TaskEventDaily.day >= _rollup_since(days))
+            .group_by(TaskEventDaily.event_type)
+        ).all()
+        return {event_type: int(total) for event_type, total in rows}
     finally:
         session.close()
 
 
-def get_stale_notifications(stale_minutes: int = 60) -> List[Dict]:
-    """Eski bildirimleri al - FORCED NAIVE."""
+def get_daily_event_counts(days: int = 30) -> List[Dict]:
+    """Gün ve olay tipine göre sayılar (grafik için)."""
     session = get_db_session()
     if not session:
         return []
     
     try:
-        cutoff = get_current_time_naive() - timedelta(minutes=stale_minutes)  # FORCED NAIVE
-        
-        statuses = session.query(TaskStatus).join(Task).join(Category).filter(
-            TaskStatus.last_notified_at < cutoff,
-            TaskStatus.last_status == "notified",
-            TaskStatus.notification_message_id != None,
-            Task.is_active == True,
-            Category.is_active == True
+        rows = session.execute(
+            select(TaskEventDaily.day, TaskEventDaily.event_type, func.sum(TaskEventDaily.count))
+            .where(TaskEventDaily.day >= _rollup_since(days))
+            .group_by(TaskEventDaily.day, TaskEventDaily.event_type)
+            .order_by(TaskEventDaily.day)
         ).all()
-        
-        return [_task_to_dict(s.task) for s in statuses if s.task]
-    except:
+        return [{"day": day, "event_type": event_type, "count": int(total)} for day, event_type, total in rows]
+    finally:
+        session.close()
+
+
+def get_task_event_counts(days: int = 30, event_type: str = EVENT_COMPLETED, limit: int = 20) -> List[Dict]:
+    """Bir olay tipinde en çok sayıya sahip görevler (silinmiş görevler dahil)."""
+    session = get_db_session()
+    if not session:
         return []
+    
+    try:
+        total = func.sum(TaskEventDaily.count).label("total")
+        rows = session.execute(
+            select(TaskEventDaily.task_id, Task.name, Category.name, total)
+            .outerjoin(Task, Task.id == TaskEventDaily.task_id)
+            .outerjoin(Category, Category.id == Task.category_id)
+            .where(
+                TaskEventDaily.day >= _rollup_since(days),
+                TaskEventDaily.event_type == event_type
+            )
+            .group_by(TaskEventDaily.task_id, Task.name, Category.name)
+            .order_by(total.desc())
+            .limit(limit)
+        ).all()
+        return [
+            {
+                "task_id": task_id,
+                "task_name": task_name or f"Silinmiş görev #{task_id}",
+                "category_name": category_name or "-",
+                "count": int(count),
+            }
+            for task_id, task_name, category_name, count in rows
+        ]
     finally:
         session.close()
 
@@ -633,117 +1252,138 @@ def get_stale_notifications(stale_minutes: int = 60) -> List[Dict]:
 # Status Calculation
 # =============================================================================
 
-def get_task_with_status(task: Dict) -> Dict:
+def get_task_with_status(task: TaskRecord, now: Optional[datetime] = None) -> TaskRecord:
     """
-    Göreve hesaplanmış durum ekle.
+    Göreve hesaplanmış durumu iliştir (kopyalamadan, aynı kayıt döner).
     timers.py FORCED NAIVE strateji kullanır - tüm timezone bilgisi kaldırılır.
+    `now` verilirse saat görev başına yeniden okunmaz.
     """
-    from src.scheduler.timers import get_task_status, TaskState
+    from src.scheduler.timers import get_task_status
     
-    # Pass raw values - timers.py converts everything to naive datetimes
-    # Handles: None, datetime object, or ISO string from PostgreSQL
+    # Tarihler zaten naive datetime (bkz. _fetch_records) - parse yok
     status = get_task_status(
-        reset_type=task.get("reset_type", "daily"),
-        is_completed=bool(task.get("is_completed", False)),
-        last_completed_at=task.get("last_completed_at"),
-        instance_entered_at=task.get("instance_entered_at"),
-        cooldown_minutes=task.get("cooldown_minutes", 0),
-        active_duration_minutes=task.get("active_duration_minutes", 0)
+        reset_type=task.reset_type,
+        is_completed=bool(task.is_completed),
+        last_completed_at=task.last_completed_at,
+        instance_entered_at=task.instance_entered_at,
+        cooldown_minutes=task.cooldown_minutes or 0,
+        active_duration_minutes=task.active_duration_minutes or 0,
+        now=now
     )
     
-    result = dict(task)
-    result["status"] = status
-    result["status_emoji"] = status.emoji
-    result["status_message"] = status.message
-    result["is_available"] = status.is_available
-    result["is_open"] = status.is_open
-    result["current_state"] = status.state.value
-    result["available_at"] = status.available_at
-    
-    return result
+    return task.attach_status(status)
 
 
 
-def get_all_tasks_with_status() -> List[Dict]:
-    """Tüm görevleri durum bilgisiyle al."""
-    tasks = get_all_tasks()
-    return [get_task_with_status(t) for t in tasks]
+def get_all_tasks_with_status(by_next_available: bool = False) -> List[TaskRecord]:
+    """Tüm görevleri durum bilgisiyle al (tek sorguluk snapshot)."""
+    current = get_current_time_naive()  # FORCED NAIVE - tüm görevler için tek okuma
+    tasks = get_task_snapshot(by_next_available=by_next_available, now=current)
+    return [get_task_with_status(t, current) for t in tasks]
 
 
-def get_tasks_needing_notification() -> List[Dict]:
+def get_tasks_needing_notification(
+    tasks: Optional[List[TaskRecord]] = None,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[TaskRecord]:
     """
     Bildirim gereken görevleri al.
     FORCED NAIVE datetime kullanır - spam önlenir.
+    `tasks` verilmezse koşullar SQL'de değerlendirilir ve yalnızca bildirilecek
+    görevler yüklenir; verilirse (get_all_tasks_with_status çıktısı) aynı kurallar
+    bellekte uygulanır. `limit` döngü başına mesaj bütçesidir; kalanlar sonraki
+    çağrıda yine seçilir.
     """
-    tasks = get_all_tasks_with_status()
-    current = get_current_time_naive()  # FORCED NAIVE
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    cooldown = get_int_setting("notification_cooldown_minutes", 120)
     
-    try:
-        cooldown = int(get_setting("notification_cooldown_minutes", "120"))
-    except:
-        cooldown = 120
+    if tasks is None:
+        due, initial = _select_notification_due(current, cooldown, limit)
+    else:
+        due, initial = _filter_notification_due(tasks, current, cooldown)
+        due = due[:limit] if limit is not None else due
     
-    result = []
+    # İlk kez hazır görünen görevler bildirilmez, yalnızca durumları yazılır
+    if initial:
+        apply_status_updates([{"task_id": t.id, "last_status": t.current_state} for t in initial])
+    
+    return due
+
+
+def get_tasks_needing_pre_notification(
+    tasks: Optional[List[TaskRecord]] = None,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[TaskRecord]:
+    """
+    Ön bildirim gereken görevleri al (en fazla `limit` tane).
+    FORCED NAIVE datetime kullanır.
+    `tasks` verilmezse koşullar SQL'de değerlendirilir; verilirse bellekte.
+    """
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    
+    if tasks is None:
+        return _select_pre_notification_due(current, limit)
+    due = _filter_pre_notification_due(tasks, current)
+    return due[:limit] if limit is not None else due
+
+
+def _filter_notification_due(
+    tasks: List[TaskRecord],
+    current: datetime,
+    cooldown: int
+) -> Tuple[List[TaskRecord], List[TaskRecord]]:
+    """Bellekteki görevlerden (bildirilecekler, durumu ilk kez yazılacaklar)."""
+    due = []
+    initial = []
     
     for task in tasks:
-        if not (task.get("is_available") or task.get("is_open")):
+        if not (task.is_available or task.is_open):
             continue
         
-        state = task.get("current_state", "")
-        last_status = task.get("last_status", "")
+        state = task.current_state
+        last_status = task.last_status
         
         # Check notification cooldown with FORCED NAIVE
-        last_notified = task.get("last_notified_at")
+        last_notified = task.last_notified_at
         if last_notified:
-            last_dt = to_naive_datetime(last_notified)  # FORCED NAIVE
-            if last_dt:
-                mins = (current - last_dt).total_seconds() / 60
-                if mins < cooldown and last_status in ["notified", state]:
-                    continue
+            mins = (current - last_notified).total_seconds() / 60
+            if mins < cooldown and last_status in ["notified", state]:
+                continue
         
         if last_status == "initialized":
-            update_task_last_status(task["id"], state)
+            initial.append(task)
             continue
         
         if last_status == "skipped":
             continue
         
-        result.append(task)
+        due.append(task)
     
-    return result
+    return due, initial
 
 
-def get_tasks_needing_pre_notification() -> List[Dict]:
-    """
-    Ön bildirim gereken görevleri al.
-    FORCED NAIVE datetime kullanır.
-    """
-    tasks = get_all_tasks_with_status()
-    current = get_current_time_naive()  # FORCED NAIVE
-    
+def _filter_pre_notification_due(tasks: List[TaskRecord], current: datetime) -> List[TaskRecord]:
+    """Bellekteki görevlerden ön bildirim penceresindekiler."""
     result = []
     
     for task in tasks:
-        if task.get("is_available") or task.get("is_open"):
+        if task.is_available or task.is_open:
             continue
         
-        if task.get("pre_notified"):
+        if task.pre_notified:
             continue
         
-        pre_mins = task.get("pre_notify_minutes", 0)
+        pre_mins = task.pre_notify_minutes or 0
         if pre_mins <= 0:
             continue
         
-        available_at = task.get("available_at")
+        available_at = task.available_at
         if not available_at:
             continue
         
-        # Convert available_at to naive for comparison
-        available_naive = to_naive_datetime(available_at)
-        if not available_naive:
-            continue
-        
-        time_until = (available_naive - current).total_seconds() / 60
+        time_until = (available_at - current).total_seconds() / 60
         
         if 0 < time_until <= pre_mins:
             result.append(task)
@@ -751,13 +1391,87 @@ def get_tasks_needing_pre_notification() -> List[Dict]:
     return result
 
 
-def get_tasks_grouped_by_category() -> Dict[str, List[Dict]]:
-    """Bildirim gereken görevleri kategoriye göre grupla."""
-    tasks = get_tasks_needing_notification()
+# =============================================================================
+# Readiness in SQL - timers.get_task_status() ile birebir aynı kurallar
+# =============================================================================
+
+def _load_due(filters, current: datetime, limit: Optional[int] = None) -> List[TaskRecord]:
+    session = get_db_session()
+    if not session:
+        return []
+    
+    try:
+        stmt = _TASK_SELECT.where(
+            _tasks.c.is_active == True,
+            _categories.c.is_active == True,
+            *filters
+        ).order_by(_categories.c.id, _tasks.c.name)
+        
+        if limit is not None:
+            stmt = stmt.limit(max(limit, 0))
+        
+        return [get_task_with_status(t, current) for t in _fetch_records(session, stmt, now=current)]
+    except Exception as e:
+        print(f"Hazır görev sorgusu hatası: {e}")
+        return []
+    finally:
+        session.close()
+
+
+def _select_notification_due(
+    current: datetime,
+    cooldown: int,
+    limit: Optional[int] = None
+) -> Tuple[List[TaskRecord], List[TaskRecord]]:
+    """
+    _filter_notification_due() ile aynı sonuç, yalnızca eşleşen satırlar yüklenerek.
+    `limit` ilk durumu yazılacak görevleri de kapsar.
+    """
+    now, state = readiness_exprs(current)
+    last_status = status_in_period(Category.reset_type, TaskStatus, *reset_boundaries(current))
+    
+    in_notify_cooldown = and_(
+        TaskStatus.last_notified_at.isnot(None),
+        now < minutes_after(TaskStatus.last_notified_at, cooldown),
+        or_(last_status == "notified", last_status == state)
+    )
+    
+    tasks = _load_due([
+        state.in_(READY_STATES),
+        not_(in_notify_cooldown),
+        last_status != "skipped",
+    ], current, limit)
+    
+    due = [t for t in tasks if t.last_status != "initialized"]
+    initial = [t for t in tasks if t.last_status == "initialized"]
+    return due, initial
+
+
+def _select_pre_notification_due(current: datetime, limit: Optional[int] = None) -> List[TaskRecord]:
+    """
+    _filter_pre_notification_due() ile aynı sonuç; pre_notify_at üzerinde aralık taraması.
+    pre_notify_at yalnızca ön bildirim süresi > 0 olan kategorilerde doludur.
+    """
+    now, state = readiness_exprs(current)
+    
+    return _load_due([
+        TaskStatus.pre_notify_at <= now,
+        now < TaskStatus.next_available_at,
+        state.notin_(READY_STATES),
+        not_(func.coalesce(TaskStatus.pre_notified, false())),
+    ], current, limit)
+
+
+def get_tasks_grouped_by_category(
+    tasks: Optional[List[TaskRecord]] = None,
+    limit: Optional[int] = None
+) -> Dict[str, List[TaskRecord]]:
+    """Bildirim gereken görevleri (en fazla `limit` tane) kategoriye göre grupla."""
+    tasks = get_tasks_needing_notification(tasks, limit=limit)
     
     grouped = {}
     for task in tasks:
-        cat = task.get("category_name", "Bilinmeyen")
+        cat = task.category_name
         if cat not in grouped:
             grouped[cat] = []
         grouped[cat].append(task)
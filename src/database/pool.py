@@ -0,0 +1,327 @@
+"""
+Bağlantı havuzu - boyutlandırma, metrikler, arka plan sağlık kontrolü ve devre kesici.
+
+Her checkout'ta SELECT 1 atan pool_pre_ping yerine bağlantılar pool_recycle
+ile yenilenir ve bir arka plan thread'i periyodik olarak canlılık kontrolü
+yapar; kontrol başarısız olursa havuz boşaltılır (engine.dispose()).
+Metrikler hem bottan (!havuz) hem dashboard'dan okunabilir.
+
+Art arda bağlantı hataları (bağlanamama, kopma) devreyi açar: açıkken yeni
+bağlantı denenmez, çağrılar bağlantı zaman aşımını beklemeden hata alır.
+DB_CIRCUIT_RESET_SECONDS sonra tek bir bağlantı denemesine izin verilir
+(yarı açık): denemeyi alan thread bağlanabilir, diğerleri deneme sonuçlanana
+kadar hata alır. Başarılı ilk sorgu devreyi kapatır, bağlantı hatası yeniden
+açar. Kesinti modu için bkz. degraded.py.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_HEALTH_CHECK_SECONDS = float(os.getenv("DB_HEALTH_CHECK_SECONDS", "30"))
+DB_CIRCUIT_FAILURES = int(os.getenv("DB_CIRCUIT_FAILURES", "3"))
+DB_CIRCUIT_RESET_SECONDS = float(os.getenv("DB_CIRCUIT_RESET_SECONDS", "30"))
+
+
+class PoolMetrics:
+    """Süreç genelinde havuz sayaçları."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.health_checks = 0
+        self.health_failures = 0
+        self.last_health_check_at: Optional[datetime] = None
+        self.last_health_ok: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_seconds += seconds
+            if seconds > self.wait_max_seconds:
+                self.wait_max_seconds = seconds
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_health(self, ok: bool) -> None:
+        with self._lock:
+            self.health_checks += 1
+            if not ok:
+                self.health_failures += 1
+            self.last_health_check_at = datetime.utcnow()
+            self.last_health_ok = ok
+
+
+pool_metrics = PoolMetrics()
+
+
+# =============================================================================
+# Devre kesici
+# =============================================================================
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class DatabaseUnavailable(Exception):
+    """Devre açık: bağlantı denenmedi."""
+
+
+class CircuitBreaker:
+    """
+    Veritabanı bağlantısı için devre kesici (süreç genelinde).
+    Bağlantı olayları instrument_engine() ile beslenir. Çağrı başına hata
+    bilgisi thread'e yazılır: begin_call() / call_failed() ile bir çağrının
+    veritabanı hatası yüzünden boş döndüğü ayırt edilir (bkz. degraded.py).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DB_CIRCUIT_FAILURES,
+        reset_seconds: float = DB_CIRCUIT_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[datetime] = None
+        self._probe_at = 0.0
+        # Yarı açık devrede sürmekte olan denemenin thread'i (yoksa None)
+        self._probe_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def is_open(self) -> bool:
+        """Devre açık ya da yarı açık (veritabanı henüz geri gelmedi)."""
+        return self.state != CIRCUIT_CLOSED
+
+    def allow(self) -> bool:
+        """
+        Bağlantı denenebilir mi? Açık devrede süre dolunca tek deneme verilir
+        (yarı açık); denemeyi alan thread sonuç gelene kadar bağlanabilir.
+        Sonuçlanmayan deneme reset_seconds sonra başka thread'e geçer.
+        """
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        thread = threading.get_ident()
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED or self._probe_thread == thread:
+                return True
+            if time.monotonic() - self._probe_at < self.reset_seconds:
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+            self._probe_thread = thread
+            self._probe_at = time.monotonic()
+            return True
+
+    def record_failure(self) -> None:
+        self._local.failed = True
+        with self._lock:
+            self.failures += 1
+            if self.state == CIRCUIT_CLOSED and self.failures < self.failure_threshold:
+                return
+            self._open()
+
+    def record_success(self) -> None:
+        if self.state == CIRCUIT_CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            if self.state == CIRCUIT_CLOSED:
+                return
+            self.state = CIRCUIT_CLOSED
+            self.opened_at = None
+            self._probe_thread = None
+        print("🟢 Veritabanı devresi kapandı (bağlantı geri geldi)")
+
+    def trip(self) -> None:
+        """Devreyi hemen aç (ör. başlangıçta veritabanına ulaşılamadı)."""
+        self._local.failed = True
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        self._probe_at = time.monotonic()
+        self._probe_thread = None
+        if self.state == CIRCUIT_OPEN:
+            return
+        if self.state == CIRCUIT_CLOSED:
+            self.trips += 1
+            self.opened_at = datetime.utcnow()
+            print(f"🔴 Veritabanı devresi açıldı ({self.failures} bağlantı hatası)")
+        self.state = CIRCUIT_OPEN
+
+    def begin_call(self) -> None:
+        self._local.failed = False
+
+    def call_failed(self) -> bool:
+        """Bu thread'deki son begin_call()'dan beri bağlantı hatası oldu ya da devre açıktı."""
+        return getattr(self._local, "failed", False)
+
+
+circuit = CircuitBreaker()
+
+
+class TimedQueuePool(QueuePool):
+    """Checkout bekleme süresini ölçen QueuePool."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - started)
+
+
+def pool_engine_kwargs() -> Dict:
+    """create_engine() için havuz ayarları."""
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": False,
+    }
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Bağlantı açılışı ve geçersiz kılma olaylarını say."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        pool_metrics.record_connect()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        pool_metrics.record_invalidation()
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_conn, record, exception):
+        pool_metrics.record_invalidation()
+
+    @event.listens_for(engine, "do_connect")
+    def _on_do_connect(dialect, record, cargs, cparams):
+        # Yarı açık devrede yalnızca denemeyi alan thread bağlanır
+        if circuit.state != CIRCUIT_CLOSED and not circuit.allow():
+            circuit._local.failed = True
+            raise DatabaseUnavailable("Veritabanı devresi açık")
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # Yalnızca bağlantı hataları: sorgu hataları (kilit, kısıt) devreyi açmaz
+        if context.is_disconnect or context.connection is None:
+            circuit.record_failure()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        circuit.record_success()
+
+
+def get_pool_stats(engine: Optional[Engine]) -> Dict:
+    """Havuzun anlık durumu + birikmiş sayaçlar."""
+    if engine is None:
+        return {}
+
+    pool = engine.pool
+    m = pool_metrics
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        # QueuePool.overflow() -pool_size'dan başlar; yalnızca gerçek taşmayı göster
+        "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+        "checkouts": m.checkouts,
+        "connects": m.connects,
+        "invalidations": m.invalidations,
+        "timeouts": m.timeouts,
+        "wait_avg_ms": (m.wait_total_seconds / m.checkouts * 1000) if m.checkouts else 0.0,
+        "wait_max_ms": m.wait_max_seconds * 1000,
+        "health_checks": m.health_checks,
+        "health_failures": m.health_failures,
+        "last_health_ok": m.last_health_ok,
+        "last_health_check_at": m.last_health_check_at,
+        "circuit_state": circuit.state,
+        "circuit_trips": circuit.trips,
+        "circuit_opened_at": circuit.opened_at,
+    }
+
+
+class PoolHealthChecker(threading.Thread):
+    """Periyodik canlılık kontrolü; başarısızlıkta havuzu boşaltır."""
+
+    def __init__(self, engine: Engine, interval_seconds: float = DB_HEALTH_CHECK_SECONDS):
+        super().__init__(name="db-health", daemon=True)
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            self.check()
+
+    def check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            pool_metrics.record_health(True)
+            return True
+        except DatabaseUnavailable:
+            # Devre açık, deneme zamanı gelmedi
+            pool_metrics.record_health(False)
+            return False
+        except Exception as e:
+            pool_metrics.record_health(False)
+            print(f"⚠️ Veritabanı sağlık kontrolü başarısız, havuz yenileniyor: {e}")
+            self.engine.dispose()
+            return False
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_health_checker: Optional[PoolHealthChecker] = None
+
+
+def start_health_checker(engine: Optional[Engine]) -> None:
+    """Sağlık kontrol thread'ini (süreç başına bir kez) başlat."""
+    global _health_checker
+
+    if engine is None or DB_HEALTH_CHECK_SECONDS <= 0:
+        return
+    if _health_checker is not None and _health_checker.is_alive():
+        return
+
+    _health_checker = PoolHealthChecker(engine)
+    _health_checker.start()
@@ -0,0 +1,176 @@
+"""
+Görev kaydı - sıcak yoldaki görev verisinin kompakt, değiştirilemez tipi.
+
+operations.py görevleri 25 anahtarlı dict'ler yerine TaskRecord olarak döndürür.
+__slots__ sayesinde kayıt başına __dict__ tutulmaz. Hesaplanan durum
+(timers.TaskStatus) kopyalanmadan kayda iliştirilir ve özellikler üzerinden
+okunur:
+
+    task = get_task_with_status(task)
+    if task.is_available:
+        print(task.status_emoji, task.name)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+TASK_FIELDS = (
+    "id",
+    "category_id",
+    "name",
+    "description",
+    "cooldown_minutes",
+    "active_duration_minutes",
+    "is_active",
+    "created_at",
+    # Kategori bilgisi
+    "category_name",
+    "reset_type",
+    "discord_channel_id",
+    "pre_notify_minutes",
+    "show_resource_reminder",
+    # Durum bilgisi (task_status)
+    "is_completed",
+    "last_completed_at",
+    "instance_entered_at",
+    "notification_message_id",
+    "last_notified_at",
+    "last_status",
+    "pre_notified",
+    # Saklanan zaman çizelgesi (bkz. schedule.refresh_schedules)
+    "next_available_at",
+    "closes_at",
+    "pre_notify_at",
+)
+
+
+class TaskRecord:
+    """
+    Görev + kategori + task_status satırı.
+    Alanlar değiştirilemez; yalnızca hesaplanan durum attach_status() ile
+    (yerinde) güncellenir. Taramalarda en çok okunan durum bayrakları
+    (is_available, is_open, current_state) iliştirme sırasında slot'a yazılır.
+    """
+
+    __slots__ = TASK_FIELDS + ("_status", "is_available", "is_open", "current_state")
+
+    def __init__(
+        self,
+        id: int,
+        category_id: int,
+        name: str,
+        description: str,
+        cooldown_minutes: int,
+        active_duration_minutes: int,
+        is_active: bool,
+        created_at: Optional[datetime],
+        category_name: str,
+        reset_type: str,
+        discord_channel_id: Optional[str],
+        pre_notify_minutes: int,
+        show_resource_reminder: bool,
+        is_completed: bool,
+        last_completed_at: Optional[datetime],
+        instance_entered_at: Optional[datetime],
+        notification_message_id: Optional[str],
+        last_notified_at: Optional[datetime],
+        last_status: str,
+        pre_notified: bool,
+        next_available_at: Optional[datetime] = None,
+        closes_at: Optional[datetime] = None,
+        pre_notify_at: Optional[datetime] = None,
+    ):
+        _set = object.__setattr__
+        _set(self, "id", id)
+        _set(self, "category_id", category_id)
+        _set(self, "name", name)
+        _set(self, "description", description)
+        _set(self, "cooldown_minutes", cooldown_minutes)
+        _set(self, "active_duration_minutes", active_duration_minutes)
+        _set(self, "is_active", is_active)
+        _set(self, "created_at", created_at)
+        _set(self, "category_name", category_name)
+        _set(self, "reset_type", reset_type)
+        _set(self, "discord_channel_id", discord_channel_id)
+        _set(self, "pre_notify_minutes", pre_notify_minutes)
+        _set(self, "show_resource_reminder", show_resource_reminder)
+        _set(self, "is_completed", is_completed)
+        _set(self, "last_completed_at", last_completed_at)
+        _set(self, "instance_entered_at", instance_entered_at)
+        _set(self, "notification_message_id", notification_message_id)
+        _set(self, "last_notified_at", last_notified_at)
+        _set(self, "last_status", last_status)
+        _set(self, "pre_notified", pre_notified)
+        _set(self, "next_available_at", next_available_at)
+        _set(self, "closes_at", closes_at)
+        _set(self, "pre_notify_at", pre_notify_at)
+        _set(self, "_status", None)
+        _set(self, "is_available", False)
+        _set(self, "is_open", False)
+        _set(self, "current_state", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"TaskRecord değiştirilemez ({name})")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"TaskRecord değiştirilemez ({name})")
+
+    def __reduce__(self):
+        return (TaskRecord, tuple(getattr(self, f) for f in TASK_FIELDS))
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id}, name={self.name!r}, category={self.category_name!r})"
+
+    # -------------------------------------------------------------------------
+    # Hesaplanan durum
+    # -------------------------------------------------------------------------
+
+    def attach_status(self, status) -> "TaskRecord":
+        """timers.TaskStatus'u kayda iliştir (kopya yok) ve kaydı döndür."""
+        _set = object.__setattr__
+        _set(self, "_status", status)
+        _set(self, "is_available", status.is_available)
+        _set(self, "is_open", status.is_open)
+        _set(self, "current_state", status.state.value)
+        return self
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def status_emoji(self) -> str:
+        return self._status.emoji if self._status else "❓"
+
+    @property
+    def status_message(self) -> str:
+        return self._status.message if self._status else ""
+
+    @property
+    def available_at(self):
+        return self._status.available_at if self._status else None
+
+    # -------------------------------------------------------------------------
+
+    def to_dict(self, iso_datetimes: bool = False) -> Dict:
+        """
+        Eski dict biçimi (dışa aktarma / hata ayıklama için).
+        iso_datetimes=True ise tarihler ISO string olur (JSON gibi kenarlar için).
+        """
+        result = {f: getattr(self, f) for f in TASK_FIELDS}
+        if self._status is not None:
+            result.update({
+                "status": self._status,
+                "status_emoji": self.status_emoji,
+                "status_message": self.status_message,
+                "is_available": self.is_available,
+                "is_open": self.is_open,
+                "current_state": self.current_state,
+                "available_at": self.available_at,
+            })
+        if iso_datetimes:
+            for key, value in result.items():
+                if isinstance(value, datetime):
+                    result[key] = value.isoformat()
+        return result
@@ -0,0 +1,294 @@
+"""
+Saklanan görev zaman çizelgesi - task_status.next_available_at / closes_at / pre_notify_at.
+
+Bu kolonlar yalnızca durum değiştiğinde (tamamlama, giriş, reset, görev veya
+kategori düzenleme) yeniden hesaplanır; scheduler döngüsü ve dashboard onları
+indeksli olarak okur. Hesabın kendisi timers.calculate_schedule()'dadır.
+Karakter başına durumlar (character_task_status) aynı kolonları taşır ve
+aynı şekilde yenilenir.
+
+Günlük/haftalık tamamlanma saklanmaz, okunurken türetilir: last_completed_at
+son reset sınırından (time_utils.get_last_daily_reset / get_last_weekly_reset)
+sonraysa görev tamamlanmıştır. Reset anında hiçbir satır yazılmaz; bkz.
+completed_in_period() / status_in_period() ve timers.is_completed_in_period().
+
+refresh_schedules() hem Session hem Connection ile çalışır (migrasyon backfill'i
+aynı fonksiyonu kullanır) ve commit etmez.
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, select, func, case, literal, false, and_, or_, DateTime
+
+from src.database.enums import EnumCode, StatusCode
+from src.database.models import Category, Task, TaskStatus, CharacterTaskStatus
+from src.scheduler.timers import (
+    TaskState, calculate_schedule, get_current_time_naive, get_period_start,
+    is_completed_in_period, to_naive_datetime
+)
+
+
+SCHEDULE_COLUMNS = ("next_available_at", "closes_at", "pre_notify_at")
+
+# Tek seferde okunup yazılan satır sayısı (toplu içe aktarım sonrası tüm tablo yenilenir)
+REFRESH_BATCH_SIZE = 5000
+
+READY_STATES = (TaskState.AVAILABLE.value, TaskState.INSTANCE_OPEN.value)
+
+# Reset tipine göre zaman çizelgesini belirleyen durum kolonu (bkz. schedule_after)
+_SCHEDULE_SOURCE = {
+    "daily": "last_completed_at",
+    "weekly": "last_completed_at",
+    "cooldown": "last_completed_at",
+    "instance": "instance_entered_at",
+}
+
+# readiness_exprs() durum ifadesinin tipi - last_status ile karşılaştırılabilir kodlar
+_STATE_TYPE = EnumCode(StatusCode)
+
+
+def refresh_schedules(
+    executor,
+    task_ids: Optional[Iterable[int]] = None,
+    category_id: Optional[int] = None,
+    now: Optional[datetime] = None,
+    guild_id: Optional[str] = None,
+    characters: bool = True
+) -> int:
+    """
+    Verilen görevlerin (veya kategorinin / sunucunun, ya da hiçbiri verilmezse
+    tümünün) zaman çizelgesini yeniden yaz. Güncellenen satır sayısını döndürür.
+    characters=True ise aynı görevlerin karakter satırları da yenilenir.
+    """
+    if task_ids is not None:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+    
+    def filters(status):
+        result = []
+        if task_ids is not None:
+            result.append(status.task_id.in_(task_ids))
+        if category_id is not None:
+            result.append(Task.category_id == category_id)
+        if guild_id is not None:
+            result.append(Task.guild_id == guild_id)
+        return result
+    
+    current = now or get_current_time_naive()  # FORCED NAIVE
+    count = _refresh(executor, TaskStatus, filters(TaskStatus), current)
+    if characters:
+        count += _refresh(executor, CharacterTaskStatus, filters(CharacterTaskStatus), current)
+    return count
+
+
+def refresh_character_schedules(
+    executor,
+    character_id: Optional[int] = None,
+    task_ids: Optional[Iterable[int]] = None,
+    now: Optional[datetime] = None
+) -> int:
+    """Karakterin (verilen görevlerdeki) satırlarının zaman çizelgesini yeniden yaz."""
+    filters = []
+    if character_id is not None:
+        filters.append(CharacterTaskStatus.character_id == character_id)
+    if task_ids is not None:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        filters.append(CharacterTaskStatus.task_id.in_(task_ids))
+    
+    return _refresh(executor, CharacterTaskStatus, filters, now or get_current_time_naive())  # FORCED NAIVE
+
+
+def schedule_values(row, current: datetime) -> Dict[str, Optional[datetime]]:
+    """
+    Satırın zaman çizelgesi kolonları. `row` reset_type, is_completed,
+    last_completed_at, instance_entered_at, cooldown_minutes,
+    active_duration_minutes ve pre_notify_minutes alanlarını taşır.
+    Günlük/haftalık tamamlanma `current` anındaki dönemden türetilir.
+    """
+    return dict(zip(SCHEDULE_COLUMNS, calculate_schedule(
+        reset_type=row.reset_type,
+        is_completed=is_completed_in_period(
+            row.reset_type, row.is_completed, row.last_completed_at, current
+        ),
+        last_completed_at=to_naive_datetime(row.last_completed_at),
+        instance_entered_at=to_naive_datetime(row.instance_entered_at),
+        cooldown_minutes=row.cooldown_minutes or 0,
+        active_duration_minutes=row.active_duration_minutes or 0,
+        pre_notify_minutes=row.pre_notify_minutes or 0,
+        now=current,
+    )))
+
+
+def schedule_after(task, values: Dict, current: datetime) -> Optional[Dict[str, Optional[datetime]]]:
+    """
+    Durum geçişinin yazdığı `values` sonrası zaman çizelgesi; görev / kategori
+    alanları (reset_type, cooldown_minutes, active_duration_minutes,
+    pre_notify_minutes) `task` kaydından (TaskRecord) okunur. Çizelge yalnızca yazılan değerlerden belirlenemiyorsa (ör. instance görevine
+    tamamlama) None döner; çağıran satırı refresh_rows() ile yeniler.
+    """
+    source = _SCHEDULE_SOURCE.get(task.reset_type)
+    if source not in values:
+        return None
+    return schedule_values(SimpleNamespace(
+        reset_type=task.reset_type,
+        is_completed=values.get("is_completed", False),
+        last_completed_at=values.get("last_completed_at"),
+        instance_entered_at=values.get("instance_entered_at"),
+        cooldown_minutes=task.cooldown_minutes,
+        active_duration_minutes=task.active_duration_minutes,
+        pre_notify_minutes=task.pre_notify_minutes,
+    ), current)
+
+
+def refresh_rows(executor, status, ids: Iterable[int], now: Optional[datetime] = None) -> int:
+    """`status` tablosunun (TaskStatus / CharacterTaskStatus) verilen id'li satırlarını yenile."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    return _refresh(executor, status, [status.id.in_(ids)], now or get_current_time_naive())  # FORCED NAIVE
+
+
+def _refresh(executor, status, filters, current: datetime) -> int:
+    """`status` tablosunun (TaskStatus / CharacterTaskStatus) eşleşen satırlarını yenile."""
+    # SessionLocal autoflush=False: bekleyen ORM değişiklikleri okunmadan önce yazılsın
+    if hasattr(executor, "flush"):
+        executor.flush()
+    
+    query = (
+        select(
+            status.id,
+            Category.reset_type,
+            status.is_completed,
+            status.last_completed_at,
+            status.instance_entered_at,
+            Task.cooldown_minutes,
+            Task.active_duration_minutes,
+            Category.pre_notify_minutes,
+        )
+        .join(Task, Task.id == status.task_id)
+        .join(Category, Category.id == Task.category_id)
+        .where(*filters)
+    )
+    
+    table = status.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("b_id"))
+        .values({c: bindparam(f"b_{c}") for c in SCHEDULE_COLUMNS})
+    )
+    
+    # Birincil anahtar üzerinden sayfa sayfa: bellek kullanımı tablo boyutundan bağımsız
+    count = 0
+    last_id = 0
+    while True:
+        rows = executor.execute(
+            query.where(status.id > last_id)
+            .order_by(status.id)
+            .limit(REFRESH_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        
+        params = []
+        for row in rows:
+            params.append({"b_id": row.id, **{
+                f"b_{c}": v for c, v in schedule_values(row, current).items()
+            }})
+        
+        executor.execute(stmt, params)
+        count += len(params)
+        last_id = rows[-1].id
+        
+        if len(rows) < REFRESH_BATCH_SIZE:
+            break
+    
+    return count
+
+
+def readiness_exprs(current: datetime, status=TaskStatus):
+    """
+    timers.get_task_status()'un SQL karşılığı: (now, state) ifadeleri.
+    Zaman karşılaştırmaları saklanan çizelge kolonları üzerinden yapılır
+    (bkz. refresh_schedules); günlük/haftalık durum son reset sınırından
+    sonraki tamamlanmadan gelir (bkz. completed_in_period).
+    `status` TaskStatus ya da CharacterTaskStatus olabilir.
+    Durum, last_status ile aynı tamsayı kodlarıyla üretilir (bkz. enums.StatusCode);
+    karşılaştırmalar kodlar üzerinden yapılır, okunan değer metindir.
+    """
+    now = literal(current, DateTime)
+    completed = completed_in_period(Category.reset_type, status, *reset_boundaries(current))
+    
+    def code(state: TaskState):
+        return literal(state.value, _STATE_TYPE)
+    
+    state = case(
+        (Category.reset_type.in_(("daily", "weekly")), case(
+            (completed, code(TaskState.COMPLETED)),
+            else_=code(TaskState.AVAILABLE)
+        )),
+        (Category.reset_type == "cooldown", case(
+            (status.next_available_at > now, code(TaskState.ON_COOLDOWN)),
+            else_=code(TaskState.AVAILABLE)
+        )),
+        (Category.reset_type == "instance", case(
+            (status.closes_at > now, code(TaskState.INSTANCE_OPEN)),
+            (status.next_available_at > now, code(TaskState.ON_COOLDOWN)),
+            else_=code(TaskState.AVAILABLE)
+        )),
+        else_=code(TaskState.UNKNOWN)
+    )
+    
+    return now, state
+
+
+# =============================================================================
+# Günlük / haftalık dönem - reset sınırından türetilen tamamlanma
+# =============================================================================
+
+def reset_boundaries(current: datetime):
+    """`current` anındaki (son günlük reset, son haftalık reset) - NAIVE."""
+    return get_period_start("daily", current), get_period_start("weekly", current)
+
+
+def completed_in_period(reset_type, status, daily_reset, weekly_reset):
+    """
+    timers.is_completed_in_period()'un SQL karşılığı. Günlük/haftalık görevde
+    last_completed_at ilgili reset sınırıyla karşılaştırılır, diğerlerinde
+    is_completed okunur. `status` TaskStatus / CharacterTaskStatus ya da
+    tablonun .c koleksiyonu; sınırlar datetime veya bindparam olabilir.
+    """
+    return case(
+        (reset_type == "daily", func.coalesce(status.last_completed_at >= daily_reset, false())),
+        (reset_type == "weekly", func.coalesce(status.last_completed_at >= weekly_reset, false())),
+        else_=func.coalesce(status.is_completed, false())
+    )
+
+
+def status_in_period(reset_type, status, daily_reset, weekly_reset):
+    """
+    Dönem içindeki last_status: günlük/haftalık görevin durumu son reset
+    sınırından önce yazıldıysa (o tarihten sonra bildirim ya da tamamlama yok)
+    "reset" okunur - eski reset işinin yazdığı değer. Böylece önceki dönemin
+    "skipped" / "notified" durumu yeni dönemde bildirimi engellemez.
+    Hiç durumu olmayan satırlar "initialized" okunur.
+    Python karşılığı: timers.last_status_in_period().
+    """
+    status_type = status.last_status.type
+    
+    def stale(boundary):
+        return and_(
+            status.last_status.notin_(("initialized", "reset")),
+            or_(status.last_notified_at.is_(None), status.last_notified_at < boundary),
+            or_(status.last_completed_at.is_(None), status.last_completed_at < boundary),
+        )
+    
+    return case(
+        (and_(reset_type == "daily", stale(daily_reset)), literal("reset", status_type)),
+        (and_(reset_type == "weekly", stale(weekly_reset)), literal("reset", status_type)),
+        else_=func.coalesce(status.last_status, literal("initialized", status_type))
+    )
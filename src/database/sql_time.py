@@ -0,0 +1,48 @@
+"""
+SQL tarafı zaman aritmetiği - hazır olma koşullarını sorguya taşımak için.
+
+    minutes_after(TaskStatus.last_completed_at, Task.cooldown_minutes) <= now
+
+PostgreSQL'de `ts + make_interval(mins => n)` olarak derlenir. SQLite'ta
+sqlite_backend.py'nin bağlantı başına kaydettiği add_minutes() fonksiyonu
+kullanılır; bu fonksiyon Python timedelta toplamasıyla aynı sonucu, SQLAlchemy'nin
+DATETIME saklama biçiminde döndürür (mikrosaniye dahil, sözlük sırası = zaman sırası).
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+# SQLAlchemy'nin SQLite DATETIME saklama biçimi
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class minutes_after(FunctionElement):
+    """Zaman damgasına (kolon veya parametre) dakika ekle."""
+    type = DateTime()
+    inherit_cache = True
+    name = "minutes_after"
+
+
+@compiles(minutes_after, "postgresql")
+def _minutes_after_postgresql(element, compiler, **kw):
+    ts, minutes = list(element.clauses)
+    return f"({compiler.process(ts, **kw)} + make_interval(mins => {compiler.process(minutes, **kw)}))"
+
+
+@compiles(minutes_after, "sqlite")
+def _minutes_after_sqlite(element, compiler, **kw):
+    ts, minutes = list(element.clauses)
+    return f"add_minutes({compiler.process(ts, **kw)}, {compiler.process(minutes, **kw)})"
+
+
+def sqlite_add_minutes(value: Optional[str], minutes: Optional[int]) -> Optional[str]:
+    """SQLite add_minutes() gerçeklemesi (bkz. sqlite_backend.configure_sqlite)."""
+    if value is None or minutes is None:
+        return None
+    result = datetime.fromisoformat(value) + timedelta(minutes=minutes)
+    return result.strftime(SQLITE_DATETIME_FORMAT)
@@ -0,0 +1,96 @@
+"""
+Gömülü SQLite (WAL) backend - tek sunuculu kurulumlar için.
+
+    DATABASE_URL=sqlite:///data/gorevler.db
+
+Bağlantı başına WAL ve ayarlı PRAGMA'lar uygulanır. pysqlite'ın kendi
+(tembel) transaction yönetimi kapatılır, BEGIN'i SQLAlchemy gönderir; böylece
+unit_of_work() okumaları da tek snapshot içinde kalır. Migrasyonlar
+sqlite_begin_immediate seçeneğiyle BEGIN IMMEDIATE kullanarak yazma kilidi alır.
+"""
+
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.database.sql_time import sqlite_add_minutes
+
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Bağlantı başına hazırlanmış ifade önbelleği (sqlite3 varsayılanı 128)
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+# ANALYZE'ın indeks başına örneklediği satır sayısı (0 = tamamı)
+SQLITE_ANALYSIS_LIMIT = int(os.getenv("SQLITE_ANALYSIS_LIMIT", "1000"))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",          # WAL'da güvenli, fsync sayısını azaltır
+    "PRAGMA foreign_keys=ON",             # ON DELETE CASCADE için gerekli
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+)
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def sqlite_engine_kwargs(url: str) -> Dict:
+    """create_engine() için SQLite bağlantı ayarları."""
+    if ":memory:" in url or url.rstrip("/") == "sqlite:":
+        raise ValueError("Bellek içi SQLite desteklenmiyor; bir dosya yolu kullanın (sqlite:///gorevler.db).")
+
+    path = url.split("///", 1)[-1]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return {
+        # Bağlantılar bot thread havuzu ve sağlık kontrolü arasında paylaşılır
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            "cached_statements": SQLITE_STATEMENT_CACHE,
+        },
+    }
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """PRAGMA'ları uygula ve transaction başlangıcını SQLAlchemy'ye devret."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        dbapi_conn.isolation_level = None
+        # sql_time.minutes_after() için
+        dbapi_conn.create_function("add_minutes", 2, sqlite_add_minutes, deterministic=True)
+        cursor = dbapi_conn.cursor()
+        for pragma in PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        immediate = conn.get_execution_options().get("sqlite_begin_immediate")
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def refresh_sqlite_statistics(engine: Optional[Engine]) -> None:
+    """
+    Planlayıcı istatistiklerini (sqlite_stat1) yenile - başlangıçta ve günlük.
+    İstatistik yokken SQLite her eşitlik indeksini eşit seçici sayar; ör. mesaj
+    kimliği aramasında guild_id indeksini seçip sunucunun tüm görevlerini tarar.
+    """
+    if engine is None or engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA analysis_limit={SQLITE_ANALYSIS_LIMIT}")
+        conn.exec_driver_sql("ANALYZE")
+    # Havuzdaki diğer bağlantılar istatistikleri yalnızca açılışta yükler;
+    # yenilerini açsınlar (kullanımdaki bağlantılar iade edilince kapanır)
+    engine.dispose()
@@ -0,0 +1,105 @@
+"""
+Write-behind tampon - bildirim kayıtları (notification_sent / pre_notified) ve
+gönderilen mesajların kayıtları (notification_messages).
+
+Discord gönderim hattı Postgres'i beklemez: kayıtlar bellekte hemen tutulur,
+birkaç saniyede bir ve kapanışta apply_status_updates() ile toplu yazılır.
+Aynı göreve gelen ardışık güncellemeler tek satıra birleşir. Mesajlar gönderim
+anında bellek içi kayda da eklenir (bkz. messages.message_registry); reaksiyonlar
+flush'tan önce de görevi bulur.
+
+Veritabanı devresi açıkken flush denenmez (kayıtlar bellekte bekler); kayıtlar
+kesinti modunun yerel kopyasına da uygulanır (bkz. degraded.py).
+"""
+
+import os
+import threading
+from typing import Dict, List
+
+from src.database.degraded import local_snapshot
+from src.database.messages import write_notification_messages
+from src.database.operations import apply_status_updates
+from src.database.pool import circuit
+
+
+WRITE_BUFFER_FLUSH_SECONDS = float(os.getenv("WRITE_BUFFER_FLUSH_SECONDS", "5"))
+
+
+class StatusWriteBuffer:
+    """Görev başına birleşen task_status güncellemeleri ve mesaj kayıtları."""
+
+    def __init__(self):
+        self._pending: Dict[int, Dict] = {}
+        self._messages: Dict[str, Dict] = {}
+        self._message_states: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, update: Dict) -> None:
+        """apply_status_updates() kaydını tampona ekle (aynı görevle birleşir)."""
+        task_id = update["task_id"]
+        with self._lock:
+            merged = self._pending.setdefault(task_id, {"task_id": task_id})
+            merged.update(update)
+        local_snapshot.apply(task_id, update)
+
+    def record_message(self, row: Dict) -> None:
+        """messages.message_row() kaydını tampona ekle."""
+        with self._lock:
+            self._messages[row["message_id"]] = row
+
+    def record_message_state(self, message_id: str, state: str) -> None:
+        """Mesaj durumu değişikliği; mesaj henüz yazılmadıysa kaydıyla birleşir."""
+        message_id = str(message_id)
+        with self._lock:
+            if message_id in self._messages:
+                self._messages[message_id] = {**self._messages[message_id], "state": state}
+            else:
+                self._message_states[message_id] = state
+
+    def pending_count(self) -> int:
+        return len(self._pending) + len(self._messages) + len(self._message_states)
+
+    def flush(self) -> int:
+        """
+        Bekleyen kayıtları toplu yazımla gönder (önce görev durumları, sonra mesajlar).
+        Yazım başarısız olursa kayıtlar (daha yeni güncellemelerin altına) geri konur.
+        """
+        with self._lock:
+            if not (self._pending or self._messages or self._message_states):
+                return 0
+            # Açık devrede yazılmaz; deneme zamanı geldiyse bu yazım tek denemedir
+            # (yarı açık devrede başka thread deniyorsa beklenir, bkz. CircuitBreaker.allow)
+            if not circuit.allow():
+                return 0
+            batch = list(self._pending.values())
+            messages, states = self._messages, self._message_states
+            self._pending, self._messages, self._message_states = {}, {}, {}
+
+        written = 0
+        if batch:
+            try:
+                written = apply_status_updates(batch, raise_errors=True)
+            except Exception:
+                self._requeue(batch, messages, states)
+                return 0
+
+        try:
+            written += write_notification_messages(list(messages.values()), states)
+        except Exception as e:
+            print(f"Mesaj kaydı yazım hatası: {e}")
+            self._requeue([], messages, states)
+        return written
+
+    def _requeue(self, batch: List[Dict], messages: Dict[str, Dict], states: Dict[str, str]) -> None:
+        with self._lock:
+            for old in batch:
+                newer = self._pending.get(old["task_id"])
+                self._pending[old["task_id"]] = {**old, **newer} if newer else old
+            for message_id, row in messages.items():
+                newer = self._messages.get(message_id)
+                self._messages[message_id] = {**row, **newer} if newer else row
+            for message_id, state in states.items():
+                self._message_states.setdefault(message_id, state)
+
+
+write_buffer = StatusWriteBuffer()
@@ -1,10 +1,25 @@
 """
-Scheduler - PostgreSQL destekli.
+Scheduler - PostgreSQL destekli, çok sunuculu.
+
+Her Discord sunucusu (guild) kendi verisi ve ayarlarıyla bağımsız işlenir:
+ana döngü her sunucu için ayrı bir asyncio task başlatır (models.guild_scope
+altında). Aynı anda en fazla GUILD_CYCLE_CONCURRENCY sunucu DB bağlantısı
+tutar; bir sunucunun döngüsünde en fazla MAX_NOTIFICATIONS_PER_CYCLE mesaj
+gönderilir, kalanı sonraki dakikaya kalır. Önceki döngüsü bitmemiş sunucu o
+dakika atlanır; böylece büyük bir sunucu diğerlerini bekletmez.
+
+Karakter kaydı olan sunucularda görevler karakter başına izlenir (bkz.
+database/characters.py): görev başına tek mesajda hazır karakterler listelenir.
+
+Veritabanına ulaşılamadığında (devre açık) döngü yerel kopyadan çalışır: ön
+bildirim ve hazır bildirimler gönderilir, kayıtlar tamponda bekler. Devre
+kapanınca önce tampon, sonra reaksiyon günlüğü yazılır (bkz. database/degraded.py).
 """
 
 import asyncio
+import os
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, List, Dict, Callable, Awaitable, Iterable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
@@ -12,19 +27,43 @@ from apscheduler.triggers.cron import CronTrigger
 import discord
 from discord.ext import commands
 
-from src.database.operations import (
+from src.database.async_operations import (
     get_tasks_grouped_by_category,
     get_tasks_needing_pre_notification,
     get_stale_notifications,
-    get_all_categories,
-    get_task_with_status,
-    get_task_by_id,
-    reset_daily_tasks,
-    reset_weekly_tasks,
-    mark_pre_notified,
-    update_notification_sent
+    count_tasks_by_type,
+    get_int_setting,
+    is_bot_active,
+    unit_of_work,
+    init_db,
+    flush_write_buffer,
+    sync_message_registry,
+    prune_notification_messages,
+    ensure_event_partitions,
+    refresh_sqlite_statistics,
+    claim_tasks,
+    claim_job_run,
+    uses_character_notifications,
+    get_character_notifications,
+    get_character_pre_notifications,
+    claim_character_notifications,
+    claim_character_pre_notifications,
+    record_character_messages,
+    record_character_pre_notifications,
+    get_all_tasks_with_status,
+    refresh_local_snapshot,
+    save_local_snapshot,
+    probe_database,
+    replay_reaction_journal
 )
-from src.database.models import get_setting, is_bot_active
+from src.database.degraded import DB_SNAPSHOT_MINUTES, pending_journal_entries
+from src.database.models import guild_scope
+from src.database.pool import circuit
+from src.database.operations import get_task_with_status, pre_notified_update
+from src.database.records import TaskRecord
+from src.database.write_buffer import write_buffer, WRITE_BUFFER_FLUSH_SECONDS
+from src.bot.routing import channel_router
+from src.scheduler.timers import get_current_time_naive
 from src.utils.time_utils import DAILY_RESET_HOUR, DAILY_RESET_MINUTE, WEEKLY_RESET_DAY
 
 
@@ -32,9 +71,27 @@ scheduler: Optional[AsyncIOScheduler] = None
 MESSAGE_DELAY = 1.0
 AUTO_REFRESH_MINUTES = 60
 
+# Aynı anda döngüsü çalışan en fazla sunucu (her biri bir DB bağlantısı tutar)
+GUILD_CYCLE_CONCURRENCY = int(os.getenv("GUILD_CYCLE_CONCURRENCY", "4"))
+
+# Sunucu başına bir döngüde gönderilen en fazla mesaj
+MAX_NOTIFICATIONS_PER_CYCLE = int(os.getenv("MAX_NOTIFICATIONS_PER_CYCLE", "30"))
+
+_cycle_slots = asyncio.Semaphore(GUILD_CYCLE_CONCURRENCY)
 
-def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextChannel]) -> None:
-    """Zamanlayıcıyı kur."""
+# Sunucu id -> süren ana döngü task'ı
+_guild_cycles: Dict[int, asyncio.Task] = {}
+
+
+def setup_scheduler(
+    bot: commands.Bot,
+    fallback_channels: Optional[Dict[int, discord.TextChannel]] = None,
+    db_ready: bool = True
+) -> None:
+    """
+    Zamanlayıcıyı kur. fallback_channels: sunucu id -> genel bildirim kanalı.
+    db_ready=False: başlangıçta veritabanına ulaşılamadı, şema ilk bağlantıda kurulur.
+    """
     global scheduler
     
     if scheduler is not None:
@@ -45,7 +102,9 @@ def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextCh
     
     scheduler = AsyncIOScheduler()
     scheduler.bot = bot
-    scheduler.fallback_channel = fallback_channel
+    # Aynı dict: sonradan katılan sunucuların kanalları da görülür
+    scheduler.fallback_channels = fallback_channels if fallback_channels is not None else {}
+    scheduler.db_ready = db_ready
     
     # Ana kontrol: Her 1 dakika
     scheduler.add_job(
@@ -56,6 +115,16 @@ def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextCh
         replace_existing=True
     )
     
+    # Kesinti modu için yerel kopya (ilk çalıştırma hemen)
+    scheduler.add_job(
+        local_snapshot_job,
+        IntervalTrigger(minutes=DB_SNAPSHOT_MINUTES),
+        id='local_snapshot',
+        name='Yerel Kopya',
+        replace_existing=True,
+        next_run_time=datetime.now()
+    )
+    
     # Günlük reset 04:00
     scheduler.add_job(
         daily_reset_job,
@@ -65,6 +134,15 @@ def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextCh
         replace_existing=True
     )
     
+    # Bildirim kayıtlarını toplu yaz (write-behind)
+    scheduler.add_job(
+        flush_write_buffer,
+        IntervalTrigger(seconds=WRITE_BUFFER_FLUSH_SECONDS),
+        id='write_buffer_flush',
+        name='Bildirim Kayıtları Flush',
+        replace_existing=True
+    )
+    
     # Haftalık reset Pazartesi 04:00
     scheduler.add_job(
         weekly_reset_job,
@@ -74,6 +152,33 @@ def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextCh
         replace_existing=True
     )
     
+    # Olay günlüğü: önümüzdeki ayların bölümleri (PostgreSQL)
+    scheduler.add_job(
+        ensure_event_partitions,
+        CronTrigger(hour=3, minute=30),
+        id='event_partitions',
+        name='Olay Bölümleri',
+        replace_existing=True
+    )
+    
+    # SQLite planlayıcı istatistikleri (PostgreSQL'de autovacuum yapar)
+    scheduler.add_job(
+        refresh_sqlite_statistics,
+        CronTrigger(hour=3, minute=45),
+        id='sqlite_statistics',
+        name='SQLite İstatistikleri',
+        replace_existing=True
+    )
+    
+    # Saklama süresi dolan bildirim mesajı kayıtları
+    scheduler.add_job(
+        prune_notification_messages,
+        CronTrigger(hour=3, minute=50),
+        id='message_prune',
+        name='Mesaj Kaydı Temizliği',
+        replace_existing=True
+    )
+    
     # Haftalık hatırlatmalar
     scheduler.add_job(
         weekly_reminder_job,
@@ -94,93 +199,273 @@ def setup_scheduler(bot: commands.Bot, fallback_channel: Optional[discord.TextCh
     
     scheduler.start()
     print("📅 Zamanlayıcı başlatıldı:")
-    print("   ⚡ Ana döngü: 1 dakika")
+    print(f"   ⚡ Ana döngü: 1 dakika ({len(bot.guilds)} sunucu, eşzamanlı {GUILD_CYCLE_CONCURRENCY})")
     print("   ⏳ Ön bildirim: aktif")
     print("   🔄 Otomatik yenileme: 60 dakika")
+    print(f"   💾 Yerel kopya: {DB_SNAPSHOT_MINUTES} dakika")
 
 
-async def get_channel_for_category(category_name: str) -> Optional[discord.TextChannel]:
-    """Kategori için Discord kanalı al."""
-    global scheduler
-    
-    if not scheduler or not scheduler.bot.guilds:
-        return scheduler.fallback_channel if scheduler else None
-    
-    guild = scheduler.bot.guilds[0]
-    
-    for cat in get_all_categories():
-        if cat['name'] == category_name and cat.get('discord_channel_id'):
+def get_fallback_channel(guild: discord.Guild) -> Optional[discord.TextChannel]:
+    """Sunucunun genel bildirim kanalı (kategori kanalı yoksa)."""
+    if not scheduler:
+        return None
+    return scheduler.fallback_channels.get(guild.id)
+
+
+async def get_channel_for_category(
+    guild: discord.Guild,
+    category_name: str,
+    category_id: Optional[int] = None
+) -> Optional[discord.TextChannel]:
+    """Sunucuda kategori için Discord kanalı al (yönlendirme tablosundan)."""
+    ch = await channel_router.resolve(guild, category_name, category_id)
+    if ch:
+        return ch
+    
+    return get_fallback_channel(guild)
+
+
+# =============================================================================
+# Sunucu başına çalıştırma
+# =============================================================================
+
+GuildJob = Callable[[discord.Guild], Awaitable[None]]
+
+
+async def run_in_guild(guild: discord.Guild, job: GuildJob) -> None:
+    """
+    İşi sunucunun kapsamında, eşzamanlılık sınırı altında çalıştır.
+    Bir sunucudaki hata diğer sunuculara taşınmaz.
+    """
+    async with _cycle_slots:
+        with guild_scope(guild.id):
             try:
-                ch = guild.get_channel(int(cat['discord_channel_id']))
-                if ch:
-                    return ch
-            except:
-                pass
-    
-    return scheduler.fallback_channel if scheduler else None
+                await job(guild)
+            except Exception as e:
+                print(f"❌ Sunucu {guild.id} ({getattr(guild, 'name', '?')}): {e}")
+
+
+def dispatch_guild_cycles(guilds: Iterable[discord.Guild], job: GuildJob) -> List[asyncio.Task]:
+    """
+    Her sunucu için işi ayrı task olarak başlat ve beklemeden dön.
+    Önceki çalıştırması sürmekte olan sunucu atlanır. Başlatılan task'ları döndürür.
+    """
+    started = []
+    for guild in guilds:
+        running = _guild_cycles.get(guild.id)
+        if running is not None and not running.done():
+            continue
+        
+        task = asyncio.create_task(run_in_guild(guild, job))
+        _guild_cycles[guild.id] = task
+        started.append(task)
+    return started
 
 
+async def run_for_all_guilds(job: GuildJob) -> None:
+    """Zamanlanmış işi (reset, hatırlatma) tüm sunucularda çalıştır ve bitmesini bekle."""
+    if not scheduler:
+        return
+    await asyncio.gather(*(run_in_guild(guild, job) for guild in scheduler.bot.guilds))
+
+
+# =============================================================================
+# Ana döngü
+# =============================================================================
+
 async def main_check_cycle() -> None:
-    """Ana 1-dakikalık döngü."""
+    """
+    Ana 1-dakikalık döngü: her sunucu için guild_check_cycle() başlatır.
+    Sunucu döngüleri birbirini beklemez (bkz. dispatch_guild_cycles).
+    """
     global scheduler
     
     if not scheduler:
         return
     
-    if not is_bot_active():
+    if not await recover_data_layer():
+        dispatch_guild_cycles(scheduler.bot.guilds, degraded_check_cycle)
         return
     
-    # 1. Ön bildirimler
-    await send_pre_notifications()
+    # Tampondaki bildirim kayıtları snapshot'lardan önce yazılsın
+    await flush_write_buffer()
+    # Diğer replikaların gönderdiği mesajlar (reaksiyonlar bellekten çözülür)
+    await sync_message_registry()
     
-    # 2. Hazır görev bildirimleri
-    await send_available_notifications()
-    
-    # 3. Eski bildirimleri yenile
-    await refresh_stale_messages()
+    dispatch_guild_cycles(scheduler.bot.guilds, guild_check_cycle)
 
 
-async def send_pre_notifications() -> None:
-    """Ön bildirimler gönder."""
-    global scheduler
-    
-    tasks = get_tasks_needing_pre_notification()
+async def recover_data_layer() -> bool:
+    """
+    Kesintiden dönüş: deneme bağlantısı, (başlangıçta kurulamadıysa) şema,
+    ardından tampondaki kayıtlar ve reaksiyon günlüğü. Günlükteki geçişler
+    mesaj koşullu olduğundan tampondaki bildirim kayıtları önce yazılır.
+    Veritabanı kullanılabilirse True: devre kapalı ve şema hazır. Yarı açık
+    devre (deneme sürüyor ya da sonuçlanmadı) kesinti sayılır.
+    """
+    if not circuit.is_open and scheduler.db_ready and not pending_journal_entries():
+        return True
+    
+    if not await probe_database():
+        return False
+    
+    if not scheduler.db_ready:
+        if not await init_db():
+            return False
+        scheduler.db_ready = True
+        await sync_message_registry()
+    
+    await flush_write_buffer()
+    done, applied = await replay_reaction_journal()
+    if done:
+        print(f"📝 Reaksiyon günlüğü yazıldı: {done} kayıt ({applied} geçiş)")
+    return not circuit.is_open
+
+
+async def degraded_check_cycle(guild: discord.Guild) -> None:
+    """
+    Kesinti modunda sunucu döngüsü: yerel kopyadan ön bildirim ve hazır
+    bildirimler. Karakter modundaki sunucular (karakter durumları yerel
+    kopyada yok) ve eski mesaj yenileme atlanır.
+    """
+    if not await is_bot_active() or await uses_character_notifications():
+        return
     
+    tasks = await get_all_tasks_with_status()
     if not tasks:
         return
     
+    budget = MAX_NOTIFICATIONS_PER_CYCLE
+    budget -= await send_pre_notifications(guild, snapshot=tasks, budget=budget)
+    await send_available_notifications(guild, snapshot=tasks, budget=budget)
+
+
+async def guild_check_cycle(guild: discord.Guild) -> None:
+    """
+    Tek sunucunun döngüsü (guild_scope içinde çağrılır).
+    Seçim aşamaları tek unit_of_work() içinde çalışır: tek bağlantı, tutarlı
+    okuma snapshot'ı ve birlikte commit edilen ilk durum kayıtları. Birim
+    commit edildikten sonra görevler kiralanır ve Discord'a gönderilir; açık
+    transaction gönderim beklemeleri boyunca tutulmaz, kiralamalar ve tampon
+    flush'ı birimin satırlarıyla çakışmaz.
+    Hazır olma koşulları SQL'de değerlendirilir; yalnızca bildirilecek görevler yüklenir.
+    Mesaj bütçesi aşamalar arasında seçilen mesaj sayısıyla paylaşılır.
+    Karakter modu açık (character_notifications) ve kayıtlı karakter varsa
+    bildirimler karakter başına gönderilir; aksi halde ortak bildirimler.
+    """
+    if not await is_bot_active():
+        return
+    
+    async with unit_of_work():
+        budget = MAX_NOTIFICATIONS_PER_CYCLE
+        
+        if await uses_character_notifications():
+            pre_groups = await select_character_pre_notifications(budget)
+            budget -= len(pre_groups)
+            groups = await select_character_notifications(budget)
+            stages = [
+                (deliver_character_pre_notifications, pre_groups),
+                (deliver_character_notifications, groups),
+            ]
+        else:
+            # 1. Ön bildirimler
+            pre_tasks = await select_pre_notifications(budget=budget)
+            budget -= len(pre_tasks)
+            
+            # 2. Hazır görev bildirimleri
+            grouped = await select_available_notifications(budget=budget)
+            budget -= sum(len(tasks) for tasks in grouped.values())
+            
+            # 3. Eski bildirimler
+            stale_tasks = await select_stale_messages(budget)
+            stages = [
+                (deliver_pre_notifications, pre_tasks),
+                (deliver_available_notifications, grouped),
+                (deliver_stale_messages, stale_tasks),
+            ]
+    
+    for deliver, selected in stages:
+        if selected:
+            await deliver(guild, selected)
+
+
+# =============================================================================
+# Bildirim aşamaları: select_* (birim içinde) / deliver_* (kiralama + gönderim)
+# =============================================================================
+
+async def select_pre_notifications(
+    snapshot: Optional[List[TaskRecord]] = None,
+    budget: int = MAX_NOTIFICATIONS_PER_CYCLE
+) -> List[TaskRecord]:
+    """Ön bildirim gereken görevler (en fazla `budget`)."""
+    if budget <= 0:
+        return []
+    return await get_tasks_needing_pre_notification(snapshot, limit=budget)
+
+
+async def deliver_pre_notifications(guild: discord.Guild, tasks: List[TaskRecord]) -> int:
+    """Ön bildirimleri kirala ve gönder; gönderilen mesaj sayısını döndürür."""
+    # Çoklu replika: yalnızca kiralayabildiğimiz görevleri gönder
+    claimed = await claim_tasks([t.id for t in tasks])
+    tasks = [t for t in tasks if t.id in claimed]
+    
     from src.bot.notifications import send_pre_notification
     
+    sent = 0
     for task in tasks:
-        cat_name = task.get('category_name', 'Bilinmeyen')
-        channel = await get_channel_for_category(cat_name)
+        cat_name = task.category_name
+        channel = await get_channel_for_category(guild, cat_name, task.category_id)
         
         if not channel:
             continue
         
         try:
             await send_pre_notification(channel, task)
-            mark_pre_notified(task['id'])
+            write_buffer.record(pre_notified_update(task.id))
+            sent += 1
             await asyncio.sleep(MESSAGE_DELAY)
         except Exception as e:
             print(f"Ön bildirim hatası: {e}")
+    
+    return sent
 
 
-async def send_available_notifications() -> None:
-    """Hazır görev bildirimleri gönder."""
-    global scheduler
-    
-    grouped = get_tasks_grouped_by_category()
-    
-    if not grouped:
-        return
+async def send_pre_notifications(
+    guild: discord.Guild,
+    snapshot: Optional[List[TaskRecord]] = None,
+    budget: int = MAX_NOTIFICATIONS_PER_CYCLE
+) -> int:
+    """Ön bildirimler gönder; gönderilen mesaj sayısını döndürür."""
+    tasks = await select_pre_notifications(snapshot, budget)
+    return await deliver_pre_notifications(guild, tasks) if tasks else 0
+
+
+async def select_available_notifications(
+    snapshot: Optional[List[TaskRecord]] = None,
+    budget: int = MAX_NOTIFICATIONS_PER_CYCLE
+) -> Dict[str, List[TaskRecord]]:
+    """Bildirim gereken görevler kategoriye göre (en fazla `budget`)."""
+    if budget <= 0:
+        return {}
+    # Bütçeyi aşan görevler sonraki döngüde yine seçilir
+    return await get_tasks_grouped_by_category(snapshot, limit=budget)
+
+
+async def deliver_available_notifications(guild: discord.Guild, grouped: Dict[str, List[TaskRecord]]) -> int:
+    """Hazır görevleri kirala ve bildir; gönderilen mesaj sayısını döndürür."""
+    # Çoklu replika: yalnızca kiralayabildiğimiz görevleri gönder
+    claimed = await claim_tasks([t.id for tasks in grouped.values() for t in tasks])
     
     from src.bot.notifications import send_lite_notification
     
     total = 0
     
     for cat_name, tasks in grouped.items():
-        channel = await get_channel_for_category(cat_name)
+        tasks = [t for t in tasks if t.id in claimed]
+        if not tasks:
+            continue
+        
+        channel = await get_channel_for_category(guild, cat_name)
         if not channel:
             continue
         
@@ -194,41 +479,137 @@ async def send_available_notifications() -> None:
                 await asyncio.sleep(2)
     
     if total > 0:
-        print(f"⚡ {total} bildirim gönderildi")
+        print(f"⚡ {guild.name}: {total} bildirim gönderildi")
+    
+    return total
 
 
-async def refresh_stale_messages() -> None:
-    """Eski mesajları sil ve yeniden bildir."""
-    global scheduler
-    
-    if not scheduler or not scheduler.bot.guilds:
-        return
+async def send_available_notifications(
+    guild: discord.Guild,
+    snapshot: Optional[List[TaskRecord]] = None,
+    budget: int = MAX_NOTIFICATIONS_PER_CYCLE
+) -> int:
+    """Hazır görev bildirimleri gönder; gönderilen mesaj sayısını döndürür."""
+    grouped = await select_available_notifications(snapshot, budget)
+    return await deliver_available_notifications(guild, grouped) if grouped else 0
+
+
+async def select_character_pre_notifications(budget: int = MAX_NOTIFICATIONS_PER_CYCLE) -> List[Dict]:
+    """Karakter ön bildirim grupları (görev başına bir mesaj, en fazla `budget`)."""
+    if budget <= 0:
+        return []
+    return await get_character_pre_notifications(limit=budget)
+
+
+async def deliver_character_pre_notifications(guild: discord.Guild, groups: List[Dict]) -> int:
+    """Karakter ön bildirimlerini kirala ve gönder; gönderilen mesaj sayısını döndürür."""
+    # Çoklu replika: yalnızca alabildiğimiz (karakter, görev) çiftleri gönderilir
+    claimed = await claim_character_pre_notifications(
+        [c["status_id"] for g in groups for c in g["characters"]]
+    )
     
-    guild = scheduler.bot.guilds[0]
+    from src.bot.notifications import send_character_pre_notification
     
-    try:
-        refresh_mins = int(get_setting('auto_refresh_minutes', '60'))
-    except:
-        refresh_mins = 60
+    sent = 0
+    status_ids: List[int] = []
+    for group in _claimed_groups(groups, claimed):
+        channel = await get_channel_for_category(guild, group["category_name"], group["category_id"])
+        if not channel:
+            continue
+        
+        try:
+            await send_character_pre_notification(channel, group)
+            status_ids.extend(c["status_id"] for c in group["characters"])
+            sent += 1
+            await asyncio.sleep(MESSAGE_DELAY)
+        except Exception as e:
+            print(f"Karakter ön bildirim hatası: {e}")
     
-    stale_tasks = get_stale_notifications(refresh_mins)
+    # Yalnızca gönderilenler işaretlenir; diğerleri kira dolunca yeniden seçilir
+    await record_character_pre_notifications(status_ids)
     
-    if not stale_tasks:
-        return
+    return sent
+
+
+async def select_character_notifications(budget: int = MAX_NOTIFICATIONS_PER_CYCLE) -> List[Dict]:
+    """Hazır (karakter, görev) çiftleri, görev başına gruplanmış (en fazla `budget` grup)."""
+    if budget <= 0:
+        return []
+    return await get_character_notifications(limit=budget)
+
+
+async def deliver_character_notifications(guild: discord.Guild, groups: List[Dict]) -> int:
+    """
+    Hazır (karakter, görev) çiftlerini görev başına tek mesajla bildir.
+    Kiralama ve gönderim kaydı (mesaj kimliği + last_notified_at) karakter
+    sayısından bağımsız olarak sabit sayıda sorgudur; gönderilemeyen çiftler
+    kira dolunca yeniden seçilir. Gönderilen mesaj sayısını döndürür.
+    """
+    claimed = await claim_character_notifications(
+        [c["status_id"] for g in groups for c in g["characters"]]
+    )
     
-    from src.bot.notifications import send_lite_notification
+    from src.bot.notifications import send_character_notification
     
-    for task in stale_tasks:
-        fresh = get_task_by_id(task['id'])
-        if not fresh:
+    message_ids: Dict[int, str] = {}
+    for group in _claimed_groups(groups, claimed):
+        channel = await get_channel_for_category(guild, group["category_name"], group["category_id"])
+        if not channel:
             continue
         
-        fresh_status = get_task_with_status(fresh)
+        try:
+            message = await send_character_notification(channel, group)
+            for character in group["characters"]:
+                message_ids[character["status_id"]] = str(message.id)
+            await asyncio.sleep(MESSAGE_DELAY)
+        except Exception as e:
+            print(f"Karakter bildirim hatası: {e}")
+            await asyncio.sleep(2)
+    
+    await record_character_messages(message_ids)
+    
+    sent = len(set(message_ids.values()))
+    if sent > 0:
+        print(f"⚡ {guild.name}: {sent} karakter bildirimi gönderildi")
+    
+    return sent
+
+
+def _claimed_groups(groups: List[Dict], claimed: set) -> List[Dict]:
+    """Grupları yalnızca kiralanan karakterlerle döndür (boş kalanlar atlanır)."""
+    result = []
+    for group in groups:
+        characters = [c for c in group["characters"] if c["status_id"] in claimed]
+        if characters:
+            result.append({**group, "characters": characters})
+    return result
+
+
+async def select_stale_messages(budget: int = MAX_NOTIFICATIONS_PER_CYCLE) -> List[TaskRecord]:
+    """Yenilenecek eski bildirimler (en fazla `budget`)."""
+    if budget <= 0:
+        return []
+    
+    refresh_mins = await get_int_setting('auto_refresh_minutes', AUTO_REFRESH_MINUTES)
+    return await get_stale_notifications(refresh_mins, limit=budget)
+
+
+async def deliver_stale_messages(guild: discord.Guild, stale_tasks: List[TaskRecord]) -> int:
+    """Eski mesajları kirala, sil ve yeniden bildir; yenilenen mesaj sayısını döndürür."""
+    claimed = await claim_tasks([t.id for t in stale_tasks])
+    stale_tasks = [t for t in stale_tasks if t.id in claimed]
+    
+    from src.bot.notifications import send_lite_notification, delete_notification_message
+    
+    refreshed = 0
+    for task in stale_tasks:
+        # Seçimdeki kayıt - görevi yeniden okumaya gerek yok
+        fresh_status = get_task_with_status(task)
         
-        if not (fresh_status.get('is_available') or fresh_status.get('is_open')):
+        if not (fresh_status.is_available or fresh_status.is_open):
             continue
         
-        channel_id = task.get('discord_channel_id')
+        channel_id = task.discord_channel_id
         channel = None
         
         if channel_id:
@@ -238,69 +619,124 @@ async def refresh_stale_messages() -> None:
                 pass
         
         if not channel:
-            channel = await get_channel_for_category(task.get('category_name', ''))
+            channel = await get_channel_for_category(guild, task.category_name, task.category_id)
         
         if not channel:
             continue
         
-        old_msg_id = task.get('notification_message_id')
+        old_msg_id = task.notification_message_id
         if old_msg_id:
-            try:
-                old_msg = await channel.fetch_message(int(old_msg_id))
-                await old_msg.delete()
-            except:
-                pass
+            # Kanal kayıttan bilinir: mesaj getirilmeden silinir
+            await delete_notification_message(guild, old_msg_id, channel)
         
         try:
             await send_lite_notification(channel, fresh_status)
-            print(f"🔄 Yenilendi: {task['name']}")
+            refreshed += 1
+            print(f"🔄 Yenilendi: {task.name}")
             await asyncio.sleep(MESSAGE_DELAY)
         except Exception as e:
             print(f"Yenileme hatası: {e}")
+    
+    return refreshed
+
+
+async def refresh_stale_messages(guild: discord.Guild, budget: int = MAX_NOTIFICATIONS_PER_CYCLE) -> int:
+    """Eski mesajları sil ve yeniden bildir; yenilenen mesaj sayısını döndürür."""
+    stale_tasks = await select_stale_messages(budget)
+    return await deliver_stale_messages(guild, stale_tasks) if stale_tasks else 0
+
+
+# =============================================================================
+# Yerel kopya (kesinti modu)
+# =============================================================================
+
+async def local_snapshot_job() -> None:
+    """Tüm sunucuların yerel kopyasını yenile ve dosyaya yaz (veritabanı erişilebilirken)."""
+    if circuit.is_open or not scheduler.db_ready:
+        return
+    
+    # Tampondaki kayıtlar kopyada kaybolmasın
+    await flush_write_buffer()
+    await run_for_all_guilds(refresh_guild_snapshot)
+    await save_local_snapshot()
+
+
+async def refresh_guild_snapshot(guild: discord.Guild) -> None:
+    await refresh_local_snapshot()
+
+
+# =============================================================================
+# Reset ve hatırlatma işleri - sunucu başına
+# =============================================================================
+
+async def claim_scheduled_run(job_name: str, guild: discord.Guild) -> bool:
+    """Sunucu için bu günün çalıştırmasını al; başka bir replika aldıysa False."""
+    run_key = get_current_time_naive().date().isoformat()
+    if await claim_job_run(f"{job_name}:{guild.id}", run_key):
+        return True
+    print(f"⏭️ {job_name} ({guild.id}, {run_key}) başka bir replikada çalıştı")
+    return False
 
 
 async def daily_reset_job() -> None:
-    """Günlük reset."""
-    if not is_bot_active():
-        reset_daily_tasks()
+    """Günlük reset (tüm sunucular)."""
+    await run_for_all_guilds(daily_reset_guild)
+
+
+async def daily_reset_guild(guild: discord.Guild) -> None:
+    # Hiçbir satır yazılmaz: günlük tamamlanma son reset sınırından türetilir
+    # (bkz. schedule.completed_in_period), iş yalnızca reseti duyurur.
+    # İş kaçırılsa bile görevler 04:00'te yeniden hazır görünür.
+    if not await is_bot_active():
         return
     
-    count = reset_daily_tasks()
-    print(f"🌅 Günlük reset: {count}")
+    if not await claim_scheduled_run('daily_reset', guild):
+        return
     
-    channel = await get_channel_for_category('Daily Quests')
-    if not channel and scheduler:
-        channel = scheduler.fallback_channel
+    count = await count_tasks_by_type('daily')
+    print(f"🌅 Günlük reset ({guild.name}): {count}")
+    
+    channel = await get_channel_for_category(guild, 'Daily Quests')
     
     if channel:
         await channel.send(f"🌅 **Günlük Reset** - {count} görev sıfırlandı!")
 
 
 async def weekly_reset_job() -> None:
-    """Haftalık reset."""
-    if not is_bot_active():
-        reset_weekly_tasks()
+    """Haftalık reset (tüm sunucular)."""
+    await run_for_all_guilds(weekly_reset_guild)
+
+
+async def weekly_reset_guild(guild: discord.Guild) -> None:
+    # Günlük reset gibi yalnızca duyuru (bkz. daily_reset_guild)
+    if not await is_bot_active():
+        return
+    
+    if not await claim_scheduled_run('weekly_reset', guild):
         return
     
-    count = reset_weekly_tasks()
-    print(f"📆 Haftalık reset: {count}")
+    count = await count_tasks_by_type('weekly')
+    print(f"📆 Haftalık reset ({guild.name}): {count}")
     
-    channel = await get_channel_for_category('Weekly Quests')
-    if not channel and scheduler:
-        channel = scheduler.fallback_channel
+    channel = await get_channel_for_category(guild, 'Weekly Quests')
     
     if channel:
         await channel.send(f"📆 **Haftalık Reset** - {count} görev sıfırlandı!")
 
 
 async def weekly_reminder_job() -> None:
-    """Haftalık hatırlatma."""
-    if not is_bot_active():
+    """Haftalık hatırlatma (tüm sunucular)."""
+    await run_for_all_guilds(weekly_reminder_guild)
+
+
+async def weekly_reminder_guild(guild: discord.Guild) -> None:
+    if not await is_bot_active():
+        return
+    
+    if not await claim_scheduled_run('weekly_reminder', guild):
         return
     
-    channel = await get_channel_for_category('Weekly Quests')
-    if not channel and scheduler:
-        channel = scheduler.fallback_channel
+    channel = await get_channel_for_category(guild, 'Weekly Quests')
     
     if channel:
         from src.bot.notifications import send_weekly_reminder
@@ -308,13 +744,18 @@ async def weekly_reminder_job() -> None:
 
 
 async def daily_reminder_job() -> None:
-    """Günlük hatırlatma."""
-    if not is_bot_active():
+    """Günlük hatırlatma (tüm sunucular)."""
+    await run_for_all_guilds(daily_reminder_guild)
+
+
+async def daily_reminder_guild(guild: discord.Guild) -> None:
+    if not await is_bot_active():
+        return
+    
+    if not await claim_scheduled_run('daily_reminder', guild):
         return
     
-    channel = await get_channel_for_category('Daily Quests')
-    if not channel and scheduler:
-        channel = scheduler.fallback_channel
+    channel = await get_channel_for_category(guild, 'Daily Quests')
     
     if channel:
         from src.bot.notifications import send_daily_reminder
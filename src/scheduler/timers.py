@@ -7,11 +7,13 @@ Works on all environments: local, Railway, PostgreSQL.
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 import os
 
 from dotenv import load_dotenv
 
+from src.utils.time_utils import get_last_daily_reset, get_last_weekly_reset
+
 load_dotenv()
 
 # Get timezone offset for Istanbul (UTC+3)
@@ -72,14 +74,17 @@ def to_naive_datetime(dt: Optional[Union[datetime, str]]) -> Optional[datetime]:
     Handles: None, naive datetime, aware datetime, ISO string.
     
     STRATEGY: Convert everything to naive for safe comparison.
+    The data layer already hands over naive datetimes, so that case returns
+    immediately; strings are only expected from edges (forms, imports).
     """
     if dt is None:
         return None
     
-    # Debug logging for Railway
-    print(f"🔍 to_naive_datetime input: {type(dt).__name__} = {dt}")
+    # Fast path: naive datetime - already Istanbul time
+    if isinstance(dt, datetime) and dt.tzinfo is None:
+        return dt
     
-    # Handle string input (ISO format from PostgreSQL)
+    # Handle string input (ISO format)
     if isinstance(dt, str):
         try:
             dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
@@ -100,25 +105,22 @@ def to_naive_datetime(dt: Optional[Union[datetime, str]]) -> Optional[datetime]:
             # Add Istanbul offset
             istanbul_dt = utc_dt + ISTANBUL_OFFSET
             # Return as naive
-            result = istanbul_dt.replace(tzinfo=None)
-            print(f"✅ Aware -> Naive Istanbul: {result}")
-            return result
+            return istanbul_dt.replace(tzinfo=None)
         except Exception as e:
             print(f"⚠️ Timezone conversion failed: {e}")
             # Fallback: just strip tzinfo
             return dt.replace(tzinfo=None)
     
-    # Already naive - assume it's already in Istanbul time
-    print(f"✅ Already naive: {dt}")
+    # Already naive (parsed string) - assume it's already in Istanbul time
     return dt
 
 
-def format_time_remaining(target_time: Optional[datetime]) -> str:
+def format_time_remaining(target_time: Optional[datetime], now: Optional[datetime] = None) -> str:
     """Format time remaining until target (both as naive datetimes)."""
     if target_time is None:
         return "Bilinmiyor"
     
-    current = get_current_time_naive()
+    current = now or get_current_time_naive()
     target = to_naive_datetime(target_time)
     
     if target is None:
@@ -151,18 +153,15 @@ def format_time_remaining(target_time: Optional[datetime]) -> str:
 
 def calculate_cooldown_status(
     last_completed_at: Optional[Union[datetime, str]],
-    cooldown_minutes: int
+    cooldown_minutes: int,
+    now: Optional[datetime] = None
 ) -> TaskStatus:
     """
     Calculate status for a cooldown-based task.
     FORCED NAIVE COMPARISON - guaranteed to work everywhere.
     """
     # Get current time as NAIVE
-    current_naive = get_current_time_naive()
-    
-    print(f"📊 calculate_cooldown_status:")
-    print(f"   current_naive = {current_naive} (type: {type(current_naive).__name__})")
-    print(f"   last_completed_at = {last_completed_at} (type: {type(last_completed_at).__name__ if last_completed_at else 'None'})")
+    current_naive = now or get_current_time_naive()
     
     # Never completed = available
     if last_completed_at is None:
@@ -184,10 +183,6 @@ def calculate_cooldown_status(
     # Calculate availability (NAIVE datetime)
     available_at_naive = last_completed_naive + timedelta(minutes=cooldown_minutes)
     
-    print(f"   last_completed_naive = {last_completed_naive}")
-    print(f"   available_at_naive = {available_at_naive}")
-    print(f"   current_naive >= available_at_naive = {current_naive >= available_at_naive}")
-    
     # FORCED NAIVE COMPARISON - LINE 87 IS NOW SAFE
     if current_naive >= available_at_naive:
         return TaskStatus(
@@ -196,7 +191,7 @@ def calculate_cooldown_status(
             available_at=available_at_naive
         )
     else:
-        time_remaining = format_time_remaining(available_at_naive)
+        time_remaining = format_time_remaining(available_at_naive, current_naive)
         return TaskStatus(
             state=TaskState.ON_COOLDOWN,
             message=f"{time_remaining} sonra hazır",
@@ -208,13 +203,14 @@ def calculate_cooldown_status(
 def calculate_instance_status(
     instance_entered_at: Optional[Union[datetime, str]],
     active_duration_minutes: int,
-    cooldown_minutes: int
+    cooldown_minutes: int,
+    now: Optional[datetime] = None
 ) -> TaskStatus:
     """
     Calculate status for an instance-type task.
     FORCED NAIVE COMPARISON.
     """
-    current_naive = get_current_time_naive()
+    current_naive = now or get_current_time_naive()
     
     if instance_entered_at is None:
         return TaskStatus(
@@ -237,7 +233,7 @@ def calculate_instance_status(
     
     # FORCED NAIVE COMPARISONS
     if current_naive < close_time_naive:
-        time_remaining = format_time_remaining(close_time_naive)
+        time_remaining = format_time_remaining(close_time_naive, current_naive)
         return TaskStatus(
             state=TaskState.INSTANCE_OPEN,
             message=f"AÇIK - {time_remaining} sonra kapanacak",
@@ -246,7 +242,7 @@ def calculate_instance_status(
             time_remaining=time_remaining
         )
     elif current_naive < available_at_naive:
-        time_remaining = format_time_remaining(available_at_naive)
+        time_remaining = format_time_remaining(available_at_naive, current_naive)
         return TaskStatus(
             state=TaskState.ON_COOLDOWN,
             message=f"Kapalı - {time_remaining} sonra açılacak",
@@ -261,9 +257,9 @@ def calculate_instance_status(
         )
 
 
-def calculate_daily_status(is_completed: bool) -> TaskStatus:
+def calculate_daily_status(is_completed: bool, now: Optional[datetime] = None) -> TaskStatus:
     """Calculate status for a daily reset task."""
-    current_naive = get_current_time_naive()
+    current_naive = now or get_current_time_naive()
     reset_hour = int(os.getenv("DAILY_RESET_HOUR", "4"))
     reset_minute = int(os.getenv("DAILY_RESET_MINUTE", "0"))
     
@@ -273,7 +269,7 @@ def calculate_daily_status(is_completed: bool) -> TaskStatus:
         next_reset += timedelta(days=1)
     
     if is_completed:
-        time_remaining = format_time_remaining(next_reset)
+        time_remaining = format_time_remaining(next_reset, current_naive)
         return TaskStatus(
             state=TaskState.COMPLETED,
             message=f"Bugün tamamlandı! {time_remaining} sonra sıfırlanacak",
@@ -287,9 +283,9 @@ def calculate_daily_status(is_completed: bool) -> TaskStatus:
         )
 
 
-def calculate_weekly_status(is_completed: bool) -> TaskStatus:
+def calculate_weekly_status(is_completed: bool, now: Optional[datetime] = None) -> TaskStatus:
     """Calculate status for a weekly reset task."""
-    current_naive = get_current_time_naive()
+    current_naive = now or get_current_time_naive()
     reset_hour = int(os.getenv("DAILY_RESET_HOUR", "4"))
     reset_minute = int(os.getenv("DAILY_RESET_MINUTE", "0"))
     reset_day = int(os.getenv("WEEKLY_RESET_DAY", "0"))  # Monday = 0
@@ -302,7 +298,7 @@ def calculate_weekly_status(is_completed: bool) -> TaskStatus:
     if days_until == 0 and current_naive >= next_reset:
         next_reset += timedelta(days=7)
     
-    time_remaining = format_time_remaining(next_reset)
+    time_remaining = format_time_remaining(next_reset, current_naive)
     
     if is_completed:
         return TaskStatus(
@@ -321,32 +317,98 @@ def calculate_weekly_status(is_completed: bool) -> TaskStatus:
         )
 
 
+def get_period_start(reset_type: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Start of the current completion period: the last daily/weekly reset before
+    `now` (NAIVE), or None for task types that are not reset on a boundary.
+    """
+    current_naive = now or get_current_time_naive()
+    if reset_type == 'daily':
+        return get_last_daily_reset(current_naive)
+    if reset_type == 'weekly':
+        return get_last_weekly_reset(current_naive)
+    return None
+
+
+def is_completed_in_period(
+    reset_type: str,
+    is_completed: bool = False,
+    last_completed_at: Optional[Union[datetime, str]] = None,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Whether a task counts as completed at `now`.
+    Daily/weekly completion is derived from last_completed_at: a completion
+    before the last reset boundary belongs to an earlier period, so nothing has
+    to be written when the reset happens (and a missed reset job changes nothing).
+    Other task types keep their stored is_completed flag.
+    SQL counterpart: schedule.completed_in_period().
+    """
+    period_start = get_period_start(reset_type, now)
+    if period_start is None:
+        return bool(is_completed)
+    
+    completed = to_naive_datetime(last_completed_at)
+    return completed is not None and completed >= period_start
+
+
+def last_status_in_period(
+    reset_type: str,
+    last_status: Optional[str],
+    last_notified_at: Optional[Union[datetime, str]] = None,
+    last_completed_at: Optional[Union[datetime, str]] = None,
+    now: Optional[datetime] = None
+) -> str:
+    """
+    last_status as seen at `now`: a daily/weekly status written before the last
+    reset boundary (no notification or completion since) reads as "reset", the
+    value the reset job used to write. Missing status reads as "initialized".
+    SQL counterpart: schedule.status_in_period().
+    """
+    if last_status is None:
+        return "initialized"
+    
+    period_start = get_period_start(reset_type, now)
+    if period_start is None or last_status in ("initialized", "reset"):
+        return last_status
+    
+    for moment in (to_naive_datetime(last_notified_at), to_naive_datetime(last_completed_at)):
+        if moment is not None and moment >= period_start:
+            return last_status
+    return "reset"
+
+
 def get_task_status(
     reset_type: str,
     is_completed: bool = False,
     last_completed_at: Optional[Union[datetime, str]] = None,
     instance_entered_at: Optional[Union[datetime, str]] = None,
     cooldown_minutes: int = 0,
-    active_duration_minutes: int = 0
+    active_duration_minutes: int = 0,
+    now: Optional[datetime] = None
 ) -> TaskStatus:
     """
     Universal function to get task status.
     All datetime comparisons use FORCED NAIVE strategy.
+    `now` lets a caller evaluating many tasks read the clock once.
+    For daily/weekly tasks `is_completed` is the derived value
+    (is_completed_in_period; task reads already return it that way).
     """
     if reset_type == 'daily':
-        return calculate_daily_status(is_completed)
+        return calculate_daily_status(is_completed, now)
     
     elif reset_type == 'weekly':
-        return calculate_weekly_status(is_completed)
+        return calculate_weekly_status(is_completed, now)
     
     elif reset_type == 'cooldown':
-        return calculate_cooldown_status(last_completed_at, cooldown_minutes)
+        return calculate_cooldown_status(last_completed_at, cooldown_minutes, now)
     
     elif reset_type == 'instance':
         return calculate_instance_status(
             instance_entered_at, 
             active_duration_minutes, 
-            cooldown_minutes
+            cooldown_minutes,
+            now
         )
     
     else:
@@ -354,3 +416,45 @@ def get_task_status(
             state=TaskState.UNKNOWN,
             message=f"Bilinmeyen reset tipi: {reset_type}"
         )
+
+
+def calculate_schedule(
+    reset_type: str,
+    is_completed: bool = False,
+    last_completed_at: Optional[datetime] = None,
+    instance_entered_at: Optional[datetime] = None,
+    cooldown_minutes: int = 0,
+    active_duration_minutes: int = 0,
+    pre_notify_minutes: int = 0,
+    now: Optional[datetime] = None
+) -> Tuple[Optional[datetime], Optional[datetime], Optional[datetime]]:
+    """
+    Persisted schedule of a task: (next_available_at, closes_at, pre_notify_at).
+    These only change when the task is completed, entered, reset or edited, so
+    they are stored on task_status instead of being recomputed every cycle.
+    Daily/weekly tasks use the next reset after `now` (the moment of the change),
+    exactly as get_task_status() does.
+    """
+    next_available_at = None
+    closes_at = None
+    
+    if reset_type in ('daily', 'weekly'):
+        if is_completed:
+            next_available_at = get_task_status(reset_type, True, now=now).available_at
+    
+    elif reset_type == 'cooldown':
+        completed = to_naive_datetime(last_completed_at)
+        if completed is not None:
+            next_available_at = completed + timedelta(minutes=cooldown_minutes or 0)
+    
+    elif reset_type == 'instance':
+        entered = to_naive_datetime(instance_entered_at)
+        if entered is not None:
+            closes_at = entered + timedelta(minutes=active_duration_minutes or 0)
+            next_available_at = closes_at + timedelta(minutes=cooldown_minutes or 0)
+    
+    pre_notify_at = None
+    if next_available_at is not None and (pre_notify_minutes or 0) > 0:
+        pre_notify_at = next_available_at - timedelta(minutes=pre_notify_minutes)
+    
+    return next_available_at, closes_at, pre_notify_at
@@ -5,6 +5,7 @@ Europe/Istanbul (GMT+3) zaman dilimi kullanır.
 
 import os
 from datetime import datetime, timedelta, time
+from typing import Optional
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
@@ -82,9 +83,12 @@ def get_next_daily_reset() -> datetime:
     return reset_time
 
 
-def get_last_daily_reset() -> datetime:
-    """En son günlük sıfırlama zamanı."""
-    current = now()
+def get_last_daily_reset(current: Optional[datetime] = None) -> datetime:
+    """
+    En son günlük sıfırlama zamanı.
+    `current` verilirse o ana göre (naive ya da zaman dilimli, aynı biçimde döner).
+    """
+    current = current or now()
     reset_time = current.replace(
         hour=DAILY_RESET_HOUR,
         minute=DAILY_RESET_MINUTE,
@@ -118,9 +122,9 @@ def get_next_weekly_reset() -> datetime:
     return reset_time
 
 
-def get_last_weekly_reset() -> datetime:
-    """En son haftalık sıfırlama zamanı."""
-    current = now()
+def get_last_weekly_reset(current: Optional[datetime] = None) -> datetime:
+    """En son haftalık sıfırlama zamanı (`current` için bkz. get_last_daily_reset)."""
+    current = current or now()
     
     days_since_monday = (current.weekday() - WEEKLY_RESET_DAY) % 7
     
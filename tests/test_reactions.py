@@ -0,0 +1,60 @@
+"""
+Reaksiyon işleyici - bildirim türüne göre ortak durum / karakter durumu.
+Discord nesneleri yalnızca işleyicinin kullandığı alanlarla taklit edilir.
+"""
+
+import asyncio
+import contextlib
+import io
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from src.bot.reactions import handle_reaction_add, EMOJI_COMPLETE
+from src.database import characters, operations
+from src.database.messages import message_registry, message_row, KIND_NOTIFICATION
+from src.database.write_buffer import write_buffer
+
+BOT_ID = 700_000_000_000_000_001
+USER_ID = 800_000_000_000_000_001
+CHANNEL_ID = 710_000_000_000_000_001
+
+
+def _send_notification(task_id: int, message_id: int) -> None:
+    """Gönderim hattının ortak bildirim kaydı (bkz. notifications.register_message)."""
+    row = message_row(str(message_id), str(CHANNEL_ID), task_id, KIND_NOTIFICATION)
+    message_registry.add(row)
+    write_buffer.record_message(row)
+    write_buffer.record(operations.notification_sent_update(task_id, str(message_id)))
+    write_buffer.flush()
+
+
+def _reaction(message_id: int, emoji: str):
+    channel = SimpleNamespace(id=CHANNEL_ID, send=AsyncMock())
+    message = SimpleNamespace(
+        id=message_id,
+        author=SimpleNamespace(id=BOT_ID),
+        channel=channel,
+        edit=AsyncMock(),
+        clear_reactions=AsyncMock(),
+    )
+    return SimpleNamespace(emoji=emoji, message=message, remove=AsyncMock())
+
+
+def test_shared_notification_completed_by_user_with_character(guild, seed_tasks):
+    seed_tasks(1)
+    [task] = operations.get_all_tasks()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert characters.add_character(str(USER_ID), "Karakter")
+    message_id = 720_000_000_000_000_000 + task.id
+    _send_notification(task.id, message_id)
+
+    reaction = _reaction(message_id, EMOJI_COMPLETE)
+    user = SimpleNamespace(id=USER_ID, mention=f"<@{USER_ID}>")
+    bot = SimpleNamespace(user=SimpleNamespace(id=BOT_ID))
+    asyncio.run(handle_reaction_add(reaction, user, bot))
+
+    task = operations.get_task_with_status(operations.get_task_by_id(task.id))
+    assert task.last_status == "completed"
+    reaction.message.channel.send.assert_awaited_once()
+    reaction.message.clear_reactions.assert_awaited_once()
+    reaction.remove.assert_not_awaited()
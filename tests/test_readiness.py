@@ -0,0 +1,143 @@
+"""
+Hazır olma koşulları - SQL seçimi ile timers.py hesabının farksal testi.
+Rastgele görev durumları (NULL'lar ve `now` çevresindeki sınırlar dahil) için
+_select_*_due() == _filter_*_due() (bkz. benchmarks/readiness_differential.py).
+"""
+
+import contextlib
+import io
+import random
+from datetime import timedelta
+
+import pytest
+
+from src.database import operations
+from src.database.models import SessionLocal, Category, Task, TaskStatus, current_guild
+from src.database.schedule import refresh_schedules
+from src.scheduler.timers import get_current_time_naive
+
+COOLDOWN = 120
+NOW_SAMPLES = 15
+TASKS_PER_CATEGORY = 20
+RESET_TYPES = ("daily", "weekly", "cooldown", "instance", "unknown")
+LAST_STATUSES = (None, "initialized", "notified", "available", "open", "on_cooldown", "completed", "skipped", "reset")
+MINUTES = (None, 0, 1, 5, 30, 60, 120, 240, 1440)
+
+
+def _maybe(rng, value, none_ratio: float = 0.2):
+    return None if rng.random() < none_ratio else value
+
+
+def _random_time(rng, base):
+    # Sınıra denk gelen tam dakikalar ve alt-saniye kaymalar karışık
+    offset = timedelta(minutes=rng.choice((0, 1, 5, 30, 60, 120, 300, 1440, 3000)) * rng.choice((-1, 1)))
+    jitter = timedelta(microseconds=rng.choice((0, 0, 1, 500_000, rng.randrange(60_000_000))))
+    return base + offset - jitter
+
+
+def _populate(rng, base) -> None:
+    guild = current_guild()
+    session = SessionLocal()
+    try:
+        for reset_type in RESET_TYPES:
+            for c in range(2):
+                category = Category(
+                    guild_id=guild,
+                    name=f"{reset_type}-{c}",
+                    reset_type=reset_type,
+                    is_active=rng.random() > 0.1,
+                    pre_notify_minutes=_maybe(rng, rng.choice((0, 1, 5, 15, 30, 60, 120))),
+                )
+                session.add(category)
+                session.flush()
+
+                for t in range(TASKS_PER_CATEGORY):
+                    task = Task(
+                        guild_id=guild,
+                        category_id=category.id,
+                        name=f"Görev {t}",
+                        cooldown_minutes=_maybe(rng, rng.choice(MINUTES)),
+                        active_duration_minutes=_maybe(rng, rng.choice(MINUTES)),
+                        is_active=rng.random() > 0.1,
+                    )
+                    session.add(task)
+                    session.flush()
+
+                    # Bazı görevlerin task_status satırı hiç yok
+                    if rng.random() < 0.1:
+                        continue
+                    session.add(TaskStatus(
+                        task_id=task.id,
+                        is_completed=_maybe(rng, rng.random() < 0.5),
+                        last_completed_at=_maybe(rng, _random_time(rng, base), 0.3),
+                        instance_entered_at=_maybe(rng, _random_time(rng, base), 0.3),
+                        last_notified_at=_maybe(rng, _random_time(rng, base), 0.3),
+                        last_status=rng.choice(LAST_STATUSES),
+                        pre_notified=_maybe(rng, rng.random() < 0.3),
+                    ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _refresh(now) -> None:
+    session = SessionLocal()
+    try:
+        refresh_schedules(session, now=now, guild_id=current_guild())
+        session.commit()
+    finally:
+        session.close()
+
+
+def _describe(tasks):
+    return [(t.id, t.current_state) for t in tasks]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sql_readiness_matches_python(guild, seed):
+    rng = random.Random(seed)
+    base = get_current_time_naive().replace(second=0, microsecond=0)
+    _populate(rng, base)
+
+    for _ in range(NOW_SAMPLES):
+        now = _random_time(rng, base)
+        _refresh(now)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            tasks = [operations.get_task_with_status(t, now) for t in operations.get_task_snapshot(now=now)]
+            py_due, py_initial = operations._filter_notification_due(tasks, now, COOLDOWN)
+            py_pre = operations._filter_pre_notification_due(tasks, now)
+            sql_due, sql_initial = operations._select_notification_due(now, COOLDOWN)
+            sql_pre = operations._select_pre_notification_due(now)
+
+        assert _describe(sql_due) == _describe(py_due), now
+        assert _describe(sql_initial) == _describe(py_initial), now
+        assert _describe(sql_pre) == _describe(py_pre), now
+
+
+def test_stored_schedule_maintained_by_writes(guild, seed_tasks):
+    """Durum değiştiren operasyonlardan sonra saklanan çizelge == baştan hesaplanan."""
+    seed_tasks(10)
+    tasks = operations.get_task_snapshot()
+
+    def stored():
+        session = SessionLocal()
+        try:
+            return {
+                row.task_id: (row.next_available_at, row.closes_at, row.pre_notify_at)
+                for row in session.query(
+                    TaskStatus.task_id, TaskStatus.next_available_at, TaskStatus.closes_at, TaskStatus.pre_notify_at
+                ).filter(TaskStatus.task_id.in_([t.id for t in tasks]))
+            }
+        finally:
+            session.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        operations.mark_task_completed(tasks[0].id)
+        operations.mark_instance_entered(tasks[1].id)
+        operations.update_task(tasks[2].id, tasks[2].name, "", 90, 30)
+        operations.update_category(tasks[3].category_id, tasks[3].category_name, "", "cooldown", True, 15, False)
+
+    maintained = stored()
+    _refresh(get_current_time_naive())
+    assert maintained == stored()
@@ -0,0 +1,69 @@
+"""
+Çoklu replika kiralama - claim_tasks() / claim_job_run() ayrı süreçlerde.
+Her süreç kendi REPLICA_ID'sini (host-pid) kullanır.
+"""
+
+import multiprocessing
+import time
+
+from src.database import operations
+
+REPLICAS = 4
+
+
+def _claim_as_replica(task_ids, start_at: float, lease_seconds: int, run_key: str):
+    # Tüm replikalar aynı anda başlasın
+    time.sleep(max(0.0, start_at - time.time()))
+    claimed = set()
+    for _ in range(3):
+        claimed |= operations.claim_tasks(task_ids, lease_seconds)
+    return operations.REPLICA_ID, sorted(claimed), operations.claim_job_run("test_job", run_key)
+
+
+def _run_replicas(count: int, task_ids, lease_seconds: int, run_key: str):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(count) as pool:
+        # Süreçlerin açılışı (içe aktarımlar) beklenir
+        start_at = time.time() + 3
+        return pool.starmap(
+            _claim_as_replica, [(task_ids, start_at, lease_seconds, run_key)] * count
+        )
+
+
+def _task_ids():
+    return [t.id for t in operations.get_task_snapshot(include_inactive_categories=True)]
+
+
+def test_each_task_claimed_by_exactly_one_replica(guild, seed_tasks):
+    seed_tasks(50)
+    task_ids = _task_ids()
+
+    results = _run_replicas(REPLICAS, task_ids, 30, f"exclusive-{guild}")
+
+    assert len({replica for replica, _, _ in results}) == REPLICAS
+    claimed = [task_id for _, ids, _ in results for task_id in ids]
+    assert len(claimed) == len(set(claimed)), "aynı görev iki replikaya düştü"
+    assert set(claimed) == set(task_ids)
+    assert sum(ran for _, _, ran in results) == 1
+
+
+def test_expired_lease_is_taken_over(guild, seed_tasks):
+    seed_tasks(10)
+    task_ids = _task_ids()
+
+    # Kısa kirayla hepsini alıp çıkan ("çöken") replika
+    [(crashed, claimed, _)] = _run_replicas(1, task_ids, 1, f"crash-{guild}")
+    assert crashed != operations.REPLICA_ID
+    assert set(claimed) == set(task_ids)
+
+    assert operations.claim_tasks(task_ids) == set()
+    time.sleep(1.2)
+    assert operations.claim_tasks(task_ids) == set(task_ids)
+    # Kendi kirası yenilenebilir
+    assert operations.claim_tasks(task_ids) == set(task_ids)
+
+
+def test_job_run_claimed_once_per_key(guild):
+    assert operations.claim_job_run("test_job", f"once-{guild}")
+    assert not operations.claim_job_run("test_job", f"once-{guild}")
+    assert operations.claim_job_run("test_job", f"twice-{guild}")
@@ -0,0 +1,40 @@
+"""
+Ayar önbelleği - birim-iş içindeki yazım commit edilince görünür.
+"""
+
+import threading
+
+from src.database import models
+from src.database.models import settings_cache, unit_of_work
+
+
+def _read_elsewhere(key: str, guild: str) -> str:
+    """Birim-işin dışındaki (DB thread havuzu gibi) bir thread'den oku."""
+    result = []
+    reader = threading.Thread(target=lambda: result.append(settings_cache.get(key, guild_id=guild)))
+    reader.start()
+    reader.join()
+    return result[0]
+
+
+def test_setting_written_in_unit_of_work_not_served_stale(guild):
+    models.set_setting("auto_refresh_minutes", "60")
+    assert models.get_setting("auto_refresh_minutes") == "60"
+
+    with unit_of_work():
+        models.set_setting("auto_refresh_minutes", "15")
+        # Commit edilmemiş yazım: diğer thread eski değeri okur ve önbelleğe alır
+        assert _read_elsewhere("auto_refresh_minutes", guild) == "60"
+
+    assert models.get_setting("auto_refresh_minutes") == "15"
+
+
+def test_stats_count_hits_and_misses(guild):
+    settings_cache.invalidate(guild)
+    before = settings_cache.stats()
+    models.get_setting("bot_active")
+    models.get_setting("bot_active")
+    after = settings_cache.stats()
+
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
@@ -0,0 +1,76 @@
+"""
+SQLite (WAL) backend - bağlantı ayarları, şema ve temel operasyonlar.
+Operasyon testleri TEST_DATABASE_URL ile PostgreSQL'de de aynen çalışır.
+"""
+
+import contextlib
+import io
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.database import models, operations
+from src.database.migrations import MIGRATIONS
+from src.database.sqlite_backend import sqlite_engine_kwargs
+
+sqlite_only = pytest.mark.skipif(
+    models.engine.dialect.name != "sqlite", reason="yalnızca SQLite backend"
+)
+
+
+@sqlite_only
+def test_connection_pragmas():
+    with models.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        # NORMAL
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() > 0
+    assert models.get_backend_name() == "SQLite (WAL)"
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_in_memory_url_rejected(url):
+    with pytest.raises(ValueError):
+        sqlite_engine_kwargs(url)
+
+
+def test_all_migrations_applied():
+    with models.engine.connect() as conn:
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+    assert applied == {version for version, _, _ in MIGRATIONS}
+
+
+def test_task_lifecycle(guild):
+    with contextlib.redirect_stdout(io.StringIO()):
+        category_id = operations.add_category("Tekrarlanabilir", "", "cooldown")
+        task_id = operations.add_task(category_id, "Görev", cooldown_minutes=60)
+
+        task = operations.get_task_by_id(task_id)
+        assert task.name == "Görev" and task.category_name == "Tekrarlanabilir"
+
+        assert operations.update_task(task_id, "Görev 2", "açıklama", 90, 0)
+        assert operations.mark_task_completed(task_id)
+        task = operations.get_task_with_status(operations.get_task_by_id(task_id))
+        assert task.name == "Görev 2"
+        assert task.last_status == "completed" and not task.is_available
+        assert task.next_available_at == task.last_completed_at + timedelta(minutes=90)
+
+        assert operations.reset_tasks_by_type("cooldown") == 1
+        task = operations.get_task_with_status(operations.get_task_by_id(task_id))
+        assert task.last_completed_at is None and task.is_available
+
+
+def test_delete_cascades_to_status(guild):
+    with contextlib.redirect_stdout(io.StringIO()):
+        category_id = operations.add_category("Günlük", "", "daily")
+        task_id = operations.add_task(category_id, "Görev")
+
+    assert operations.delete_category(category_id)
+    with models.engine.connect() as conn:
+        statuses = conn.execute(
+            text("SELECT COUNT(*) FROM task_status WHERE task_id = :task_id"), {"task_id": task_id}
+        ).scalar()
+    assert statuses == 0
+    assert operations.get_task_by_id(task_id) is None
@@ -0,0 +1,44 @@
+"""
+Görev snapshot yükleyicisi - görev sayısından bağımsız, sabit sayıda sorgu.
+"""
+
+import pytest
+
+from src.database import operations
+from src.database.models import guild_scope
+
+
+def _count_snapshot_statements(statements, guild_id: str, expected: int) -> int:
+    with guild_scope(guild_id):
+        # Ayar önbelleği vb. ilk çağrıda dolsun; ölçülen ikinci çağrı
+        operations.get_all_tasks_with_status()
+        statements.reset()
+        tasks = operations.get_all_tasks_with_status()
+    assert len(tasks) == expected
+    return statements.count
+
+
+def test_snapshot_statement_count_is_constant(guild, other_guild, seed_tasks, statements):
+    large = other_guild
+    seed_tasks(10)
+    with guild_scope(large):
+        seed_tasks(1000)
+
+    small_count = _count_snapshot_statements(statements, guild, 10)
+    large_count = _count_snapshot_statements(statements, large, 1000)
+
+    assert small_count == large_count
+    assert small_count == 1, statements.statements
+
+
+@pytest.mark.parametrize("by_next_available", [False, True])
+def test_snapshot_loads_category_and_status(guild, seed_tasks, statements, by_next_available):
+    seed_tasks(5)
+    statements.reset()
+    tasks = operations.get_all_tasks_with_status(by_next_available=by_next_available)
+
+    assert len(tasks) == 5
+    assert {t.category_name for t in tasks} == {"Tekrarlanabilir"}
+    assert all(t.current_state is not None for t in tasks)
+    # Kategori / durum için görev başına ek sorgu yok
+    assert statements.count == 1